@@ -0,0 +1,135 @@
+"""
+Incremental analytics for the CMS Chatbot Service
+Counters are updated on the message write path so reading them never has to
+walk the stored sessions
+"""
+
+import threading
+import time
+from collections import Counter, deque
+
+
+class ChatAnalytics:
+    """Running session, message and intent counters for the live sessions.
+
+    Counts cover the sessions currently held by the session store: removing a
+    session (reset, LRU eviction or expiry) subtracts its messages again.
+    Session creations are indexed in fixed-width time buckets so the number
+    of sessions created within the active window is a running total, and
+    per-minute rollups of the message stream answer windowed queries.
+    """
+
+    def __init__(self, active_window=3600, bucket_seconds=60, rollup_minutes=60,
+                 clock=time.time):
+        self.active_window = active_window
+        self.bucket_seconds = bucket_seconds
+        self.rollup_minutes = rollup_minutes
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.total_sessions = 0
+        self.total_messages = 0
+        self.intent_counts = Counter()
+
+        self._active_buckets = deque()  # [bucket, sessions created in it]
+        self._active_index = {}  # bucket -> entry in _active_buckets
+        self._active_total = 0
+
+        self._rollups = deque()  # [minute, messages, Counter(intents)]
+
+    def _trim_active(self, now):
+        oldest = int((now - self.active_window) // self.bucket_seconds)
+        while self._active_buckets and self._active_buckets[0][0] <= oldest:
+            bucket, count = self._active_buckets.popleft()
+            del self._active_index[bucket]
+            self._active_total -= count
+
+    def _trim_rollups(self, now):
+        oldest = int(now // 60) - self.rollup_minutes
+        while self._rollups and self._rollups[0][0] <= oldest:
+            self._rollups.popleft()
+
+    def session_started(self, created_at=None):
+        """Record a new session created at the given epoch time"""
+        now = self._clock() if created_at is None else created_at
+        bucket = int(now // self.bucket_seconds)
+        with self._lock:
+            self.total_sessions += 1
+            entry = self._active_index.get(bucket)
+            if entry is None:
+                entry = [bucket, 0]
+                self._active_buckets.append(entry)
+                self._active_index[bucket] = entry
+            entry[1] += 1
+            self._active_total += 1
+            self._trim_active(now)
+
+    def session_removed(self, created_at, intents):
+        """Forget a session created at `created_at` holding messages with `intents`"""
+        bucket = int(created_at // self.bucket_seconds)
+        with self._lock:
+            self.total_sessions -= 1
+            entry = self._active_index.get(bucket)
+            if entry is not None and entry[1] > 0:
+                entry[1] -= 1
+                self._active_total -= 1
+            for intent in intents:
+                self._forget_message(intent)
+
+    def message_recorded(self, intent, timestamp=None):
+        """Count a message classified as `intent`"""
+        now = self._clock() if timestamp is None else timestamp
+        minute = int(now // 60)
+        with self._lock:
+            self.total_messages += 1
+            self.intent_counts[intent] += 1
+            if not self._rollups or self._rollups[-1][0] != minute:
+                self._rollups.append([minute, 0, Counter()])
+                self._trim_rollups(now)
+            rollup = self._rollups[-1]
+            rollup[1] += 1
+            rollup[2][intent] += 1
+
+    def message_removed(self, intent):
+        """Stop counting a message that is no longer stored"""
+        with self._lock:
+            self._forget_message(intent)
+
+    def _forget_message(self, intent):
+        self.total_messages -= 1
+        self.intent_counts[intent] -= 1
+        if self.intent_counts[intent] <= 0:
+            del self.intent_counts[intent]
+
+    def active_sessions(self):
+        with self._lock:
+            self._trim_active(self._clock())
+            return self._active_total
+
+    def window(self, minutes):
+        """Message and intent totals over the last `minutes` minutes"""
+        now = self._clock()
+        oldest = int(now // 60) - minutes
+        messages = 0
+        intents = Counter()
+        with self._lock:
+            for minute, count, rollup in reversed(self._rollups):
+                if minute <= oldest:
+                    break
+                messages += count
+                intents.update(rollup)
+        return {
+            'minutes': minutes,
+            'messages': messages,
+            'intent_distribution': dict(intents)
+        }
+
+    def snapshot(self):
+        with self._lock:
+            self._trim_active(self._clock())
+            return {
+                'total_sessions': self.total_sessions,
+                'total_messages': self.total_messages,
+                'intent_distribution': dict(self.intent_counts),
+                'active_sessions': self._active_total
+            }
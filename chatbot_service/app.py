@@ -3,36 +3,37 @@ AI Chatbot Service for CMS
 Python Flask service with NLTK for natural language processing
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import atexit
+import hmac
 import logging
 import re
 import json
-import nltk
+import math
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
-import requests
+import queue
+import time
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
-
-try:
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except LookupError:
-    nltk.download('averaged_perceptron_tagger')
-
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.tag import pos_tag
-from nltk.stem import PorterStemmer
+from analytics import ChatAnalytics
+from config import Config
+import event_log as events
+import fast_json
+from fuzzy import ScopedFuzzyIndex, SpellCorrector
+from intent_matcher import IntentMatcher
+from metrics import CONTENT_TYPE, MetricsRegistry
+import nlp
+from pricing import RateTableSource, to_kg
+from profiling import RequestProfiler
+from rate_limit import AdmissionController, RateLimiter
+from result_cache import ResultCache, cache_key
+from session_history import Interner, MessageHistory
+from session_store import SessionStore
+from subscriptions import END, SubscriptionHub
+from tracking_client import UNAVAILABLE_MESSAGE, TrackingClient
 
 app = Flask(__name__)
 CORS(app)
@@ -41,10 +42,6 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize NLP components
-stemmer = PorterStemmer()
-stop_words = set(stopwords.words('english'))
-
 # Intent patterns and keywords
 INTENT_PATTERNS = {
     'track_package': {
@@ -94,8 +91,303 @@ ENTITY_PATTERNS = {
     'complaint_category': r'(delayed|damaged|lost|wrong|poor|billing|behavior)'
 }
 
+# Canned replies per intent
+RESPONSES = {
+    'track_package': {
+        'message': "I'll help you track your package. I can see you might have a tracking number. Let me check that for you.",
+        'quickReplies': ['Show tracking details', 'Get delivery updates', 'Contact support']
+    },
+    'file_complaint': {
+        'message': "I'll help you file a complaint. Please provide:\n\n1. Your tracking number (if applicable)\n2. Brief description of the issue",
+        'quickReplies': ['Delayed delivery', 'Damaged package', 'Lost package', 'Other issue']
+    },
+    'location_update': {
+        'message': "To check your package location, I'll need your tracking number. Please provide your tracking ID.",
+        'quickReplies': ['I have tracking number', 'Lost tracking number', 'Contact support']
+    },
+    'support_contact': {
+        'message': "I can connect you with our support team:\n\n📞 Phone: 1800-XXX-XXXX (9 AM - 9 PM)\n📧 Email: support@cms.com\n💬 Live Chat: Available (9 AM - 6 PM)",
+        'quickReplies': ['Call now', 'Send email', 'Live chat']
+    },
+    'greeting': {
+        'message': "Hello! 👋 I'm your CMS assistant. I can help you with:\n\n📦 Track packages\n📝 File complaints\n💰 Get shipping costs\n📍 Location updates\n📞 Contact support\n\nHow can I assist you today?",
+        'quickReplies': ['Track package', 'File complaint', 'Get pricing', 'Contact support']
+    },
+    'goodbye': {
+        'message': "Thank you for using CMS! 😊 Have a great day! Feel free to chat with me anytime you need assistance.",
+        'quickReplies': ['Track another package', 'New inquiry']
+    },
+    'unknown': {
+        'message': "I'm not sure I understood that. Here are some things I can help with:\n\n• Type a tracking number to track your package\n• Say 'file complaint' to report an issue\n• Ask 'shipping cost' for pricing information\n• Type 'support' to contact our team",
+        'quickReplies': ['Track package', 'File complaint', 'Get pricing', 'Contact support']
+    }
+}
+
+# Replies for track_package once a tracking ID has been looked up
+TRACKING_RESPONSES = {
+    'found': {
+        'message': "Your package {tracking_id} is currently {status} at {location}. Expected delivery: {eta}.",
+        'quickReplies': ['Get more details', 'Change delivery']
+    },
+    'not_found': {
+        'message': "❌ Sorry, I couldn't find any package with tracking ID {tracking_id}. Please double-check the number and try again.",
+        'quickReplies': ['Try again', 'Contact support']
+    },
+    'suggestion': {
+        'message': "❌ Sorry, I couldn't find any package with tracking ID {tracking_id}. Did you mean {suggestion}?",
+        'quickReplies': ['Track {suggestion}', 'Try again', 'Contact support']
+    },
+    'missing_id': {
+        'message': "Please provide the tracking ID so I can help you track your package.",
+        'quickReplies': ['Enter tracking ID', 'Contact support']
+    },
+    'multiple': {
+        'message': "Here's the latest on your {count} packages:\n\n{lines}",
+        'quickReplies': ['Get more details', 'Track another package', 'Contact support']
+    }
+}
+
+# One line per tracking ID in a multi-parcel reply
+TRACKING_LINES = {
+    'found': "📦 {tracking_id}: {status} at {location} (expected {eta})",
+    'not_found': "❌ {tracking_id}: no package found with this ID",
+    'suggestion': "❌ {tracking_id}: no package found with this ID. Did you mean {suggestion}?",
+    'unavailable': "⚠️ {tracking_id}: couldn't reach the tracking service, please try again",
+    'skipped': "…and {count} more. I can track up to {limit} packages per message, so please send the rest separately."
+}
+
+# Replies for cost_inquiry, priced from the current rate table
+PRICING_RESPONSES = {
+    'rates': {
+        'message': "I'll help you estimate shipping costs. Our pricing:\n\n{lines}\n\nWhat's your package weight?",
+        'quickReplies': ['Under 1kg', '1-5kg', '5-10kg', 'Over 10kg']
+    },
+    'quote': {
+        'message': "💰 Shipping {weight} by {service} costs {currency}{cost}.",
+        'quickReplies': ['Compare services', 'Track package', 'Contact support']
+    },
+    'quotes': {
+        'message': "💰 Shipping {weight} costs:\n\n{lines}\n\nWhich service would you like?",
+        'quickReplies': ['Standard', 'Express', 'Same-day']
+    },
+    'invalid_weight': {
+        'message': "⚠️ We can ship packages from {min_weight:g} to {max_weight:g} kg. Please check the weight and try again.",
+        'quickReplies': ['Under 1kg', '1-5kg', '5-10kg', 'Contact support']
+    }
+}
+
+# One line per service in a pricing reply
+PRICING_LINES = {
+    'rate': "{icon} {service}: {currency}{base:g} base + {currency}{per_kg:g}/kg",
+    'quote': "{icon} {service}: {currency}{cost}"
+}
+
+# Messages for requests turned away with 429, by reason
+OVERLOADED_MESSAGE = "I'm receiving a lot of messages right now. Please try again in a moment."
+LIMIT_RESPONSES = {
+    'overloaded': OVERLOADED_MESSAGE,
+    'queue_timeout': OVERLOADED_MESSAGE,
+    'rate_limited': "You're sending messages a little too quickly. Please wait a moment and try again.",
+    'tracking_rate_limited': "You've tracked several packages in a short time. Please wait a moment before tracking another one.",
+    'subscriptions_full': "Live tracking updates are busy right now. Please check back in a moment."
+}
+
+# Tracking IDs accepted by the subscription endpoint
+SUBSCRIBABLE_ID = re.compile(r'[A-Za-z0-9_-]{3,64}')
+
+# Compiled once at startup; classify_intent only walks the message tokens
+intent_matcher = IntentMatcher(INTENT_PATTERNS, nlp.stem)
+
+def load_intent_model():
+    """Load the trained intent model if INTENT_CLASSIFIER=model, else None
+    
+    Falls back to the rule engine if the artifact cannot be read.
+    """
+    if Config.INTENT_CLASSIFIER != 'model':
+        return None
+    from intent_model import IntentModel
+    try:
+        model = IntentModel.load(Config.INTENT_MODEL_PATH, Config.INTENT_MODEL_MIN_CONFIDENCE)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Cannot load intent model {Config.INTENT_MODEL_PATH}, using rules: {e}")
+        return None
+    logger.info(f"Loaded intent model {Config.INTENT_MODEL_PATH} ({len(model.classes)} intents)")
+    return model
+
+# Loaded once per process, before the production launcher forks
+intent_model = load_intent_model()
+
+_spell_corrector = None
+
+def get_spell_corrector():
+    """Build the typo corrector over the intent vocabulary on first use"""
+    global _spell_corrector
+    if _spell_corrector is None:
+        vocabulary = set()
+        for config in INTENT_PATTERNS.values():
+            for keyword in config['keywords']:
+                vocabulary.update(keyword.split())
+            for pattern in config['patterns']:
+                vocabulary.update(re.findall(r'[a-z]{3,}', pattern))
+        _spell_corrector = SpellCorrector(vocabulary, nlp.get_stopwords())
+    return _spell_corrector
+
+def correct_spelling(text):
+    """Text with misspelt intent keywords corrected, if FUZZY_MATCHING is on"""
+    return get_spell_corrector().correct(text) if Config.FUZZY_MATCHING else text
+
+# Results for repeated messages; prewarmed with every quick reply by warm_up()
+result_cache = ResultCache(Config.RESULT_CACHE_SIZE)
+
+# Entities specific to one shipment or customer; messages carrying them are
+# unlikely to repeat, so their results are not cached
+VOLATILE_ENTITIES = ('phone_number', 'email', 'weight')
+
+# Session histories store intents and canned replies as small integer IDs
+INTENT_IDS = Interner(list(INTENT_PATTERNS) + ['unknown'], max_size=256)
+RESPONSE_IDS = Interner(reply['message'] for reply in
+                        list(RESPONSES.values()) + list(TRACKING_RESPONSES.values()))
+
+# Prometheus metrics served on /metrics
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+stage_latency = metrics.histogram('chatbot_stage_duration_seconds',
+                                  'Time spent in each message pipeline stage', ['stage'])
+request_latency = metrics.histogram('chatbot_request_duration_seconds',
+                                    'Request handling time', ['endpoint'])
+request_count = metrics.counter('chatbot_requests', 'Processed messages', ['endpoint', 'intent'])
+error_count = metrics.counter('chatbot_request_errors', 'Messages that failed',
+                              ['endpoint', 'intent'])
+rejected_count = metrics.counter('chatbot_rejected_requests', 'Requests turned away with 429',
+                                 ['reason'])
+upstream_latency = metrics.histogram('chatbot_tracking_upstream_duration_seconds',
+                                     'CMS tracking API call time', ['outcome'])
+
+def timed(stage, started):
+    """Record the time since `started` for `stage`; returns the current time"""
+    now = time.perf_counter()
+    stage_latency.observe(now - started, stage)
+    return now
+
+def observe_upstream(seconds, ok):
+    upstream_latency.observe(seconds, 'ok' if ok else 'error')
+
+# Per-client message and tracking budgets; the buckets live in shared memory
+# created here, before the production launcher forks, so all workers share them
+rate_limiter = RateLimiter(Config.RATE_LIMIT_PER_MINUTE, Config.RATE_LIMIT_BURST,
+                           Config.RATE_LIMIT_SLOTS)
+tracking_limiter = RateLimiter(Config.TRACKING_RATE_LIMIT_PER_MINUTE,
+                               Config.TRACKING_RATE_LIMIT_BURST, Config.RATE_LIMIT_SLOTS)
+
+# Load shedding for this process
+admission = AdmissionController(Config.MAX_IN_FLIGHT, Config.ADMISSION_MAX_WAIT,
+                                Config.MAX_QUEUE_WAIT)
+
+# Pooled, cached client for the CMS backend tracking API
+tracking_client = TrackingClient(
+    os.environ.get('CMS_API_URL', Config.CMS_API_URL),
+    connect_timeout=Config.TRACKING_CONNECT_TIMEOUT,
+    read_timeout=Config.TRACKING_READ_TIMEOUT,
+    cache_ttl=Config.TRACKING_CACHE_TTL,
+    negative_ttl=Config.TRACKING_NEGATIVE_CACHE_TTL,
+    cache_size=Config.TRACKING_CACHE_SIZE,
+    pool_size=Config.TRACKING_POOL_SIZE,
+    breaker_failures=Config.TRACKING_BREAKER_FAILURES,
+    breaker_reset=Config.TRACKING_BREAKER_RESET,
+    on_upstream=observe_upstream
+)
+
+# Tracking IDs each session recently found, offered back to the same session
+# as "did you mean" suggestions when a lookup one edit away finds nothing;
+# never shown to other sessions, whose customers' IDs they are not
+recent_tracking_ids = ScopedFuzzyIndex(Config.TRACKING_SUGGESTION_CACHE_SIZE,
+                                       Config.TRACKING_SUGGESTION_IDS_PER_SESSION)
+
+# Runs the lookups of messages naming several tracking IDs side by side;
+# threads start on first use, i.e. in the worker processes
+tracking_executor = ThreadPoolExecutor(max_workers=Config.TRACKING_FANOUT_WORKERS,
+                                       thread_name_prefix='tracking')
+
+# Shipping rates for cost_inquiry replies and /api/pricing/quote, reloaded
+# when the rate table file changes
+rate_tables = RateTableSource(Config.RATE_TABLE_PATH, Config.RATE_TABLE_CHECK_INTERVAL)
+
+# Live tracking feeds: one backend poller per followed ID, shared by subscribers
+tracking_hub = SubscriptionHub(tracking_client, Config.SUBSCRIPTION_POLL_INTERVAL,
+                               Config.MAX_SUBSCRIPTIONS)
+
+# Analytics counters, maintained on the /api/process write path
+analytics = ChatAnalytics(
+    active_window=3600,
+    rollup_minutes=Config.ANALYTICS_ROLLUP_MINUTES
+)
+
+def create_session(timestamp=None):
+    """Create an empty session and count it in the analytics"""
+    created_at = datetime.now() if timestamp is None else datetime.fromtimestamp(timestamp)
+    analytics.session_started(created_at.timestamp())
+    return {
+        'messages': MessageHistory(Config.SESSION_HISTORY_SIZE, INTENT_IDS, RESPONSE_IDS),
+        'context': {},
+        'created_at': created_at.isoformat()
+    }
+
+def remove_session(session_id, session):
+    """Remove an evicted, expired or reset session from the analytics and
+    forget the tracking IDs it found"""
+    analytics.session_removed(
+        datetime.fromisoformat(session['created_at']).timestamp(),
+        session['messages'].intent_names()
+    )
+    recent_tracking_ids.discard_scope(session_id)
+
 # Session storage (in production, use Redis or database)
-sessions = {}
+sessions = SessionStore(
+    max_sessions=Config.MAX_SESSIONS,
+    ttl_seconds=Config.SESSION_TIMEOUT.total_seconds(),
+    on_evict=remove_session
+)
+
+# Durable log of processed messages and resets, replayed by restore_sessions()
+event_log = events.EventLog(Config.EVENT_LOG_PATH, Config.EVENT_LOG_BATCH_SIZE,
+                            Config.EVENT_LOG_QUEUE_SIZE,
+                            Config.EVENT_LOG_RETENTION_HOURS * 3600,
+                            Config.EVENT_LOG_PRUNE_INTERVAL) if Config.EVENT_LOG_PATH else None
+if event_log is not None:
+    # Write out events still queued when the process exits
+    atexit.register(event_log.close)
+
+# cProfile of the next N requests (armed on demand) or of 1 in K requests
+profiler = RequestProfiler(Config.PROFILE_DIR, Config.PROFILE_SAMPLE_EVERY,
+                           Config.PROFILE_FLUSH_EVERY)
+# Write out profiles still being aggregated when the process exits
+atexit.register(profiler.flush)
+
+def install_profiling_signal():
+    """Arm PROFILE_SIGNAL_REQUESTS requests on PROFILE_SIGNAL; call from the
+    main thread of each serving process, after the server set up its own
+    signal handlers"""
+    if Config.PROFILE_SIGNAL:
+        profiler.install_signal_handler(Config.PROFILE_SIGNAL, Config.PROFILE_SIGNAL_REQUESTS)
+
+metrics.gauge('chatbot_sessions', 'Sessions held in memory', lambda: len(sessions))
+metrics.gauge('chatbot_in_flight_requests', 'Requests being handled by this process',
+              lambda: admission.in_flight)
+metrics.gauge('chatbot_result_cache_entries', 'Cached message analyses', lambda: len(result_cache))
+metrics.gauge('chatbot_tracking_subscribers', 'Open tracking subscription streams',
+              lambda: tracking_hub.stats()['subscribers'])
+metrics.gauge('chatbot_tracking_feeds', 'Tracking IDs polled for subscribers',
+              lambda: tracking_hub.stats()['feeds'])
+if event_log is not None:
+    metrics.gauge('chatbot_event_log_queued', 'Events waiting for the log writer',
+                  lambda: event_log.stats()['queued'])
+
+def start_background_tasks():
+    """Start per-process background threads (again in each forked worker)"""
+    sessions.start_reaper(Config.SESSION_CLEANUP_INTERVAL)
+    if event_log is not None:
+        event_log.start()
+
+start_background_tasks()
 
 def preprocess_text(text):
     """Preprocess text for NLP analysis"""
@@ -103,13 +395,14 @@ def preprocess_text(text):
     text = text.lower()
     
     # Tokenize
-    tokens = word_tokenize(text)
+    tokens = nlp.tokenize(text)
     
     # Remove stopwords and punctuation
+    stop_words = nlp.get_stopwords()
     tokens = [token for token in tokens if token.isalnum() and token not in stop_words]
     
     # Stem words
-    stemmed_tokens = [stemmer.stem(token) for token in tokens]
+    stemmed_tokens = [nlp.stem(token) for token in tokens]
     
     return tokens, stemmed_tokens
 
@@ -124,124 +417,566 @@ def extract_entities(text):
     
     return entities
 
+# Joins messages for bulk entity extraction; no entity pattern can match
+# across it ('.' stops at the newline, '\s' and the classes stop at NUL)
+BATCH_SEPARATOR = '\n\x00\n'
+
+COMPILED_ENTITY_PATTERNS = {
+    entity_type: re.compile(pattern, re.IGNORECASE)
+    for entity_type, pattern in ENTITY_PATTERNS.items()
+}
+
+def extract_entities_bulk(texts):
+    """extract_entities for many texts with one regex scan per entity type"""
+    if any('\x00' in text for text in texts):
+        return [extract_entities(text) for text in texts]
+    
+    joined = BATCH_SEPARATOR.join(texts)
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(BATCH_SEPARATOR)
+    
+    results = [{} for _ in texts]
+    for entity_type, regex in COMPILED_ENTITY_PATTERNS.items():
+        for match in regex.finditer(joined):
+            # Same shape as re.findall: whole match, sole group or group tuple
+            if regex.groups == 0:
+                value = match.group(0)
+            elif regex.groups == 1:
+                value = match.groups('')[0]
+            else:
+                value = match.groups('')
+            # A match may begin on the separator's trailing newline ('[\s-]?'),
+            # but never ends inside it
+            index = bisect_right(starts, match.end() - 1) - 1
+            results[index].setdefault(entity_type, []).append(value)
+    return results
+
 def classify_intent(text):
-    """Classify user intent using keyword matching and pattern recognition"""
+    """Classify user intent using keyword matching and pattern recognition,
+    or the trained model if one is loaded"""
+    started = time.perf_counter()
+    text = correct_spelling(text)
+    if intent_model is not None:
+        result = intent_model.classify(text)
+        timed('classify', started)
+        return result
     tokens, stemmed_tokens = preprocess_text(text)
-    text_lower = text.lower()
+    started = timed('preprocess', started)
+    result = intent_matcher.classify(text.lower(), stemmed_tokens)
+    timed('classify', started)
+    return result
+
+_warmed = False
+
+def warm_up():
+    """Load lazily initialised NLP state and prewarm the result cache
     
-    intent_scores = {}
+    Called before serving (by the production launcher before forking, so
+    workers share it). Runs once per process state: workers forked from a
+    warmed master skip it.
+    """
+    global _warmed
+    if _warmed:
+        return
+    _warmed = True
+    analyze_message("Hello, where is my package CMS000001?")
+    for reply in list(RESPONSES.values()) + list(TRACKING_RESPONSES.values()):
+        for quick_reply in reply['quickReplies']:
+            if '{' not in quick_reply:
+                analyze_message(quick_reply)
+
+def has_volatile_entities(entities):
+    """True if the entities identify a specific shipment, customer or parcel"""
+    if any(entity_type in entities for entity_type in VOLATILE_ENTITIES):
+        return True
+    # Plain words of 6+ letters also match the tracking pattern; only
+    # candidates containing a digit look like real tracking IDs
+    return any(any(char.isdigit() for char in candidate)
+               for candidate in entities.get('tracking_number', ()))
+
+def analyze_message(message):
+    """Run the NLP pipeline: returns (intent, confidence, entities)"""
+    key = cache_key(message)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
     
-    for intent, config in INTENT_PATTERNS.items():
-        score = 0
-        
-        # Keyword matching
-        keyword_matches = sum(1 for keyword in config['keywords'] if keyword in text_lower)
-        score += keyword_matches * 0.3
-        
-        # Pattern matching
-        pattern_matches = sum(1 for pattern in config['patterns'] if re.search(pattern, text_lower))
-        score += pattern_matches * 0.4
-        
-        # Stemmed token matching
-        stemmed_keyword_matches = sum(1 for keyword in config['keywords'] 
-                                    if stemmer.stem(keyword) in stemmed_tokens)
-        score += stemmed_keyword_matches * 0.2
-        
-        # Normalize score
-        max_possible_score = len(config['keywords']) * 0.3 + len(config['patterns']) * 0.4 + len(config['keywords']) * 0.2
-        if max_possible_score > 0:
-            score = score / max_possible_score
-        
-        if score >= config['confidence_threshold']:
-            intent_scores[intent] = score
-    
-    # Return the intent with highest score
-    if intent_scores:
-        best_intent = max(intent_scores, key=intent_scores.get)
-        return best_intent, intent_scores[best_intent]
-    
-    return 'unknown', 0.0
-
-def generate_response(intent, entities, text, session_id):
-    """Generate appropriate response based on intent and entities"""
-    
-    responses = {
-        'track_package': {
-            'message': "I'll help you track your package. I can see you might have a tracking number. Let me check that for you.",
-            'quickReplies': ['Show tracking details', 'Get delivery updates', 'Contact support']
-        },
-        'file_complaint': {
-            'message': "I'll help you file a complaint. Please provide:\n\n1. Your tracking number (if applicable)\n2. Brief description of the issue",
-            'quickReplies': ['Delayed delivery', 'Damaged package', 'Lost package', 'Other issue']
-        },
-        'cost_inquiry': {
-            'message': "I'll help you estimate shipping costs. Our pricing:\n\n📦 Standard (3 days): ₹50 base + ₹15/kg\n🚀 Express (1 day): ₹50 base + ₹22.5/kg\n⚡ Same-day: ₹50 base + ₹30/kg\n\nWhat's your package weight?",
-            'quickReplies': ['Under 1kg', '1-5kg', '5-10kg', 'Over 10kg']
-        },
-        'location_update': {
-            'message': "To check your package location, I'll need your tracking number. Please provide your tracking ID.",
-            'quickReplies': ['I have tracking number', 'Lost tracking number', 'Contact support']
-        },
-        'support_contact': {
-            'message': "I can connect you with our support team:\n\n📞 Phone: 1800-XXX-XXXX (9 AM - 9 PM)\n📧 Email: support@cms.com\n💬 Live Chat: Available (9 AM - 6 PM)",
-            'quickReplies': ['Call now', 'Send email', 'Live chat']
-        },
-        'greeting': {
-            'message': "Hello! 👋 I'm your CMS assistant. I can help you with:\n\n📦 Track packages\n📝 File complaints\n💰 Get shipping costs\n📍 Location updates\n📞 Contact support\n\nHow can I assist you today?",
-            'quickReplies': ['Track package', 'File complaint', 'Get pricing', 'Contact support']
-        },
-        'goodbye': {
-            'message': "Thank you for using CMS! 😊 Have a great day! Feel free to chat with me anytime you need assistance.",
-            'quickReplies': ['Track another package', 'New inquiry']
-        },
-        'unknown': {
-            'message': "I'm not sure I understood that. Here are some things I can help with:\n\n• Type a tracking number to track your package\n• Say 'file complaint' to report an issue\n• Ask 'shipping cost' for pricing information\n• Type 'support' to contact our team",
-            'quickReplies': ['Track package', 'File complaint', 'Get pricing', 'Contact support']
+    intent, confidence = classify_intent(message)
+    started = time.perf_counter()
+    entities = extract_entities(message)
+    timed('entities', started)
+    result = (intent, confidence, entities)
+    
+    if has_volatile_entities(entities):
+        result_cache.skip()
+    else:
+        result_cache.put(key, result)
+    return result
+
+def analyze_batch(messages):
+    """analyze_message for a list of messages, scoring the uncached ones together"""
+    results = [None] * len(messages)
+    pending = []
+    for index, message in enumerate(messages):
+        results[index] = result_cache.get(cache_key(message))
+        if results[index] is None:
+            pending.append(index)
+    if not pending:
+        return results
+    
+    texts = [correct_spelling(messages[index]) for index in pending]
+    if intent_model is not None:
+        classified = intent_model.classify_batch(texts)
+    else:
+        stemmed = [preprocess_text(text)[1] for text in texts]
+        classified = get_batch_scorer().classify([text.lower() for text in texts], stemmed)
+    entities = extract_entities_bulk([messages[index] for index in pending])
+    
+    for index, (intent, confidence), message_entities in zip(pending, classified, entities):
+        results[index] = (intent, confidence, message_entities)
+        if has_volatile_entities(message_entities):
+            result_cache.skip()
+        else:
+            result_cache.put(cache_key(messages[index]), results[index])
+    return results
+
+_batch_scorer = None
+
+def get_batch_scorer():
+    """Build the NumPy batch scorer on first use (keeps NumPy off the import path)"""
+    global _batch_scorer
+    if _batch_scorer is None:
+        from batch_scoring import BatchIntentScorer
+        _batch_scorer = BatchIntentScorer(intent_matcher)
+    return _batch_scorer
+
+def tracking_candidates(intent, entities):
+    """Return every distinct tracking ID in the message, in order
+    
+    Plain words also match the tracking pattern, so when the message holds
+    candidates with a digit only those are kept; otherwise the first
+    candidate is tried, as before multi-parcel tracking.
+    """
+    if intent != 'track_package':
+        return []
+    tracking_numbers = entities.get('tracking_number')
+    if not tracking_numbers:
+        return []
+    candidates = list(dict.fromkeys(
+        candidate for candidate in tracking_numbers
+        if any(char.isdigit() for char in candidate)))
+    return candidates or tracking_numbers[:1]
+
+def tracking_lookup_ids(intent, entities):
+    """Return the tracking IDs generate_response will look up (at most
+    TRACKING_MAX_IDS_PER_MESSAGE)"""
+    return tracking_candidates(intent, entities)[:Config.TRACKING_MAX_IDS_PER_MESSAGE]
+
+def lookup_packages(tracking_ids):
+    """Statuses of `tracking_ids`, in order, looked up concurrently
+    
+    Total time is about that of the slowest lookup; a failed lookup only
+    affects its own result.
+    """
+    if len(tracking_ids) == 1:
+        return [get_package_status(tracking_ids[0])]
+    return list(tracking_executor.map(get_package_status, tracking_ids))
+
+def remember_tracking_ids(session_id, tracking_ids, packages):
+    """Add the IDs the backend found to the session's suggestion index"""
+    for tracking_id, package_info in zip(tracking_ids, packages):
+        if package_info['found']:
+            recent_tracking_ids.add(session_id, tracking_id.upper())
+
+def suggest_tracking_ids(session_id, tracking_id):
+    """[the ID this session found that is one edit away from an ID the
+    backend did not find], or [] if there is none or several are"""
+    suggestion = recent_tracking_ids.best(session_id, tracking_id.upper())
+    return [suggestion] if suggestion is not None else []
+
+def package_summary(session_id, tracking_id, package_info):
+    """Per-ID entry of the `packages` list in a multi-parcel reply"""
+    if package_info['found']:
+        return {'trackingId': tracking_id, 'found': True, 'status': package_info['status'],
+                'location': package_info['location'], 'eta': package_info['eta']}
+    if package_info['message'] == UNAVAILABLE_MESSAGE:
+        return {'trackingId': tracking_id, 'found': False, 'error': 'unavailable',
+                'message': package_info['message']}
+    return {'trackingId': tracking_id, 'found': False, 'error': 'not_found',
+            'message': package_info['message'],
+            'suggestions': suggest_tracking_ids(session_id, tracking_id)}
+
+def package_line(summary, package_info):
+    """Line of a multi-parcel reply for one tracking ID"""
+    tracking_id = summary['trackingId']
+    if summary['found']:
+        return TRACKING_LINES['found'].format(tracking_id=tracking_id, **package_info)
+    if summary.get('suggestions'):
+        return TRACKING_LINES['suggestion'].format(tracking_id=tracking_id,
+                                                   suggestion=summary['suggestions'][0])
+    return TRACKING_LINES[summary['error']].format(tracking_id=tracking_id)
+
+def multiple_packages_response(session_id, tracking_ids, packages, skipped):
+    """Combined reply for a message naming several tracking IDs"""
+    summaries = [package_summary(session_id, tracking_id, package_info)
+                 for tracking_id, package_info in zip(tracking_ids, packages)]
+    lines = [package_line(summary, package_info)
+             for summary, package_info in zip(summaries, packages)]
+    if skipped:
+        lines.append(TRACKING_LINES['skipped'].format(
+            count=skipped, limit=Config.TRACKING_MAX_IDS_PER_MESSAGE))
+    reply = TRACKING_RESPONSES['multiple']
+    return {
+        'message': reply['message'].format(count=len(tracking_ids), lines='\n'.join(lines)),
+        'quickReplies': reply['quickReplies'],
+        'packages': summaries
+    }
+
+def pricing_response(entities):
+    """cost_inquiry reply: a quote for the weight (and delivery speed) named
+    in the message, or the rate overview if there is no weight"""
+    table = rate_tables.get()
+    weights = entities.get('weight')
+    if not weights:
+        reply = PRICING_RESPONSES['rates']
+        lines = [PRICING_LINES['rate'].format(icon=detail['icon'], service=detail['displayName'],
+                                              currency=table.currency, base=offset, per_kg=slope)
+                 for detail, offset, slope in zip(table.details, table.offsets, table.slopes)]
+        return {
+            'message': reply['message'].format(lines='\n'.join(lines)),
+            'quickReplies': reply['quickReplies']
+        }
+    
+    value, unit = weights[0]
+    weight_kg = to_kg(value, unit)
+    if not table.valid_weight(weight_kg):
+        reply = PRICING_RESPONSES['invalid_weight']
+        return {
+            'message': reply['message'].format(min_weight=table.min_weight,
+                                               max_weight=table.max_weight),
+            'quickReplies': reply['quickReplies']
         }
+    
+    weight = f"{value} {unit.lower()}"
+    speeds = entities.get('delivery_speed')
+    index = table.service_index(speeds[0]) if speeds else None
+    if index is not None:
+        quote = table.quote(weight_kg, index)
+        reply = PRICING_RESPONSES['quote']
+        return {
+            'message': reply['message'].format(weight=weight,
+                                               service=table.details[index]['displayName'],
+                                               currency=table.currency, cost=quote['cost']),
+            'quickReplies': reply['quickReplies'],
+            'quotes': [quote]
+        }
+    
+    quotes = table.quote_all(weight_kg)
+    lines = [PRICING_LINES['quote'].format(icon=detail['icon'], service=detail['displayName'],
+                                           currency=table.currency, cost=quote['cost'])
+             for detail, quote in zip(table.details, quotes)]
+    reply = PRICING_RESPONSES['quotes']
+    return {
+        'message': reply['message'].format(weight=weight, lines='\n'.join(lines)),
+        'quickReplies': reply['quickReplies'],
+        'quotes': quotes
     }
+
+def generate_response(intent, entities, text, session_id, packages=None):
+    """Generate appropriate response based on intent and entities
+    
+    packages may carry already fetched statuses for tracking_lookup_ids()
+    (the async server looks them up without blocking); otherwise they are
+    fetched. Intents without a dynamic reply get their canned one, which is
+    shared and must not be modified.
+    """
     
     if intent == 'track_package':
-        tracking_numbers = entities.get('tracking_number')
-        if tracking_numbers and len(tracking_numbers) > 0:
-            tracking_id = tracking_numbers[0]
-            package_info = get_package_status(tracking_id)
+        tracking_ids = tracking_lookup_ids(intent, entities)
+        if len(tracking_ids) > 1:
+            if packages is None:
+                packages = lookup_packages(tracking_ids)
+            remember_tracking_ids(session_id, tracking_ids, packages)
+            skipped = len(tracking_candidates(intent, entities)) - len(tracking_ids)
+            return multiple_packages_response(session_id, tracking_ids, packages, skipped)
+        if tracking_ids:
+            tracking_id = tracking_ids[0]
+            package_info = get_package_status(tracking_id) if packages is None else packages[0]
             if package_info['found']:
+                remember_tracking_ids(session_id, tracking_ids, [package_info])
+                reply = TRACKING_RESPONSES['found']
+                return {
+                    'message': reply['message'].format(tracking_id=tracking_id, **package_info),
+                    'quickReplies': reply['quickReplies']
+                }
+            suggestions = ([] if package_info['message'] == UNAVAILABLE_MESSAGE
+                           else suggest_tracking_ids(session_id, tracking_id))
+            if suggestions:
+                reply = TRACKING_RESPONSES['suggestion']
                 return {
-                    'message': f"Your package {tracking_id} is currently {package_info['status']} at {package_info['location']}. Expected delivery: {package_info['eta']}.",
-                    'quickReplies': ['Get more details', 'Change delivery']
+                    'message': reply['message'].format(tracking_id=tracking_id,
+                                                       suggestion=suggestions[0]),
+                    'quickReplies': [quick_reply.format(suggestion=suggestions[0])
+                                     for quick_reply in reply['quickReplies']]
                 }
             else:
+                reply = TRACKING_RESPONSES['not_found']
                 return {
-                    'message': f"❌ Sorry, I couldn't find any package with tracking ID {tracking_id}. Please double-check the number and try again.",
-                    'quickReplies': ['Try again', 'Contact support']
+                    'message': reply['message'].format(tracking_id=tracking_id),
+                    'quickReplies': reply['quickReplies']
                 }
-        else:
-            return {
-                'message': "Please provide the tracking ID so I can help you track your package.",
-                'quickReplies': ['Enter tracking ID', 'Contact support']
-            }
-        return responses['track_package']
+        return TRACKING_RESPONSES['missing_id']
+    
+    if intent == 'cost_inquiry':
+        return pricing_response(entities)
+    
+    return RESPONSES.get(intent, RESPONSES['unknown'])
 
 def get_package_status(tracking_id):
     """Fetches package status from the main CMS backend."""
-    cms_api_url = os.environ.get('CMS_API_URL', 'http://localhost:5000')
+    return tracking_client.get_status(tracking_id)
+
+def store_message(session_id, message, intent, confidence, entities, bot_response,
+                  context, timestamp):
+    """Add a message to its session (creating it) and to the analytics"""
+    session = sessions.get_or_create(session_id, lambda: create_session(timestamp))
+    
+    dropped = session['messages'].append(message, intent, confidence, entities,
+                                         bot_response, timestamp)
+    analytics.message_recorded(intent, timestamp)
+    if dropped is not None:
+        # The oldest message fell out of the session's history
+        analytics.message_removed(dropped)
+    
+    # Update context
+    session['context'].update(context)
+
+def record_exchange(session_id, message, intent, confidence, entities, response_data, context):
+    """Store a processed message in its session and build the API reply"""
+    timestamp = time.time()
+    store_message(session_id, message, intent, confidence, entities,
+                  response_data['message'], context, timestamp)
+    if event_log is not None:
+        event_log.record_message(session_id, timestamp, message, intent, confidence,
+                                 entities, response_data['message'], context)
+    
+    reply = {
+        'message': response_data['message'],
+        'intent': intent,
+        'confidence': confidence,
+        'entities': entities,
+        'quickReplies': response_data.get('quickReplies', []),
+        'sessionId': session_id,
+        'timestamp': datetime.now().isoformat()
+    }
+    for key in ('packages', 'quotes'):
+        if key in response_data:
+            reply[key] = response_data[key]
+    return reply
+
+def json_response(body, status=200):
+    """Flask response for JSON bytes from fast_json"""
+    return Response(body, status=status, mimetype=fast_json.CONTENT_TYPE)
+
+def admit(request_start, blocking=True):
+    """Admission control for a message request
+    
+    Returns None if the request may run (release its slot with
+    admission.release() when done), otherwise the reason it is shed.
+    """
+    if admission.stale(request_start):
+        return 'queue_timeout'
+    if not admission.acquire(blocking):
+        return 'overloaded'
+    return None
+
+def rate_limit_key(data, remote_addr):
+    """Budget key: the user, else the session, else the client address"""
+    return str(data.get('userId') or data.get('sessionId') or remote_addr)
+
+def rejection(reason, retry_after):
+    """(payload, Retry-After header value) for a request refused with 429"""
+    rejected_count.inc(reason)
+    return {
+        'error': 'Too many requests',
+        'reason': reason,
+        'message': LIMIT_RESPONSES[reason],
+        'retryAfter': round(retry_after, 2)
+    }, str(max(1, math.ceil(retry_after)))
+
+def too_many_requests(reason, retry_after=1):
+    payload, retry_header = rejection(reason, retry_after)
+    return jsonify(payload), 429, {'Retry-After': retry_header}
+
+def admit_batch_items(items, remote_addr):
+    """Charge each batch item to its client's message budget, as if it had
+    been sent to /api/process on its own
+    
+    Returns (results, admitted): results holds an error in place of every
+    malformed or refused item and None for the others, which admitted lists
+    as (index, rate limit key).
+    """
+    results = [None] * len(items)
+    admitted = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('message'), str):
+            results[index] = {'error': 'Missing message in request'}
+            continue
+        client_key = rate_limit_key(item, remote_addr)
+        retry_after = rate_limiter.allow(client_key)
+        if retry_after:
+            results[index] = rejection('rate_limited', retry_after)[0]
+        else:
+            admitted.append((index, client_key))
+    return results, admitted
+
+def charge_batch_lookups(results, admitted, analyzed):
+    """Charge the tracking budget of the admitted items whose message looks
+    up a package; returns (index, analysis) of the items to answer and
+    records the refused ones in results"""
+    answered = []
+    for (index, client_key), analysis in zip(admitted, analyzed):
+        intent, _, entities = analysis
+        tracking_ids = tracking_lookup_ids(intent, entities)
+        if tracking_ids:
+            retry_after = tracking_limiter.allow(client_key, cost=len(tracking_ids))
+            if retry_after:
+                results[index] = rejection('tracking_rate_limited', retry_after)[0]
+                continue
+        answered.append((index, analysis))
+    return answered
+
+def answer_batch_item(index, item, analysis, packages=None):
+    """Reply to one admitted batch item, or its error result"""
+    intent, confidence, entities = analysis
+    message = item['message']
+    session_id = item.get('sessionId', f'session_{datetime.now().timestamp()}')
     try:
-        response = requests.get(f"{cms_api_url}/api/tracking/{tracking_id}")
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        data = response.json()
-        if data['success'] and data['data']:
-            package = data['data']
-            return {
-                'found': True,
-                'status': package['status'],
-                'location': package['currentLocation'],
-                'eta': package['expectedDeliveryDate']
-            }
+        response_data = generate_response(intent, entities, message, session_id, packages)
+        reply = record_exchange(session_id, message, intent, confidence,
+                                entities, response_data, item.get('context', {}))
+        request_count.inc('batch', intent)
+        return reply
+    except Exception as e:
+        error_count.inc('batch', intent)
+        logger.error(f"Error processing batch item {index}: {str(e)}")
+        return {'error': 'Internal server error', 'sessionId': session_id}
+
+def price_items(data):
+    """(payload, status) for a bulk quote request body"""
+    items = data if isinstance(data, list) else (data or {}).get('items')
+    if not items or not isinstance(items, list):
+        return {'error': 'Missing items in request'}, 400
+    if len(items) > Config.PRICING_BATCH_MAX_SIZE:
+        return {'error': f'Too many items (max {Config.PRICING_BATCH_MAX_SIZE})'}, 400
+    table = rate_tables.get()
+    return {'currency': table.currency, 'quotes': table.quote_batch(items)}, 200
+
+def profile_admin(token, data=None):
+    """(payload, status) for /admin/profile: arm the next `requests`
+    requests, set `sampleEvery`, `flush` what was collected, and report"""
+    if not Config.ADMIN_TOKEN:
+        return {'error': 'Not found'}, 404
+    if not token or not hmac.compare_digest(token, Config.ADMIN_TOKEN):
+        return {'error': 'Forbidden'}, 403
+    if data is not None:
+        if not isinstance(data, dict):
+            return {'error': 'Expected a JSON object'}, 400
+        for key in ('requests', 'sampleEvery'):
+            value = data.get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool)
+                                      or value < 0):
+                return {'error': f'{key} must be a non-negative integer'}, 400
+        if data.get('requests'):
+            profiler.arm(data['requests'])
+        if data.get('sampleEvery') is not None:
+            profiler.set_sample_every(data['sampleEvery'])
+        if data.get('flush'):
+            profiler.flush()
+    return profiler.status(), 200
+
+def status_event(tracking_id, result):
+    """Server-sent event for a tracking status published by a subscription feed"""
+    if result is END:
+        return 'event: end\ndata: {}\n\n'
+    data = {
+        'trackingId': tracking_id,
+        'found': result['found'],
+        'timestamp': datetime.now().isoformat()
+    }
+    if result['found']:
+        data.update(status=result['status'], location=result['location'], eta=result['eta'])
+    else:
+        data['message'] = result['message']
+    return f"event: status\ndata: {json.dumps(data)}\n\n"
+
+def end_session(session_id):
+    """Drop a session (reset by the user) and log the reset"""
+    sessions.delete(session_id)
+    if event_log is not None:
+        event_log.record_reset(session_id, time.time())
+
+_restored = False
+
+def restore_sessions():
+    """Rebuild sessions and analytics by replaying the event log
+    
+    Called once before serving, like warm_up(), and a no-op after that:
+    messages are appended without deduplication, so workers forked from a
+    master that replayed the log (the ASGI lifespan calls this too) must
+    not replay it again. Only the last EVENT_LOG_REPLAY_HOURS of events are
+    replayed; sessions whose last message is older than the session timeout
+    are dropped again afterwards.
+    """
+    global _restored
+    if event_log is None or _restored:
+        return
+    _restored = True
+    start = time.perf_counter()
+    replayed = 0
+    since = time.time() - Config.EVENT_LOG_REPLAY_HOURS * 3600
+    for (timestamp, kind, session_id, message, intent, confidence, entities,
+         bot_response, context) in event_log.replay(since):
+        if kind == events.RESET:
+            sessions.delete(session_id)
         else:
-            return {'found': False, 'message': data.get('message', 'Package not found.')}
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching package status for {tracking_id}: {e}")
-        return {'found': False, 'message': 'Error connecting to tracking service.'}
+            store_message(session_id, message, intent, confidence, entities,
+                          bot_response, context, timestamp)
+        replayed += 1
+    
+    cutoff = time.time() - Config.SESSION_TIMEOUT.total_seconds()
+    for session_id, session in sessions.items():
+        if session['messages'].last_timestamp() < cutoff:
+            sessions.delete(session_id)
+    logger.info(f"Replayed {replayed} events into {len(sessions)} sessions "
+                f"in {time.perf_counter() - start:.1f}s")
+
+def session_payload(session, limit=None, before=None):
+    """Session as returned by the API, with one page of its message history"""
+    history = session['messages']
+    messages, next_before = history.page(limit, before)
+    return {
+        'messages': messages,
+        'context': session['context'],
+        'created_at': session['created_at'],
+        'totalMessages': history.total,
+        'nextBefore': next_before
+    }
+
+def analytics_report(window=None):
+    """Analytics payload, optionally with totals for the last `window` minutes"""
+    result = analytics.snapshot()
+    if window:
+        result['window'] = analytics.window(min(window, Config.ANALYTICS_ROLLUP_MINUTES))
+    result['tracking'] = tracking_client.stats()
+    result['result_cache'] = result_cache.stats()
+    result['subscriptions'] = tracking_hub.stats()
+    if event_log is not None:
+        result['event_log'] = event_log.stats()
+    return result
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -254,8 +989,15 @@ def health_check():
     })
 
 @app.route('/api/process', methods=['POST'])
+@profiler.wrap
 def process_message():
     """Process chatbot message and return response"""
+    rejected = admit(request.headers.get('X-Request-Start'))
+    if rejected:
+        return too_many_requests(rejected)
+    
+    started = time.perf_counter()
+    intent = 'unclassified'
     try:
         data = request.get_json()
         
@@ -269,61 +1011,174 @@ def process_message():
         user_id = data.get('userId')
         context = data.get('context', {})
         
-        # Log the message
-        logger.info(f"Processing message: '{message}' for session: {session_id}")
+        client_key = rate_limit_key(data, request.remote_addr)
+        retry_after = rate_limiter.allow(client_key)
+        if retry_after:
+            return too_many_requests('rate_limited', retry_after)
         
-        # Classify intent
-        intent, confidence = classify_intent(message)
+        # Classify intent and extract entities
+        intent, confidence, entities = analyze_message(message)
         
-        # Extract entities
-        entities = extract_entities(message)
+        # Look up the package, if the message asks for one
+        mark = time.perf_counter()
+        packages = None
+        tracking_ids = tracking_lookup_ids(intent, entities)
+        if tracking_ids:
+            # Every parcel is a backend lookup and takes its own token
+            retry_after = tracking_limiter.allow(client_key, cost=len(tracking_ids))
+            if retry_after:
+                return too_many_requests('tracking_rate_limited', retry_after)
+            packages = lookup_packages(tracking_ids)
+            mark = timed('tracking', mark)
         
         # Generate response
-        response_data = generate_response(intent, entities, message, session_id)
+        response_data = generate_response(intent, entities, message, session_id, packages)
+        mark = timed('response', mark)
         
         # Store in session
-        if session_id not in sessions:
-            sessions[session_id] = {
-                'messages': [],
-                'context': {},
-                'created_at': datetime.now().isoformat()
-            }
-        
-        sessions[session_id]['messages'].append({
-            'timestamp': datetime.now().isoformat(),
-            'user_message': message,
-            'intent': intent,
-            'confidence': confidence,
-            'entities': entities,
-            'bot_response': response_data['message']
-        })
+        reply = record_exchange(session_id, message, intent, confidence,
+                                entities, response_data, context)
+        mark = timed('session', mark)
+        response = json_response(fast_json.dumps(reply))
+        timed('serialize', mark)
         
-        # Update context
-        sessions[session_id]['context'].update(context)
-        
-        return jsonify({
-            'message': response_data['message'],
-            'intent': intent,
-            'confidence': confidence,
-            'entities': entities,
-            'quickReplies': response_data.get('quickReplies', []),
-            'sessionId': session_id,
-            'timestamp': datetime.now().isoformat()
-        })
+        if Config.LOG_MESSAGES:
+            logger.info(f"Processed message for session {session_id}: "
+                        f"intent={intent}, {len(message)} chars")
+        request_count.inc('process', intent)
+        return response
         
     except Exception as e:
+        error_count.inc('process', intent)
         logger.error(f"Error processing message: {str(e)}")
         return jsonify({
             'error': 'Internal server error',
             'message': "I'm sorry, I'm having trouble processing your request right now. Please try again or contact our support team."
         }), 500
+    finally:
+        admission.release()
+        request_latency.observe(time.perf_counter() - started, 'process')
+
+@app.route('/api/process/batch', methods=['POST'])
+@profiler.wrap
+def process_batch():
+    """Process a list of {message, sessionId} items; results keep input order"""
+    rejected = admit(request.headers.get('X-Request-Start'))
+    if rejected:
+        return too_many_requests(rejected)
+    
+    started = time.perf_counter()
+    try:
+        data = request.get_json()
+        items = data if isinstance(data, list) else (data or {}).get('items')
+        
+        if not items or not isinstance(items, list):
+            return jsonify({
+                'error': 'Missing items in request'
+            }), 400
+        
+        if len(items) > Config.BATCH_MAX_SIZE:
+            return jsonify({
+                'error': f'Batch too large (max {Config.BATCH_MAX_SIZE} items)'
+            }), 400
+        
+        # Every item spends its client's budgets, as a separate request would
+        results, admitted = admit_batch_items(items, request.remote_addr)
+        analyzed = analyze_batch([items[index]['message'] for index, _ in admitted])
+        for index, analysis in charge_batch_lookups(results, admitted, analyzed):
+            results[index] = answer_batch_item(index, items[index], analysis)
+        
+        if Config.LOG_MESSAGES:
+            logger.info(f"Processed batch of {len(items)} messages")
+        return json_response(fast_json.dumps({'results': results}))
+        
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error'
+        }), 500
+    finally:
+        admission.release()
+        request_latency.observe(time.perf_counter() - started, 'batch')
+
+@app.route('/api/pricing/quote', methods=['POST'])
+def quote_prices():
+    """Price a list of {weight, unit, serviceType} items; quotes keep input order"""
+    rejected = admit(request.headers.get('X-Request-Start'))
+    if rejected:
+        return too_many_requests(rejected)
+    
+    started = time.perf_counter()
+    try:
+        payload, status = price_items(request.get_json(silent=True))
+        return json_response(fast_json.dumps(payload), status)
+    except Exception as e:
+        logger.error(f"Error pricing items: {str(e)}")
+        return jsonify({
+            'error': 'Internal server error'
+        }), 500
+    finally:
+        admission.release()
+        request_latency.observe(time.perf_counter() - started, 'pricing')
+
+@app.route('/api/tracking/<tracking_id>/subscribe', methods=['GET'])
+def subscribe_tracking(tracking_id):
+    """Stream status changes of a package as server-sent events
+    
+    Sends the current status, then an event each time the status or
+    location changes, and an `end` event once the package is delivered or
+    not found. Each open stream holds a worker thread, so the stream is
+    refused on single-threaded (sync) workers, which it would block until
+    gunicorn kills them for missing heartbeats; serve many of them from the
+    ASGI entry point instead.
+    """
+    if not SUBSCRIBABLE_ID.fullmatch(tracking_id):
+        return jsonify({
+            'error': 'Invalid tracking ID'
+        }), 400
+    
+    if not request.environ.get('wsgi.multithread'):
+        return jsonify({
+            'error': 'Tracking subscriptions are served by the async (ASGI) service',
+            'endpoint': f'/api/tracking/{tracking_id}/subscribe',
+            'hint': 'Run python start.py --production --async'
+        }), 503
+    
+    retry_after = tracking_limiter.allow(str(request.args.get('sessionId') or request.remote_addr))
+    if retry_after:
+        return too_many_requests('tracking_rate_limited', retry_after)
+    
+    subscriber = tracking_hub.subscribe(tracking_id)
+    if subscriber is None:
+        return too_many_requests('subscriptions_full', Config.SUBSCRIPTION_POLL_INTERVAL)
+    
+    def stream():
+        try:
+            while True:
+                try:
+                    result = subscriber.get(timeout=Config.SUBSCRIPTION_HEARTBEAT)
+                except queue.Empty:
+                    # Keeps proxies from timing out the idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield status_event(tracking_id, result)
+                if result is END:
+                    return
+        finally:
+            tracking_hub.unsubscribe(tracking_id, subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/session/<session_id>', methods=['GET'])
 def get_session(session_id):
     """Get session history"""
     try:
-        if session_id in sessions:
-            return jsonify(sessions[session_id])
+        session = sessions.get(session_id)
+        if session is not None:
+            return jsonify(session_payload(session,
+                                           request.args.get('limit', type=int),
+                                           request.args.get('before', type=int)))
         else:
             return jsonify({
                 'error': 'Session not found'
@@ -346,8 +1201,7 @@ def reset_session():
                 'error': 'Missing sessionId'
             }), 400
         
-        if session_id in sessions:
-            del sessions[session_id]
+        end_session(session_id)
         
         return jsonify({
             'message': 'Session reset successfully'
@@ -363,22 +1217,7 @@ def reset_session():
 def get_analytics():
     """Get chatbot analytics"""
     try:
-        total_sessions = len(sessions)
-        total_messages = sum(len(session['messages']) for session in sessions.values())
-        
-        intent_distribution = {}
-        for session in sessions.values():
-            for msg in session['messages']:
-                intent = msg.get('intent', 'unknown')
-                intent_distribution[intent] = intent_distribution.get(intent, 0) + 1
-        
-        return jsonify({
-            'total_sessions': total_sessions,
-            'total_messages': total_messages,
-            'intent_distribution': intent_distribution,
-            'active_sessions': len([s for s in sessions.values() 
-                                 if (datetime.now() - datetime.fromisoformat(s['created_at'])).seconds < 3600])
-        })
+        return jsonify(analytics_report(request.args.get('window', type=int)))
         
     except Exception as e:
         logger.error(f"Error getting analytics: {str(e)}")
@@ -386,9 +1225,26 @@ def get_analytics():
             'error': 'Internal server error'
         }), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+@app.route('/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """Profiling status and controls for this worker process"""
+    data = request.get_json(silent=True) if request.method == 'POST' else None
+    if request.method == 'POST' and data is None:
+        data = {}
+    payload, status = profile_admin(request.headers.get('X-Admin-Token'), data)
+    return jsonify(payload), status
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
     debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     
     logger.info(f"Starting CMS Chatbot Service on port {port}")
+    warm_up()
+    restore_sessions()
+    install_profiling_signal()
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,396 @@
+"""
+ASGI entry point for the CMS Chatbot Service
+Serves the same API as app.py on an event loop: tracking lookups use a
+non-blocking HTTP client and the CPU-bound NLP pipeline runs on a bounded
+thread pool, so a slow backend no longer ties up a whole worker.
+
+Run with: uvicorn asgi_app:app  (or python start.py --async)
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import app as service
+import fast_json
+from app import (SUBSCRIBABLE_ID, admission, admit, admit_batch_items, analytics_report,
+                 analyze_batch, analyze_message, answer_batch_item, charge_batch_lookups,
+                 end_session, error_count, generate_response, install_profiling_signal,
+                 metrics, observe_upstream, price_items, profile_admin, profiler,
+                 rate_limit_key, rate_limiter, record_exchange, rejection, request_count,
+                 request_latency, restore_sessions, session_payload, sessions, status_event,
+                 timed, tracking_limiter, tracking_lookup_ids, warm_up)
+from config import Config
+from metrics import CONTENT_TYPE
+from subscriptions import END, AsyncSubscriptionHub
+from tracking_client import AsyncTrackingClient
+
+logger = logging.getLogger(__name__)
+
+nlp_executor = ThreadPoolExecutor(max_workers=Config.NLP_WORKERS, thread_name_prefix='nlp')
+
+tracking_client = AsyncTrackingClient(
+    os.environ.get('CMS_API_URL', Config.CMS_API_URL),
+    connect_timeout=Config.TRACKING_CONNECT_TIMEOUT,
+    read_timeout=Config.TRACKING_READ_TIMEOUT,
+    cache_ttl=Config.TRACKING_CACHE_TTL,
+    negative_ttl=Config.TRACKING_NEGATIVE_CACHE_TTL,
+    cache_size=Config.TRACKING_CACHE_SIZE,
+    pool_size=Config.TRACKING_POOL_SIZE,
+    breaker_failures=Config.TRACKING_BREAKER_FAILURES,
+    breaker_reset=Config.TRACKING_BREAKER_RESET,
+    on_upstream=observe_upstream
+)
+
+tracking_hub = AsyncSubscriptionHub(tracking_client, Config.SUBSCRIPTION_POLL_INTERVAL,
+                                    Config.MAX_SUBSCRIPTIONS)
+# The subscription gauges and analytics report the hub serving streams here
+service.tracking_hub = tracking_hub
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def too_many_requests(reason, retry_after=1):
+    payload, retry_header = rejection(reason, retry_after)
+    return JSONResponse(payload, status_code=429, headers={'Retry-After': retry_header})
+
+
+async def health_check(request):
+    """Health check endpoint"""
+    return JSONResponse({
+        'status': 'healthy',
+        'service': 'CMS Chatbot Service',
+        'version': '1.0.0',
+        'mode': 'async',
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+async def process_message(request):
+    """Process chatbot message and return response"""
+    # Never wait for a slot here: that would block the event loop
+    rejected = admit(request.headers.get('x-request-start'), blocking=False)
+    if rejected:
+        return too_many_requests(rejected)
+
+    started = time.perf_counter()
+    intent = 'unclassified'
+    # Only the synchronous stages are profiled: the event loop interleaves
+    # other requests with this one's awaits
+    profile = profiler.begin() if profiler.active else None
+    try:
+        data = await read_json(request)
+
+        if not data or 'message' not in data:
+            return JSONResponse({
+                'error': 'Missing message in request'
+            }, status_code=400)
+
+        message = data['message']
+        session_id = data.get('sessionId', f'session_{datetime.now().timestamp()}')
+        context = data.get('context', {})
+
+        client_key = rate_limit_key(data, request.client.host if request.client else None)
+        retry_after = rate_limiter.allow(client_key)
+        if retry_after:
+            return too_many_requests('rate_limited', retry_after)
+
+        loop = asyncio.get_running_loop()
+        if profile is None:
+            analyzed = await loop.run_in_executor(nlp_executor, analyze_message, message)
+        else:
+            analyzed = await loop.run_in_executor(nlp_executor, profile.run, analyze_message,
+                                                  message)
+        intent, confidence, entities = analyzed
+
+        mark = time.perf_counter()
+        packages = None
+        tracking_ids = tracking_lookup_ids(intent, entities)
+        if tracking_ids:
+            retry_after = tracking_limiter.allow(client_key, cost=len(tracking_ids))
+            if retry_after:
+                return too_many_requests('tracking_rate_limited', retry_after)
+            packages = await asyncio.gather(*map(tracking_client.get_status, tracking_ids))
+            mark = timed('tracking', mark)
+
+        respond = generate_response if profile is None else functools.partial(
+            profile.run, generate_response)
+        response_data = respond(intent, entities, message, session_id, packages)
+        mark = timed('response', mark)
+
+        reply = record_exchange(session_id, message, intent, confidence,
+                                entities, response_data, context)
+        mark = timed('session', mark)
+        response = Response(fast_json.dumps(reply), media_type=fast_json.CONTENT_TYPE)
+        timed('serialize', mark)
+
+        if Config.LOG_MESSAGES:
+            logger.info(f"Processed message for session {session_id}: "
+                        f"intent={intent}, {len(message)} chars")
+        request_count.inc('process', intent)
+        return response
+
+    except Exception as e:
+        error_count.inc('process', intent)
+        logger.error(f"Error processing message: {str(e)}")
+        return JSONResponse({
+            'error': 'Internal server error',
+            'message': "I'm sorry, I'm having trouble processing your request right now. Please try again or contact our support team."
+        }, status_code=500)
+    finally:
+        admission.release()
+        request_latency.observe(time.perf_counter() - started, 'process')
+        if profile is not None:
+            profile.end()
+
+
+async def lookup_packages(tracking_ids):
+    """Statuses of `tracking_ids`, looked up concurrently; None if there are none"""
+    if not tracking_ids:
+        return None
+    return list(await asyncio.gather(*map(tracking_client.get_status, tracking_ids)))
+
+
+def answer_batch(items, answered, packages):
+    """answer_batch_item for each (index, analysis) in `answered`"""
+    return [answer_batch_item(index, items[index], analysis, item_packages)
+            for (index, analysis), item_packages in zip(answered, packages)]
+
+
+def profiled(profile, function, *args):
+    """function(*args), run under `profile` if the request is profiled"""
+    return function(*args) if profile is None else profile.run(function, *args)
+
+
+async def process_batch(request):
+    """Process a list of {message, sessionId} items; results keep input order"""
+    rejected = admit(request.headers.get('x-request-start'), blocking=False)
+    if rejected:
+        return too_many_requests(rejected)
+
+    started = time.perf_counter()
+    profile = profiler.begin() if profiler.active else None
+    try:
+        data = await read_json(request)
+        items = data if isinstance(data, list) else (data or {}).get('items')
+
+        if not items or not isinstance(items, list):
+            return JSONResponse({
+                'error': 'Missing items in request'
+            }, status_code=400)
+
+        if len(items) > Config.BATCH_MAX_SIZE:
+            return JSONResponse({
+                'error': f'Batch too large (max {Config.BATCH_MAX_SIZE} items)'
+            }, status_code=400)
+
+        # Every item spends its client's budgets, as a separate request would
+        results, admitted = admit_batch_items(items,
+                                              request.client.host if request.client else None)
+        loop = asyncio.get_running_loop()
+        analyzed = await loop.run_in_executor(nlp_executor, profiled, profile, analyze_batch,
+                                              [items[index]['message'] for index, _ in admitted])
+        answered = charge_batch_lookups(results, admitted, analyzed)
+        # Every item's lookups at once; the client coalesces repeated IDs
+        packages = await asyncio.gather(*(
+            lookup_packages(tracking_lookup_ids(intent, entities))
+            for _, (intent, _, entities) in answered))
+        replies = await loop.run_in_executor(nlp_executor, profiled, profile, answer_batch,
+                                             items, answered, packages)
+        for (index, _), reply in zip(answered, replies):
+            results[index] = reply
+
+        if Config.LOG_MESSAGES:
+            logger.info(f"Processed batch of {len(items)} messages")
+        return Response(fast_json.dumps({'results': results}), media_type=fast_json.CONTENT_TYPE)
+
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        return JSONResponse({
+            'error': 'Internal server error'
+        }, status_code=500)
+    finally:
+        admission.release()
+        request_latency.observe(time.perf_counter() - started, 'batch')
+        if profile is not None:
+            profile.end()
+
+
+async def quote_prices(request):
+    """Price a list of {weight, unit, serviceType} items; quotes keep input order"""
+    rejected = admit(request.headers.get('x-request-start'), blocking=False)
+    if rejected:
+        return too_many_requests(rejected)
+
+    started = time.perf_counter()
+    try:
+        data = await read_json(request)
+        loop = asyncio.get_running_loop()
+        payload, status = await loop.run_in_executor(nlp_executor, price_items, data)
+        return Response(fast_json.dumps(payload), status_code=status,
+                        media_type=fast_json.CONTENT_TYPE)
+    except Exception as e:
+        logger.error(f"Error pricing items: {str(e)}")
+        return JSONResponse({
+            'error': 'Internal server error'
+        }, status_code=500)
+    finally:
+        admission.release()
+        request_latency.observe(time.perf_counter() - started, 'pricing')
+
+
+async def subscribe_tracking(request):
+    """Stream status changes of a package as server-sent events"""
+    tracking_id = request.path_params['tracking_id']
+    if not SUBSCRIBABLE_ID.fullmatch(tracking_id):
+        return JSONResponse({
+            'error': 'Invalid tracking ID'
+        }, status_code=400)
+
+    client_key = request.query_params.get('sessionId') or (
+        request.client.host if request.client else None)
+    retry_after = tracking_limiter.allow(str(client_key))
+    if retry_after:
+        return too_many_requests('tracking_rate_limited', retry_after)
+
+    subscriber = tracking_hub.subscribe(tracking_id)
+    if subscriber is None:
+        return too_many_requests('subscriptions_full', Config.SUBSCRIPTION_POLL_INTERVAL)
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    result = await asyncio.wait_for(subscriber.get(),
+                                                    Config.SUBSCRIPTION_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from timing out the idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield status_event(tracking_id, result)
+                if result is END:
+                    return
+        finally:
+            tracking_hub.unsubscribe(tracking_id, subscriber)
+
+    return StreamingResponse(stream(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def int_param(request, name):
+    value = request.query_params.get(name)
+    return int(value) if value and value.isdigit() else None
+
+
+async def get_session(request):
+    """Get session history"""
+    try:
+        session = sessions.get(request.path_params['session_id'])
+        if session is not None:
+            return JSONResponse(session_payload(session, int_param(request, 'limit'),
+                                                int_param(request, 'before')))
+        return JSONResponse({
+            'error': 'Session not found'
+        }, status_code=404)
+    except Exception as e:
+        logger.error(f"Error retrieving session: {str(e)}")
+        return JSONResponse({
+            'error': 'Internal server error'
+        }, status_code=500)
+
+
+async def reset_session(request):
+    """Reset session context"""
+    try:
+        data = await read_json(request) or {}
+        session_id = data.get('sessionId')
+
+        if not session_id:
+            return JSONResponse({
+                'error': 'Missing sessionId'
+            }, status_code=400)
+
+        end_session(session_id)
+
+        return JSONResponse({
+            'message': 'Session reset successfully'
+        })
+    except Exception as e:
+        logger.error(f"Error resetting session: {str(e)}")
+        return JSONResponse({
+            'error': 'Internal server error'
+        }, status_code=500)
+
+
+async def get_analytics(request):
+    """Get chatbot analytics"""
+    try:
+        result = analytics_report(int_param(request, 'window'))
+        result['tracking'] = tracking_client.stats()
+        return JSONResponse(result)
+    except Exception as e:
+        logger.error(f"Error getting analytics: {str(e)}")
+        return JSONResponse({
+            'error': 'Internal server error'
+        }, status_code=500)
+
+
+async def get_metrics(request):
+    """Prometheus metrics for this worker process"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+async def admin_profile(request):
+    """Profiling status and controls for this worker process"""
+    data = None
+    if request.method == 'POST':
+        data = await read_json(request) or {}
+    payload, status = profile_admin(request.headers.get('x-admin-token'), data)
+    return JSONResponse(payload, status_code=status)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    install_profiling_signal()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(nlp_executor, warm_up)
+    await loop.run_in_executor(nlp_executor, restore_sessions)
+    yield
+    await tracking_client.aclose()
+    nlp_executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health_check, methods=['GET']),
+        Route('/api/process', process_message, methods=['POST']),
+        Route('/api/process/batch', process_batch, methods=['POST']),
+        Route('/api/pricing/quote', quote_prices, methods=['POST']),
+        # Registered before the <session_id> route so 'reset' is not captured
+        Route('/api/tracking/{tracking_id}/subscribe', subscribe_tracking, methods=['GET']),
+        Route('/api/session/reset', reset_session, methods=['POST']),
+        Route('/api/session/{session_id}', get_session, methods=['GET']),
+        Route('/api/analytics', get_analytics, methods=['GET']),
+        Route('/metrics', get_metrics, methods=['GET']),
+        Route('/admin/profile', admin_profile, methods=['GET', 'POST']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'],
+                           allow_headers=['*'])],
+    lifespan=lifespan
+)
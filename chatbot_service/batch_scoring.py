@@ -0,0 +1,83 @@
+"""
+Vectorised intent scoring for batches of messages
+Scores a whole batch against every intent with NumPy matrix products that
+reproduce IntentMatcher's keyword, pattern and stem weights exactly
+"""
+
+import numpy as np
+
+from intent_matcher import KEYWORD_WEIGHT, PATTERN_WEIGHT, STEM_WEIGHT
+
+
+class BatchIntentScorer:
+    """Batch counterpart of IntentMatcher.classify.
+
+    Each message becomes three binary feature rows (keywords present, patterns
+    matched, indexed stems present). Multiplying them by the per-feature
+    intent count matrices gives the hit counts of every intent for every
+    message; the weighting, normalisation, thresholds and tie-breaking then
+    run as array operations in the same order as the scalar matcher.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.intents = list(matcher.intents)
+        intent_index = {intent: i for i, intent in enumerate(self.intents)}
+
+        self.keyword_index = {keyword: i for i, keyword in enumerate(matcher.keyword_intents)}
+        self.stem_index = {stem: i for i, stem in enumerate(matcher.stem_intents)}
+
+        self.keyword_weights = np.zeros((len(self.keyword_index), len(self.intents)))
+        for keyword, counts in matcher.keyword_intents.items():
+            for intent, count in counts.items():
+                self.keyword_weights[self.keyword_index[keyword], intent_index[intent]] = count
+
+        self.pattern_weights = np.zeros((len(matcher.pattern_intents), len(self.intents)))
+        for row, (_, intents) in enumerate(matcher.pattern_intents):
+            for intent in intents:
+                self.pattern_weights[row, intent_index[intent]] += 1
+
+        self.stem_weights = np.zeros((len(self.stem_index), len(self.intents)))
+        for stem, counts in matcher.stem_intents.items():
+            for intent, count in counts.items():
+                self.stem_weights[self.stem_index[stem], intent_index[intent]] = count
+
+        self.max_scores = np.array([matcher.max_scores[intent] for intent in self.intents])
+        self.thresholds = np.array([matcher.thresholds[intent] for intent in self.intents])
+
+    def features(self, texts_lower, stemmed_token_lists):
+        """Binary keyword, pattern and stem feature matrices for the batch"""
+        n = len(texts_lower)
+        keywords = np.zeros((n, len(self.keyword_index)))
+        patterns = np.zeros((n, len(self.matcher.pattern_intents)))
+        stems = np.zeros((n, len(self.stem_index)))
+        for row, (text_lower, stemmed_tokens) in enumerate(zip(texts_lower, stemmed_token_lists)):
+            for keyword in self.matcher.match_keywords(text_lower):
+                keywords[row, self.keyword_index[keyword]] = 1
+            patterns[row, self.matcher.match_patterns(text_lower)] = 1
+            for stem in self.matcher.match_stems(stemmed_tokens):
+                stems[row, self.stem_index[stem]] = 1
+        return keywords, patterns, stems
+
+    def scores(self, texts_lower, stemmed_token_lists):
+        """(messages x intents) matrix of normalised scores"""
+        keywords, patterns, stems = self.features(texts_lower, stemmed_token_lists)
+        score = keywords @ self.keyword_weights * KEYWORD_WEIGHT
+        score += patterns @ self.pattern_weights * PATTERN_WEIGHT
+        score += stems @ self.stem_weights * STEM_WEIGHT
+        return np.divide(score, self.max_scores, out=score, where=self.max_scores > 0)
+
+    def classify(self, texts_lower, stemmed_token_lists):
+        """Return [(intent, confidence), ...] in input order"""
+        if not texts_lower:
+            return []
+        scores = self.scores(texts_lower, stemmed_token_lists)
+        passing = scores >= self.thresholds
+        best = np.where(passing, scores, -np.inf).argmax(axis=1)
+        results = []
+        for row, column in enumerate(best):
+            if passing[row, column]:
+                results.append((self.intents[column], float(scores[row, column])))
+            else:
+                results.append(('unknown', 0.0))
+        return results
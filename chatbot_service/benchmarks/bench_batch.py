@@ -0,0 +1,85 @@
+"""
+Batch processing benchmark
+Sends the same messages as individual /api/process requests and as
+/api/process/batch requests (through the Flask test client, against the
+local stub backend) and compares throughput; also compares per-message and
+vectorised scoring on their own (their parity is tested in tests/test_batch.py)
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_batch [--messages 2000] [--batch-size 500]
+"""
+
+import argparse
+import random
+import time
+
+import app
+from benchmarks.bench_intent_matcher import MESSAGES
+from benchmarks.load_async import TRACK_MESSAGE
+from benchmarks.stub_backend import StubBackend, make_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(7)
+    corpus = [random.choice(MESSAGES + [TRACK_MESSAGE.format('CMS000001')]) + f' #{i}'
+              for i in range(args.messages)]
+    items = [{'message': message, 'sessionId': f'bench_{i % 50}'} for i, message in enumerate(corpus)]
+
+    # Every message is distinct, so the result cache cannot help either side
+    app.result_cache.max_size = 0
+    app.get_batch_scorer()
+    app.rate_limiter.per_minute = app.tracking_limiter.per_minute = 0
+    client = app.app.test_client()
+
+    with StubBackend(packages={'CMS000001': make_package('CMS000001')}) as stub:
+        app.tracking_client.base_url = stub.url
+
+        start = time.perf_counter()
+        single = [client.post('/api/process', json=item).get_json() for item in items]
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = []
+        for offset in range(0, len(items), args.batch_size):
+            response = client.post('/api/process/batch', json={'items': items[offset:offset + args.batch_size]})
+            batched.extend(response.get_json()['results'])
+        batch_elapsed = time.perf_counter() - start
+
+    for one, many in zip(single, batched):
+        if one.get('intent') != many.get('intent') or one.get('entities') != many.get('entities'):
+            raise SystemExit(f"Batch result differs: {one} != {many}")
+
+    print(f"single requests: {len(items) / single_elapsed:9.1f} msg/s")
+    print(f"batch requests:  {len(items) / batch_elapsed:9.1f} msg/s  "
+          f"speedup {single_elapsed / batch_elapsed:4.1f}x")
+
+    texts = [message.lower() for message in corpus]
+    stemmed = [app.preprocess_text(message)[1] for message in corpus]
+    start = time.perf_counter()
+    for text, stems in zip(texts, stemmed):
+        app.intent_matcher.classify(text, stems)
+    scalar = time.perf_counter() - start
+    start = time.perf_counter()
+    app.get_batch_scorer().classify(texts, stemmed)
+    vectorised = time.perf_counter() - start
+    print(f"scoring only: per-message {scalar / len(corpus) * 1e6:6.1f} us/msg  "
+          f"vectorised {vectorised / len(corpus) * 1e6:6.1f} us/msg")
+
+    start = time.perf_counter()
+    for message in corpus:
+        app.extract_entities(message)
+    scalar = time.perf_counter() - start
+    start = time.perf_counter()
+    app.extract_entities_bulk(corpus)
+    bulk = time.perf_counter() - start
+    print(f"entities:     per-message {scalar / len(corpus) * 1e6:6.1f} us/msg  "
+          f"bulk       {bulk / len(corpus) * 1e6:6.1f} us/msg")
+
+
+if __name__ == '__main__':
+    main()
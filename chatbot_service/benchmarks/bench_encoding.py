@@ -0,0 +1,111 @@
+"""
+Benchmark for encoding /api/process replies
+Builds the replies of a synthetic corpus (see corpus.py; each message's
+corpus intent picks the reply, tracking IDs are looked up on the stub
+backend) and times per reply:
+  - encoding the reply with the standard json module and with
+    fast_json.dumps (orjson if installed), and with the message and quick
+    replies of canned replies encoded once and spliced in (not used by the
+    service: with orjson it costs as much as encoding the whole reply);
+  - building the whole Flask response, with jsonify as before and with
+    json_response(fast_json.dumps(...)) as /api/process does now.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_encoding [--messages 2000] [--rounds 5]
+                                        [--output results.json] [--baseline baseline.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+os.environ.setdefault('LOG_MESSAGES', 'false')
+
+import app as chatbot
+import fast_json
+from benchmarks import corpus, results
+from benchmarks.stub_backend import StubBackend, make_package
+
+
+def per_reply(function, replies, rounds):
+    """Mean seconds per call of function(reply)"""
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(rounds):
+        for reply in replies:
+            function(reply)
+    return (clock() - start) / (rounds * len(replies))
+
+
+def spliced(reply, fragments):
+    """JSON bytes of `reply` with its message and quick replies taken from
+    `fragments` (pre-encoded per canned reply) when it has them"""
+    fragment = fragments.get(reply['message'])
+    if fragment is None:
+        return fast_json.dumps(reply)
+    fields = reply.copy()
+    del fields['message'], fields['quickReplies']
+    return b'{' + fragment + b',' + fast_json.dumps(fields)[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--known-ids', type=int, default=1000)
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    labelled = corpus.generate(args.messages, args.seed, known_ids=args.known_ids)
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(args.known_ids)}
+    chatbot.tracking_client.cache_ttl = chatbot.tracking_client.negative_ttl = 3600
+
+    replies = []
+    with StubBackend(packages=packages) as stub:
+        chatbot.tracking_client.base_url = stub.url
+        for index, (message, intent) in enumerate(labelled):
+            entities = chatbot.extract_entities(message)
+            response_data = chatbot.generate_response(intent, entities, message, 'bench')
+            replies.append(chatbot.record_exchange(f'bench_{index % 100}', message, intent,
+                                                   0.9, entities, response_data, {}))
+    fragments = {reply['message']: fast_json.dumps({'message': reply['message'],
+                                                     'quickReplies': reply['quickReplies']})[1:-1]
+                 for reply in chatbot.RESPONSES.values()}
+    canned = sum(reply['message'] in fragments for reply in replies)
+    for reply in replies:
+        assert json.loads(spliced(reply, fragments)) == json.loads(json.dumps(reply))
+
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    with chatbot.app.app_context():
+        timings = {
+            'encode.json': per_reply(lambda reply: encoder.encode(reply).encode('utf-8'),
+                                     replies, args.rounds),
+            'encode.fast_json': per_reply(fast_json.dumps, replies, args.rounds),
+            'encode.spliced': per_reply(lambda reply: spliced(reply, fragments),
+                                        replies, args.rounds),
+            'response.jsonify': per_reply(chatbot.jsonify, replies, args.rounds),
+            'response.json_response': per_reply(
+                lambda reply: chatbot.json_response(fast_json.dumps(reply)),
+                replies, args.rounds)
+        }
+
+    backend = 'orjson' if fast_json.orjson is not None else 'json (orjson not installed)'
+    print(f"{len(replies)} replies ({canned} canned) x {args.rounds} rounds, "
+          f"fast_json using {backend}, per reply:")
+    for name, seconds in timings.items():
+        print(f"  {name:<26} {seconds * 1e6:7.2f} us")
+
+    metrics = {f'{name}_us': results.metric(round(seconds * 1e6, 3), 'us')
+               for name, seconds in timings.items()}
+    parameters = {'messages': args.messages, 'rounds': args.rounds, 'seed': args.seed,
+                  'known_ids': args.known_ids, 'orjson': fast_json.orjson is not None}
+    sys.exit(results.finish(results.build('encoding', parameters, metrics),
+                            args.output, args.baseline, args.tolerance))
+
+
+if __name__ == '__main__':
+    main()
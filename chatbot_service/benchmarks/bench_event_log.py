@@ -0,0 +1,128 @@
+"""
+Event log benchmark
+Measures request-path enqueue latency and sustained write throughput of
+the batched SQLite writer under concurrent producers, then replay speed:
+raw event streaming and the full session/analytics rebuild done at startup
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_event_log [--events 10000000] [--threads 8]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Point the service at a scratch log before app is imported
+WORKDIR = tempfile.mkdtemp(prefix='event_log_bench_')
+os.environ['EVENT_LOG_PATH'] = os.path.join(WORKDIR, 'events.db')
+
+import app  # noqa: E402
+import event_log as events  # noqa: E402
+from benchmarks.bench_intent_matcher import MESSAGES  # noqa: E402
+
+
+def percentile(samples, fraction):
+    return sorted(samples)[int(fraction * (len(samples) - 1))]
+
+
+def bench_writes(count, threads):
+    log = events.EventLog(os.path.join(WORKDIR, 'writes.db'), queue_size=count + 1)
+    log.start()
+    analyzed = [(message,) + app.analyze_message(message) for message in MESSAGES]
+    latencies = []
+
+    def produce(worker):
+        samples = []
+        for i in range(count // threads):
+            message, intent, confidence, entities = analyzed[i % len(analyzed)]
+            start = time.perf_counter()
+            log.record_message(f'session_{worker}_{i % 500}', time.time(), message, intent,
+                               confidence, entities, app.RESPONSES['unknown']['message'], {})
+            samples.append(time.perf_counter() - start)
+        latencies.extend(samples)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=produce, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    enqueued = time.perf_counter() - start
+    log.flush()
+    elapsed = time.perf_counter() - start
+    stats = log.stats()
+    log.close()
+
+    print(f"writes: {stats['written']} events from {threads} threads, "
+          f"{stats['written'] / elapsed:,.0f} events/s written "
+          f"({stats['batches']} batches, avg {stats['written'] / max(stats['batches'], 1):.0f})")
+    print(f"        enqueue p50 {percentile(latencies, 0.5) * 1e6:.1f} us  "
+          f"p99 {percentile(latencies, 0.99) * 1e6:.1f} us  "
+          f"(producers done after {enqueued:.2f}s)")
+
+
+def generate_log(path, count, sessions, days):
+    """Write `count` synthetic message events (1% resets) spread evenly over
+    the last `days` days straight into `path`"""
+    log = events.EventLog(path)
+    connection = log.connect()
+    random.seed(5)
+    now = time.time()
+    analyzed = [(message,) + app.analyze_message(message) for message in MESSAGES]
+    reply = app.RESPONSES['unknown']['message']
+    chunk = 50000
+    for offset in range(0, count, chunk):
+        rows = []
+        for i in range(offset, min(offset + chunk, count)):
+            message, intent, confidence, entities = random.choice(analyzed)
+            session_id = f'session_{random.randrange(sessions)}'
+            ts = now - (count - i) * days * 86400 / count
+            if i % 100 == 99:
+                rows.append((ts, events.RESET, session_id, None, None, None, None, None, None))
+            else:
+                rows.append((ts, events.MESSAGE, session_id, message, intent, confidence,
+                             events._dumps(entities), reply, None))
+        with connection:
+            connection.executemany(events._INSERT, rows)
+    connection.close()
+
+
+def bench_replay(count, sessions, days):
+    path = app.event_log.path
+    start = time.perf_counter()
+    generate_log(path, count, sessions, days)
+    print(f"replay: generated {count:,} events over {days} days in "
+          f"{time.perf_counter() - start:.1f}s ({os.path.getsize(path) / 2 ** 20:.0f} MiB)")
+
+    start = time.perf_counter()
+    streamed = sum(1 for _ in app.event_log.replay())
+    elapsed = time.perf_counter() - start
+    print(f"        stream all events: {streamed / elapsed:,.0f} events/s ({elapsed:.1f}s)")
+
+    start = time.perf_counter()
+    app.restore_sessions()
+    elapsed = time.perf_counter() - start
+    print(f"        startup restore (last {app.Config.EVENT_LOG_REPLAY_HOURS:g}h): {elapsed:.1f}s, "
+          f"{len(app.sessions)} sessions, {app.analytics.snapshot()['total_messages']} messages")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--writes', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--sessions', type=int, default=app.Config.MAX_SESSIONS)
+    parser.add_argument('--days', type=float, default=7)
+    args = parser.parse_args()
+
+    app.event_log.close()
+    bench_writes(args.writes, args.threads)
+    bench_replay(args.events, args.sessions, args.days)
+    print(f"(scratch files in {WORKDIR})")
+
+
+if __name__ == '__main__':
+    main()
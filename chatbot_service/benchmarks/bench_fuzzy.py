@@ -0,0 +1,118 @@
+"""
+Benchmark for typo-tolerant matching
+Reports the deletion index lookup cost against a linear scan of the same
+terms; for the labelled seed set with random typos injected, the share of
+the clean messages' keyword hits the rule engine still finds, its accuracy
+and its per-message cost, with and without spelling correction; and the
+cost of a deletion index lookup among --ids tracking IDs.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_fuzzy [--ids 10000] [--typo-rate 0.3]
+"""
+
+import argparse
+import os
+import random
+import string
+import time
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+
+import app
+from fuzzy import FuzzyIndex, edit_distance
+from train_intent_model import read_seed
+
+
+def typo(word, rng):
+    """`word` with one random deletion, insertion, substitution or swap"""
+    position = rng.randrange(len(word))
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:position] + word[position + 1:]
+    if kind == 1:
+        return word[:position] + rng.choice(string.ascii_lowercase) + word[position:]
+    if kind == 2:
+        return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+    if position == len(word) - 1:
+        position -= 1
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def misspell(message, rate, rng):
+    return ' '.join(typo(word, rng) if len(word) >= 4 and word.isalpha() and rng.random() < rate
+                    else word for word in message.split())
+
+
+def per_call(function, items, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            function(item)
+    return (time.perf_counter() - start) / (rounds * len(items))
+
+
+def linear_best(terms, word, max_distance):
+    best, match = max_distance + 1, None
+    for term in terms:
+        distance = edit_distance(word, term, max_distance)
+        if distance < best:
+            best, match = distance, term
+    return match
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', default=os.path.join('training', 'intent_seed.jsonl'))
+    parser.add_argument('--ids', type=int, default=10000)
+    parser.add_argument('--typo-rate', type=float, default=0.3)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(11)
+
+    corrector = app.get_spell_corrector()
+    vocabulary = list(corrector.index._terms)
+    queries = {
+        'exact': vocabulary,
+        '1 edit': [typo(term, rng) for term in vocabulary],
+        '2 edits': [typo(typo(term, rng), rng) for term in vocabulary],
+        'miss': [''.join(rng.choices(string.ascii_lowercase, k=8)) for _ in vocabulary]
+    }
+    print(f"lookup in {len(vocabulary)} vocabulary terms (up to 2 edits):")
+    for name, words in queries.items():
+        indexed = per_call(corrector.index.lookup, words, args.rounds)
+        scanned = per_call(lambda word: linear_best(vocabulary, word, 2), words, 1)
+        print(f"  {name:<8} index {indexed * 1e6:8.1f} us   scan {scanned * 1e6:8.1f} us")
+
+    examples = read_seed(args.seed)
+    noisy = [(misspell(message, args.typo_rate, rng), intent) for message, intent in examples]
+    matcher = app.intent_matcher
+    expected = [matcher.match_keywords(message.lower()) for message, _ in examples]
+    print(f"{len(examples)} seed messages with {args.typo_rate:.0%} of words misspelt:")
+    for enabled in (False, True):
+        app.Config.FUZZY_MATCHING = enabled
+        found = [matcher.match_keywords(app.correct_spelling(message).lower())
+                 for message, _ in noisy]
+        recalled = sum(len(hits & keywords) for hits, keywords in zip(found, expected))
+        accuracy = sum(app.classify_intent(message)[0] == intent
+                       for message, intent in noisy) / len(noisy)
+        print(f"  {'corrected' if enabled else 'exact':<10} keyword hits kept "
+              f"{recalled / sum(map(len, expected)):6.1%}   rule accuracy {accuracy:6.1%}")
+    messages = [message for message, _ in noisy]
+    costs = []
+    for enabled in (False, True):
+        app.Config.FUZZY_MATCHING = enabled
+        costs.append(per_call(app.classify_intent, messages, args.rounds))
+    print(f"classify_intent per message: exact {costs[0] * 1e6:.1f} us, "
+          f"corrected {costs[1] * 1e6:.1f} us")
+
+    ids = [f'CMS{number:06d}' for number in rng.sample(range(10 ** 6), args.ids)]
+    recent = FuzzyIndex(ids, max_distance=1, capacity=args.ids)
+    mistyped = [typo(tracking_id, rng) for tracking_id in rng.sample(ids, 1000)]
+    indexed = per_call(lambda word: recent.lookup(word), mistyped, args.rounds)
+    scanned = per_call(lambda word: linear_best(ids, word, 1), mistyped[:50], 1)
+    print(f"closest tracking ID among {args.ids} IDs: "
+          f"index {indexed * 1e6:.1f} us, scan {scanned * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
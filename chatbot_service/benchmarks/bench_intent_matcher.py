@@ -0,0 +1,111 @@
+"""
+Micro-benchmark for intent classification
+Compares the original per-intent scoring loop with the compiled IntentMatcher,
+checks that both produce identical scores and reports the per-message cost
+(the parity itself is tested in tests/test_intent_matcher.py)
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_intent_matcher [--rounds N]
+"""
+
+import argparse
+import re
+import time
+
+from app import INTENT_PATTERNS, intent_matcher, preprocess_text
+from nlp import get_stemmer
+
+MESSAGES = [
+    "Hello there",
+    "hi, good morning!",
+    "Track my package ABC123456",
+    "Where is my package? It was supposed to arrive yesterday",
+    "What is the current location of shipment CMS778812",
+    "I want to file a complaint, my package arrived damaged",
+    "The delivery was late and the item is wrong",
+    "How much does shipping cost for 5kg express?",
+    "Can you estimate the price of delivery to Mumbai",
+    "I need help, can I speak to an agent",
+    "contact support by email or phone please",
+    "thank you, that's all. bye",
+    "status update please",
+    "random text that matches nothing in particular",
+]
+
+
+def legacy_scores(text):
+    """The scoring loop classify_intent used before IntentMatcher"""
+    tokens, stemmed_tokens = preprocess_text(text)
+    text_lower = text.lower()
+    stemmer = get_stemmer()
+    intent_scores = {}
+    for intent, config in INTENT_PATTERNS.items():
+        score = 0
+        score += sum(1 for keyword in config['keywords'] if keyword in text_lower) * 0.3
+        score += sum(1 for pattern in config['patterns'] if re.search(pattern, text_lower)) * 0.4
+        score += sum(1 for keyword in config['keywords']
+                     if stemmer.stem(keyword) in stemmed_tokens) * 0.2
+        max_possible_score = (len(config['keywords']) * 0.3 + len(config['patterns']) * 0.4
+                              + len(config['keywords']) * 0.2)
+        if max_possible_score > 0:
+            score = score / max_possible_score
+        if score >= config['confidence_threshold']:
+            intent_scores[intent] = score
+    return intent_scores
+
+
+def compiled_scores(text):
+    _, stemmed_tokens = preprocess_text(text)
+    return intent_matcher.score(text.lower(), stemmed_tokens)
+
+
+def bench(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            func(message)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(MESSAGES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    for message in MESSAGES:
+        expected, actual = legacy_scores(message), compiled_scores(message)
+        if expected != actual:
+            raise SystemExit(f"Score mismatch for {message!r}: {expected} != {actual}")
+    print(f"Scores identical on {len(MESSAGES)} messages")
+
+    # Tokenization is shared by both paths, so time scoring on its own as well
+    prepared = [(m.lower(), preprocess_text(m)[1]) for m in MESSAGES]
+
+    stemmer = get_stemmer()
+
+    def legacy_only(_):
+        for text_lower, stemmed_tokens in prepared:
+            for config in INTENT_PATTERNS.values():
+                sum(1 for keyword in config['keywords'] if keyword in text_lower)
+                sum(1 for pattern in config['patterns'] if re.search(pattern, text_lower))
+                sum(1 for keyword in config['keywords'] if stemmer.stem(keyword) in stemmed_tokens)
+
+    def compiled_only(_):
+        for text_lower, stemmed_tokens in prepared:
+            intent_matcher.score(text_lower, stemmed_tokens)
+
+    legacy = bench(legacy_scores, args.rounds)
+    compiled = bench(compiled_scores, args.rounds)
+    print(f"classify (with preprocessing): legacy {legacy:8.1f} us/msg  "
+          f"compiled {compiled:8.1f} us/msg  speedup {legacy / compiled:4.1f}x")
+
+    rounds = max(1, args.rounds // len(MESSAGES))
+    legacy = bench(legacy_only, rounds) / len(MESSAGES)
+    compiled = bench(compiled_only, rounds) / len(MESSAGES)
+    print(f"scoring only:                  legacy {legacy:8.1f} us/msg  "
+          f"compiled {compiled:8.1f} us/msg  speedup {legacy / compiled:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
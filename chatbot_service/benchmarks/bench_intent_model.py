@@ -0,0 +1,97 @@
+"""
+Benchmark for the linear intent model
+Cross-validates the model on the labelled seed set against the rule engine
+(accuracy on held-out folds) and reports the per-message inference cost of
+both, one message at a time and in batches.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_intent_model [--folds 5] [--batch 1000]
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+
+import app
+from intent_model import train
+from train_intent_model import read_seed
+
+
+def folds(examples, count, rng):
+    """Stratified folds: each intent's examples dealt round-robin"""
+    by_intent = {}
+    for example in examples:
+        by_intent.setdefault(example[1], []).append(example)
+    result = [[] for _ in range(count)]
+    for group in by_intent.values():
+        rng.shuffle(group)
+        for index, example in enumerate(group):
+            result[index % count].append(example)
+    return result
+
+
+def per_message(function, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            function(message)
+    return (time.perf_counter() - start) / (rounds * len(messages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', default=os.path.join('training', 'intent_seed.jsonl'))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    examples = read_seed(args.seed)
+    rng = random.Random(7)
+    splits = folds(examples, args.folds, rng)
+    rule_correct = model_correct = total = 0
+    start = time.perf_counter()
+    for index, test in enumerate(splits):
+        training = [example for other, fold in enumerate(splits) if other != index
+                    for example in fold]
+        model = train([(message, intent, 1.0) for message, intent in training],
+                      min_confidence=app.Config.INTENT_MODEL_MIN_CONFIDENCE)
+        for (message, expected), (predicted, _) in zip(
+                test, model.classify_batch([message for message, _ in test])):
+            model_correct += predicted == expected
+            rule_correct += app.classify_intent(message)[0] == expected
+            total += 1
+    elapsed = time.perf_counter() - start
+    print(f"{args.folds}-fold accuracy on {total} seed messages "
+          f"(training took {elapsed / args.folds:.2f}s per fold):")
+    print(f"  rules {rule_correct / total:6.1%}")
+    print(f"  model {model_correct / total:6.1%}")
+
+    model = train([(message, intent, 1.0) for message, intent in examples])
+    messages = [message for message, _ in examples]
+    batch = [rng.choice(messages) + f' {i}' for i in range(args.batch)]
+
+    rules = per_message(app.classify_intent, messages, args.rounds)
+    single = per_message(model.classify, messages, args.rounds)
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        model.classify_batch(batch)
+    batched = (time.perf_counter() - start) / (args.rounds * len(batch))
+    scorer = app.get_batch_scorer()
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        stemmed = [app.preprocess_text(text)[1] for text in batch]
+        scorer.classify([text.lower() for text in batch], stemmed)
+    rules_batched = (time.perf_counter() - start) / (args.rounds * len(batch))
+    print("inference per message:")
+    print(f"  rules  single {rules * 1e6:7.1f} us   batch of {args.batch} "
+          f"{rules_batched * 1e6:7.1f} us")
+    print(f"  model  single {single * 1e6:7.1f} us   batch of {args.batch} "
+          f"{batched * 1e6:7.1f} us")
+
+
+if __name__ == '__main__':
+    main()
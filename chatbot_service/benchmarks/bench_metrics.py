@@ -0,0 +1,92 @@
+"""
+Metrics overhead benchmark
+Measures the cost of a single histogram observation and counter increment,
+and /api/process throughput (through the Flask test client, against the
+local stub backend) with metrics and per-message logging on and off
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_metrics [--requests 10000] [--rounds 5]
+"""
+
+import argparse
+import logging
+import time
+
+import app
+from benchmarks.load_async import TRACK_MESSAGE
+from benchmarks.stub_backend import StubBackend, make_package
+from metrics import MetricsRegistry
+
+
+def per_call(fn, rounds=200000):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e9
+
+
+def set_metrics(enabled):
+    for metric in app.metrics._metrics:
+        metric.enabled = enabled
+
+
+def throughput(client, count):
+    payload = {'message': TRACK_MESSAGE.format('CMS000001'), 'sessionId': 'bench'}
+    start = time.perf_counter()
+    for _ in range(count):
+        client.post('/api/process', json=payload)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    costs = {}
+    for enabled in (True, False):
+        registry = MetricsRegistry(enabled=enabled)
+        histogram = registry.histogram('bench_seconds', 'bench', ['stage'])
+        counter = registry.counter('bench', 'bench', ['intent'])
+        costs[enabled] = (per_call(lambda: histogram.observe(0.0004, 'classify')),
+                          per_call(lambda: counter.inc('track_package')))
+        print(f"metrics {'on ' if enabled else 'off'}: observe {costs[enabled][0]:6.0f} ns  "
+              f"inc {costs[enabled][1]:6.0f} ns")
+
+    # Per-message log lines go through a real handler, as in production
+    logging.getLogger('app').handlers[:] = [logging.StreamHandler(open('/dev/null', 'w'))]
+    logging.getLogger('app').propagate = False
+
+    app.rate_limiter.per_minute = app.tracking_limiter.per_minute = 0
+    client = app.app.test_client()
+    with StubBackend(packages={'CMS000001': make_package('CMS000001')}) as stub:
+        app.tracking_client.base_url = stub.url
+        throughput(client, 200)
+        modes = [(False, False), (True, False), (False, True), (True, True)]
+        best = dict.fromkeys(modes, 0.0)
+        # Interleaved rounds, best of each, to keep machine noise out
+        for _ in range(args.rounds):
+            for metrics_on, log_messages in modes:
+                set_metrics(metrics_on)
+                app.Config.LOG_MESSAGES = log_messages
+                rate = throughput(client, args.requests // args.rounds)
+                best[metrics_on, log_messages] = max(best[metrics_on, log_messages], rate)
+        baseline = best[False, False]
+        set_metrics(True)
+        before = sum(metric.count(*labels) for metric in (app.stage_latency, app.request_latency)
+                     for labels in list(metric._series))
+        throughput(client, 100)
+        observations = sum(metric.count(*labels) for metric in (app.stage_latency, app.request_latency)
+                           for labels in list(metric._series)) - before
+        per_request = observations / 100 * costs[True][0] + costs[True][1]
+        print(f"{observations / 100:.0f} observations + 1 increment per request: "
+              f"~{per_request / 1000:.1f} us of metrics work per request")
+        for (metrics_on, log_messages), rate in best.items():
+            print(f"/api/process metrics={'on ' if metrics_on else 'off'} "
+                  f"logging={'on ' if log_messages else 'off'}: {rate:8.1f} req/s  "
+                  f"({(1 / rate - 1 / baseline) * 1e6:+6.1f} us/request)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark for multi-parcel tracking messages
+Sends track messages naming 1 to --max-ids tracking IDs through the Flask
+app (in-process) against a stub backend with --latency seconds per lookup,
+once with the lookups run one after another and once side by side on the
+tracking pool, and prints the mean message latency. Caching is off so
+every lookup reaches the backend.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_multi_tracking [--latency 0.05] [--max-ids 10]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+os.environ.setdefault('LOG_MESSAGES', 'false')
+
+import app as chatbot
+from benchmarks.load_async import TRACK_MESSAGE
+from benchmarks.stub_backend import StubBackend, make_package
+
+
+def mean_latency(client, message, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        response = client.post('/api/process', json={'message': message, 'sessionId': 'bench'})
+        assert response.status_code == 200, response.get_json()
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--max-ids', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    ids = [f'CMS{i:06d}' for i in range(args.max_ids)]
+    packages = {tracking_id: make_package(tracking_id) for tracking_id in ids}
+    chatbot.Config.TRACKING_MAX_IDS_PER_MESSAGE = args.max_ids
+    chatbot.rate_limiter.per_minute = chatbot.tracking_limiter.per_minute = 0
+    chatbot.tracking_client.cache_ttl = chatbot.tracking_client.negative_ttl = 0
+    client = chatbot.app.test_client()
+    parallel = chatbot.tracking_executor
+    sequential = ThreadPoolExecutor(max_workers=1)
+
+    with StubBackend(latency=args.latency, packages=packages) as stub:
+        chatbot.tracking_client.base_url = stub.url
+        print(f"backend latency {args.latency * 1000:.0f} ms per lookup")
+        print(f"{'ids':>4} {'sequential':>12} {'parallel':>12} {'speedup':>8}")
+        for count in sorted({1, 2, 5, args.max_ids}):
+            message = TRACK_MESSAGE.format(' '.join(ids[:count]))
+            chatbot.tracking_executor = sequential
+            one_by_one = mean_latency(client, message, args.rounds)
+            chatbot.tracking_executor = parallel
+            side_by_side = mean_latency(client, message, args.rounds)
+            print(f"{count:>4} {one_by_one * 1000:>10.1f}ms {side_by_side * 1000:>10.1f}ms "
+                  f"{one_by_one / side_by_side:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmarks for the message pipeline stages
+Times preprocess_text, classify_intent, extract_entities and
+generate_response call by call over a synthetic corpus (see corpus.py) and
+reports the mean, p50 and p99 per call. generate_response is given each
+message's corpus intent and runs against the stub backend with the tracking
+cache warmed, so it measures building the reply rather than the lookup.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_pipeline [--messages 2000] [--rounds 3]
+                                        [--output results.json] [--baseline baseline.json]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+os.environ.setdefault('LOG_MESSAGES', 'false')
+
+import app as chatbot
+from benchmarks import corpus, results
+from benchmarks.stub_backend import StubBackend, make_package
+
+
+def percentile(values, fraction):
+    """values must be sorted"""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def time_calls(function, arguments, rounds):
+    """Per-call durations in seconds, sorted"""
+    durations = []
+    clock = time.perf_counter
+    for _ in range(rounds):
+        for argument in arguments:
+            start = clock()
+            function(*argument)
+            durations.append(clock() - start)
+    durations.sort()
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--known-ids', type=int, default=1000)
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    labelled = corpus.generate(args.messages, args.seed, known_ids=args.known_ids)
+    messages = [message for message, _ in labelled]
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(args.known_ids)}
+    chatbot.rate_limiter.per_minute = chatbot.tracking_limiter.per_minute = 0
+    chatbot.tracking_client.cache_ttl = chatbot.tracking_client.negative_ttl = 3600
+    chatbot.warm_up()
+
+    with StubBackend(packages=packages) as stub:
+        chatbot.tracking_client.base_url = stub.url
+        # The corpus labels rather than the classifier pick the reply, so every
+        # intent's reply is built whatever the classifier makes of the message
+        analyzed = [(intent, chatbot.extract_entities(message), message, 'bench')
+                    for message, intent in labelled]
+        for arguments in analyzed:
+            chatbot.generate_response(*arguments)
+
+        stages = {
+            'preprocess_text': (chatbot.preprocess_text, [(message,) for message in messages]),
+            'classify_intent': (chatbot.classify_intent, [(message,) for message in messages]),
+            'extract_entities': (chatbot.extract_entities, [(message,) for message in messages]),
+            'generate_response': (chatbot.generate_response, analyzed)
+        }
+        metrics = {}
+        print(f"{len(messages)} corpus messages x {args.rounds} rounds, per call:")
+        print(f"{'stage':<20} {'mean':>9} {'p50':>9} {'p99':>9}")
+        for name, (function, arguments) in stages.items():
+            durations = time_calls(function, arguments, args.rounds)
+            mean = sum(durations) / len(durations)
+            p50, p99 = percentile(durations, 0.5), percentile(durations, 0.99)
+            print(f"{name:<20} {mean * 1e6:7.1f}us {p50 * 1e6:7.1f}us {p99 * 1e6:7.1f}us")
+            metrics[f'{name}.mean_us'] = results.metric(round(mean * 1e6, 3), 'us')
+            metrics[f'{name}.p99_us'] = results.metric(round(p99 * 1e6, 3), 'us')
+
+    parameters = {'messages': args.messages, 'rounds': args.rounds, 'seed': args.seed,
+                  'known_ids': args.known_ids}
+    sys.exit(results.finish(results.build('pipeline', parameters, metrics),
+                            args.output, args.baseline, args.tolerance))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Preprocessing benchmark and regression check
+Runs a regression corpus through the original pipeline (punkt word_tokenize
+plus an unmemoized PorterStemmer) and the current one (regex fast path and
+memoized stems), checks that tokens, intents and entities are unchanged and
+reports the per-message latency of each (the parity itself is tested in
+tests/test_preprocess.py)
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_preprocess [--rounds N]
+"""
+
+import argparse
+import time
+
+import nlp
+from app import extract_entities, intent_matcher, preprocess_text
+from benchmarks.bench_intent_matcher import MESSAGES
+
+# Extra cases exercising the punkt fallback and the fast-path boundaries
+REGRESSION_CORPUS = MESSAGES + [
+    "I cannot find my parcel!!",
+    "gonna need help with a delivery",
+    "Where's my package? It's late.",
+    "mr. sharma wants a refund, e.g. for 2.5 kg",
+    "Call me on +91 9876543210 or mail a.b@example.com",
+    "same-day delivery for 500 g?",
+    "Paquete perdido — ¿dónde está?",
+    "track   CMS123456 .",
+    "hello...",
+    "",
+]
+
+
+def legacy_preprocess(text):
+    """preprocess_text as it was before the fast path and stem memo"""
+    text = text.lower()
+    stop_words = nlp.get_stopwords()
+    stemmer = nlp.get_stemmer()
+    tokens = [token for token in nlp.word_tokenize(text)
+              if token.isalnum() and token not in stop_words]
+    return tokens, [stemmer.stem(token) for token in tokens]
+
+
+def pipeline(preprocess, text):
+    tokens, stemmed_tokens = preprocess(text)
+    return tokens, intent_matcher.classify(text.lower(), stemmed_tokens), extract_entities(text)
+
+
+def bench(preprocess, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in REGRESSION_CORPUS:
+            preprocess(message)
+    return (time.perf_counter() - start) / (rounds * len(REGRESSION_CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    for message in REGRESSION_CORPUS:
+        expected = pipeline(legacy_preprocess, message)
+        actual = pipeline(preprocess_text, message)
+        if expected != actual:
+            raise SystemExit(f"Output changed for {message!r}: {expected} != {actual}")
+    print(f"Tokens, intents and entities unchanged on {len(REGRESSION_CORPUS)} messages")
+
+    legacy = bench(legacy_preprocess, args.rounds)
+    current = bench(preprocess_text, args.rounds)
+    print(f"preprocess_text: legacy {legacy:7.1f} us/msg  current {current:7.1f} us/msg  "
+          f"speedup {legacy / current:4.1f}x")
+    print(f"stem cache: {nlp.stem.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
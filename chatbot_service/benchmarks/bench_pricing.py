@@ -0,0 +1,59 @@
+"""
+Benchmark for local shipping quotes
+Prices --rows random (weight, service) rows one at a time with
+RateTable.quote, in one vectorized RateTable.cost_batch call, and through
+POST /api/pricing/quote (in-process, JSON included), and prints the cost
+per row.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_pricing [--rows 10000]
+"""
+
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+
+import app as chatbot
+from pricing import DEFAULT_RATES, RateTable, to_kg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    table = RateTable(DEFAULT_RATES)
+    services = list(DEFAULT_RATES['serviceTypes'])
+    items = [{'weight': round(rng.uniform(0.1, 50), 2), 'unit': 'kg',
+              'serviceType': rng.choice(services)} for _ in range(args.rows)]
+    weights = [to_kg(item['weight'], item['unit']) for item in items]
+    indexes = [table.service_index(item['serviceType']) for item in items]
+
+    def timed(function):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            function()
+        return (time.perf_counter() - start) / (args.rounds * args.rows)
+
+    scalar = timed(lambda: [table.quote(weight, index) for weight, index in zip(weights, indexes)])
+    vectorized = timed(lambda: table.cost_batch(weights, indexes))
+    parsed = timed(lambda: table.quote_batch(items))
+    client = chatbot.app.test_client()
+    endpoint = timed(lambda: client.post('/api/pricing/quote', json={'items': items}))
+
+    scalar_costs = [table.quote(weight, index)['cost'] for weight, index in zip(weights, indexes)]
+    assert scalar_costs == table.cost_batch(weights, indexes)[0].tolist()
+    print(f"{args.rows} rows, per row:")
+    print(f"  quote() per row        {scalar * 1e6:8.2f} us")
+    print(f"  cost_batch()           {vectorized * 1e6:8.2f} us")
+    print(f"  quote_batch() of items {parsed * 1e6:8.2f} us")
+    print(f"  /api/pricing/quote     {endpoint * 1e6:8.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark for the request profiler's overhead
+Times /api/process (in-process Flask test client) with the profiler idle,
+sampling 1 in --sample-every requests, and armed for every request, and the
+idle wrapper alone against a direct call.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_profiling [--requests 2000] [--sample-every 100]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+os.environ.setdefault('LOG_MESSAGES', 'false')
+
+import app as chatbot
+from benchmarks.load_async import TRACK_MESSAGE
+from profiling import RequestProfiler
+
+
+def per_request(client, messages):
+    start = time.perf_counter()
+    for message in messages:
+        response = client.post('/api/process', json={'message': message, 'sessionId': 'bench'})
+        assert response.status_code == 200, response.get_json()
+    return (time.perf_counter() - start) / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sample-every', type=int, default=100)
+    args = parser.parse_args()
+
+    chatbot.rate_limiter.per_minute = chatbot.tracking_limiter.per_minute = 0
+    chatbot.warm_up()
+    client = chatbot.app.test_client()
+    # Distinct messages so the result cache does not hide the pipeline; too
+    # short a number to be a tracking ID, so no backend is needed
+    phases = [[TRACK_MESSAGE.format(phase * args.requests + i) for i in range(args.requests)]
+              for phase in range(4)]
+    per_request(client, phases[0])
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = chatbot.profiler
+        profiler.directory = directory
+        idle = per_request(client, phases[1])
+        profiler.set_sample_every(args.sample_every)
+        sampled = per_request(client, phases[2])
+        profiler.set_sample_every(0)
+        profiler.arm(args.requests)
+        armed = per_request(client, phases[3])
+        profiler.flush()
+
+    rounds = 1000000
+    idle_profiler = RequestProfiler(None)
+    wrapped = idle_profiler.wrap(len)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        len('')
+    direct = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        wrapped('')
+    through_wrapper = (time.perf_counter() - start) / rounds
+
+    print(f"/api/process per request ({args.requests} requests):")
+    print(f"  profiler idle            {idle * 1e6:8.1f} us")
+    print(f"  sampling 1 in {args.sample_every:<9} {sampled * 1e6:8.1f} us")
+    print(f"  every request profiled   {armed * 1e6:8.1f} us")
+    print(f"idle wrapper: {(through_wrapper - direct) * 1e9:.0f} ns per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Result cache benchmark
+Replays a quick-reply-heavy message mix through analyze_message with the
+prewarmed result cache and through the uncached pipeline, checks the outputs
+match and reports per-message cost and the cache hit rate
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_result_cache [--messages N]
+"""
+
+import argparse
+import random
+import time
+
+from app import (RESPONSES, TRACKING_RESPONSES, analyze_message, classify_intent,
+                 extract_entities, result_cache, warm_up)
+from benchmarks.bench_intent_matcher import MESSAGES
+
+
+def uncached(message):
+    intent, confidence = classify_intent(message)
+    return intent, confidence, extract_entities(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--quick-reply-share', type=float, default=0.6)
+    args = parser.parse_args()
+
+    quick_replies = [quick_reply for reply in list(RESPONSES.values()) + list(TRACKING_RESPONSES.values())
+                     for quick_reply in reply['quickReplies']]
+    random.seed(42)
+    stream = [random.choice(quick_replies) if random.random() < args.quick_reply_share
+              else random.choice(MESSAGES) + f' CMS{random.randint(0, 999999):06d}'
+              for _ in range(args.messages)]
+
+    warm_up()
+    for message in set(stream):
+        if analyze_message(message) != uncached(message):
+            raise SystemExit(f"Cached result differs for {message!r}")
+
+    for label, func in (('uncached', uncached), ('cached', analyze_message)):
+        start = time.perf_counter()
+        for message in stream:
+            func(message)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<9} {elapsed / len(stream) * 1e6:7.1f} us/msg")
+    print(f"result cache: {result_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
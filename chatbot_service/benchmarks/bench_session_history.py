@@ -0,0 +1,100 @@
+"""
+Memory benchmark for per-session message history
+Stores the same message stream as the old per-message dicts and as compact
+MessageHistory records and reports the traced memory per million messages,
+plus the cost of serializing a full session versus one page of it
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_session_history [--messages N] [--per-session N]
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+import app
+from benchmarks.bench_intent_matcher import MESSAGES
+from config import Config
+from session_history import MessageHistory
+
+
+def message_stream(count):
+    """(message, intent, confidence, entities, bot_response) tuples"""
+    random.seed(11)
+    for _ in range(count):
+        # analyze_message shares cached entity dicts, as in the service
+        message = random.choice(MESSAGES)
+        intent, confidence, entities = app.analyze_message(message)
+        reply = app.RESPONSES.get(intent, app.RESPONSES['unknown'])['message']
+        yield message, intent, confidence, entities, reply
+
+
+def store_dicts(stream, per_session):
+    sessions = []
+    for index, (message, intent, confidence, entities, reply) in enumerate(stream):
+        if index % per_session == 0:
+            history = []
+            sessions.append(history)
+        history.append({
+            'timestamp': datetime.now().isoformat(),
+            'user_message': message,
+            'intent': intent,
+            'confidence': confidence,
+            'entities': entities,
+            'bot_response': reply
+        })
+    return sessions
+
+
+def store_records(stream, per_session):
+    sessions = []
+    for index, (message, intent, confidence, entities, reply) in enumerate(stream):
+        if index % per_session == 0:
+            history = MessageHistory(per_session, app.INTENT_IDS, app.RESPONSE_IDS)
+            sessions.append(history)
+        history.append(message, intent, confidence, entities, reply, datetime.now().timestamp())
+    return sessions
+
+
+def measure(label, store, messages, per_session):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    sessions = store(message_stream(messages), per_session)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} {current / messages * 1e6 / 2 ** 20:8.1f} MiB per million messages  "
+          f"{elapsed / messages * 1e6:6.2f} us/message")
+    return sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--per-session', type=int, default=Config.SESSION_HISTORY_SIZE)
+    args = parser.parse_args()
+
+    app.warm_up()
+    dicts = measure('message dicts', store_dicts, args.messages, args.per_session)
+    records = measure('compact records', store_records, args.messages, args.per_session)
+
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        json.dumps(dicts[0])
+    full = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        json.dumps(records[0].page(limit=20)[0])
+    paged = (time.perf_counter() - start) / rounds
+    print(f"serialize {args.per_session} messages: {full * 1e6:8.1f} us  "
+          f"one page of 20: {paged * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
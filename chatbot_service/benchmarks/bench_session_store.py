@@ -0,0 +1,66 @@
+"""
+Memory benchmark for session storage
+Feeds synthetic sessions through the old unbounded dict and the bounded
+SessionStore and reports peak traced memory and per-operation cost
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_session_store [--sessions N] [--max-sessions N]
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from config import Config
+from session_store import SessionStore
+
+
+def make_session():
+    return {
+        'messages': [{
+            'timestamp': datetime.now().isoformat(),
+            'user_message': 'hello',
+            'intent': 'greeting',
+            'confidence': 0.8,
+            'entities': {},
+            'bot_response': 'Hello!'
+        }],
+        'context': {},
+        'created_at': datetime.now().isoformat()
+    }
+
+
+def run(label, store, put, sessions):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(sessions):
+        put(store, f'session_{i}', make_session())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} sessions kept {len(store):>9,}  peak {peak / 2**20:9.1f} MiB  "
+          f"{elapsed / sessions * 1e6:6.2f} us/put")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--max-sessions', type=int, default=Config.MAX_SESSIONS)
+    args = parser.parse_args()
+
+    run('unbounded dict', {}, lambda d, k, v: d.__setitem__(k, v), args.sessions)
+
+    store = SessionStore(args.max_sessions, Config.SESSION_TIMEOUT.total_seconds())
+    run('SessionStore', store, SessionStore.put, args.sessions)
+    print(f"SessionStore stats: {store.stats()}")
+
+    start = time.perf_counter()
+    for i in range(args.sessions - args.max_sessions, args.sessions):
+        store.get(f'session_{i}')
+    elapsed = time.perf_counter() - start
+    print(f"SessionStore get: {elapsed / args.max_sessions * 1e6:.2f} us/op")
+
+
+if __name__ == '__main__':
+    main()
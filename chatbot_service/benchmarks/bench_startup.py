@@ -0,0 +1,48 @@
+"""
+Startup-time benchmark
+Measures, in fresh interpreters, how long `import app` takes, whether it
+pulls in NLTK, and the time to the first /api/process response
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+nltk_at_import = 'nltk' in sys.modules
+app.app.test_client().post('/api/process', json={'message': 'hello', 'sessionId': 'startup'})
+first = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_response': first - start,
+                  'nltk_at_import': nltk_at_import}))
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True,
+                                text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ('import', 'first_response'):
+        values = [run[key] * 1000 for run in runs]
+        print(f"{key:<15} median {statistics.median(values):8.1f} ms  "
+              f"min {min(values):8.1f} ms  max {max(values):8.1f} ms")
+    print(f"nltk imported at import time: {runs[0]['nltk_at_import']}")
+
+
+if __name__ == '__main__':
+    main()
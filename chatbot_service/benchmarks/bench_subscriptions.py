@@ -0,0 +1,157 @@
+"""
+Benchmark for tracking subscriptions (server-sent events)
+Runs the ASGI service against a stub backend whose packages move through
+their journey every --advance-every seconds, then follows the same parcels
+two ways until they are delivered:
+
+- subscribe: every client holds one /api/tracking/<id>/subscribe stream
+- poll: every client sends a track message to /api/process each
+  --poll-interval seconds (with the tracking cache off, so answers are as
+  fresh as the subscription's)
+
+and compares requests to the service and to the backend. With subscriptions
+backend calls scale with unique IDs x polls rather than clients x polls.
+Finally it opens streams, drops them before the parcels arrive and checks
+that every feed was torn down (the behaviour itself is tested in
+tests/test_subscriptions.py).
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_subscriptions [--clients 500] [--ids 10]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_async import TRACK_MESSAGE, UNLIMITED, wait_ready
+from benchmarks.stub_backend import JOURNEY, StubBackend, make_package
+
+
+async def follow(http, url, tracking_id):
+    """Read one subscription stream to its end; returns the statuses seen"""
+    statuses = []
+    async with http.stream('GET', f'{url}/api/tracking/{tracking_id}/subscribe') as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: ') and event == 'status':
+                statuses.append(line[6:])
+            elif event == 'end':
+                break
+    return statuses
+
+
+async def poll(http, url, tracking_id, client, interval):
+    """Ask the chatbot for a parcel's status until it is delivered.
+
+    Returns (requests sent, requests failed); clients start spread over
+    one interval.
+    """
+    sent = failed = 0
+    await asyncio.sleep(interval * random.random())
+    while True:
+        sent += 1
+        try:
+            response = await http.post(f'{url}/api/process', json={
+                'message': TRACK_MESSAGE.format(tracking_id), 'sessionId': f'poll_{client}'})
+            if 'Delivered' in response.text:
+                return sent, failed
+            failed += response.status_code != 200
+        except httpx.HTTPError:
+            failed += 1
+        await asyncio.sleep(interval)
+
+
+async def drop_early(http, url, tracking_id, hold):
+    """Open a stream and disconnect after `hold` seconds"""
+    async with http.stream('GET', f'{url}/api/tracking/{tracking_id}/subscribe'):
+        await asyncio.sleep(hold)
+
+
+async def run(url, stub, args, mode):
+    ids = [f'CMS{i:06d}' for i in range(args.ids)]
+    limits = httpx.Limits(max_connections=args.clients + 10)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as http:
+        stub.started = time.monotonic()
+        before = stub.total_requests
+        start = time.perf_counter()
+        if mode == 'subscribe':
+            seen = await asyncio.gather(*[follow(http, url, ids[i % len(ids)])
+                                          for i in range(args.clients)])
+            sent, failed = args.clients, 0
+            events = sum(map(len, seen))
+        else:
+            counts = await asyncio.gather(*[poll(http, url, ids[i % len(ids)], i,
+                                                 args.poll_interval)
+                                            for i in range(args.clients)])
+            sent = sum(count for count, _ in counts)
+            failed = sum(count for _, count in counts)
+            events = None
+        elapsed = time.perf_counter() - start
+        return {'elapsed': elapsed, 'requests': sent, 'failed': failed,
+                'upstream': stub.total_requests - before, 'events': events}
+
+
+async def check_cleanup(url, args):
+    async with httpx.AsyncClient(timeout=30) as http:
+        await asyncio.gather(*[drop_early(http, url, f'CMS{i % args.ids:06d}', 0.5)
+                               for i in range(args.clients)])
+        deadline = time.time() + 10
+        while True:
+            stats = (await http.get(f'{url}/api/analytics')).json()['subscriptions']
+            if (stats['feeds'], stats['subscribers']) == (0, 0) or time.time() > deadline:
+                return stats
+            await asyncio.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--ids', type=int, default=10)
+    parser.add_argument('--advance-every', type=float, default=1.0,
+                        help='seconds between status changes of a package')
+    parser.add_argument('--poll-interval', type=float, default=0.25,
+                        help='seconds between backend polls (server) or requests (clients)')
+    parser.add_argument('--port', type=int, default=8768)
+    args = parser.parse_args()
+
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(args.ids)}
+    with StubBackend(packages=packages, advance_every=args.advance_every) as stub:
+        url = f'http://127.0.0.1:{args.port}'
+        env = dict(os.environ, CMS_API_URL=stub.url, LOG_LEVEL='WARNING', LOG_MESSAGES='false',
+                   EVENT_LOG_PATH='', TRACKING_CACHE_TTL='0', MAX_IN_FLIGHT='0',
+                   SUBSCRIPTION_POLL_INTERVAL=str(args.poll_interval),
+                   SUBSCRIPTION_HEARTBEAT='0.2', MAX_SUBSCRIPTIONS=str(args.clients),
+                   **UNLIMITED)
+        server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'asgi_app:app',
+                                   '--log-level', 'warning', '--port', str(args.port)],
+                                  env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_ready(url)
+            polls = args.advance_every * (len(JOURNEY) - 1) / args.poll_interval
+            print(f"{args.clients} clients following {args.ids} parcels, "
+                  f"~{polls:.0f} poll intervals until delivery")
+            for mode in ('poll', 'subscribe'):
+                result = asyncio.run(run(url, stub, args, mode))
+                events = '' if result['events'] is None else f"  events {result['events']}"
+                print(f"{mode:<10} {result['elapsed']:5.1f}s  service requests "
+                      f"{result['requests']:6d} ({result['failed']} failed)  "
+                      f"backend requests {result['upstream']:6d}{events}")
+            stats = asyncio.run(check_cleanup(url, args))
+            print(f"after {args.clients} early disconnects: {stats['feeds']} feeds, "
+                  f"{stats['subscribers']} subscribers, {stats['rejected']} rejected")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Tracking client benchmark against the local stub backend
+Shows request coalescing, positive/negative caching and the circuit breaker
+by counting the requests that actually reach the stub (the behaviour itself is
+tested in tests/test_tracking_client.py)
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_tracking_client [--callers 50] [--latency 0.2]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stub_backend import StubBackend, make_package
+from tracking_client import TrackingClient
+
+
+def uncached_lookup(base_url, tracking_id):
+    """The per-call lookup get_package_status used to make"""
+    try:
+        return requests.get(f"{base_url}/api/tracking/{tracking_id}").json()
+    except requests.exceptions.RequestException:
+        return None
+
+
+def timed_fanout(func, callers, tracking_id):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(lambda _: func(tracking_id), range(callers)))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--callers', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args()
+
+    packages = {'CMS000001': make_package('CMS000001')}
+    with StubBackend(latency=args.latency, packages=packages) as stub:
+        elapsed, _ = timed_fanout(lambda t: uncached_lookup(stub.url, t), args.callers, 'CMS000001')
+        print(f"uncached:  {args.callers} concurrent lookups -> {stub.total_requests} upstream "
+              f"requests in {elapsed:.3f}s")
+
+        stub.requests.clear()
+        client = TrackingClient(stub.url, pool_size=args.callers)
+        elapsed, results = timed_fanout(client.get_status, args.callers, 'CMS000001')
+        assert all(result['found'] for result in results)
+        print(f"coalesced: {args.callers} concurrent lookups -> {stub.total_requests} upstream "
+              f"requests in {elapsed:.3f}s")
+
+        elapsed, _ = timed_fanout(client.get_status, args.callers, 'CMS000001')
+        print(f"cached:    {args.callers} concurrent lookups -> {stub.total_requests} upstream "
+              f"requests in {elapsed:.3f}s")
+
+        for _ in range(3):
+            assert not client.get_status('UNKNOWN1')['found']
+        print(f"negative:  3 lookups of an unknown ID -> {stub.requests['UNKNOWN1']} upstream request")
+
+    print(f"stats: {client.stats()}")
+
+    # Backend gone: the breaker opens and later lookups fail without a connection attempt
+    down = TrackingClient(stub.url)
+    start = time.perf_counter()
+    for i in range(20):
+        down.get_status(f'CMS{i:06d}')
+    elapsed = time.perf_counter() - start
+    print(f"backend down: 20 lookups in {elapsed:.3f}s, circuit {down.breaker.state}, "
+          f"{down.stats()['short_circuits']} short-circuited")
+
+
+if __name__ == '__main__':
+    main()
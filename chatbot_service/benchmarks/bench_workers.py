@@ -0,0 +1,73 @@
+"""
+Requests/sec scaling of the production launcher from 1 to N workers
+Starts `python start.py --production` with WORKERS=1..N against a local stub
+backend and drives each with the same concurrent load. The tracking result is
+cached after the first lookup, so the load is dominated by the NLP pipeline.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.bench_workers [--max-workers N] [--concurrency 32] [--requests 2000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.load_async import TRACK_MESSAGE, UNLIMITED, wait_ready
+from benchmarks.stub_backend import StubBackend, make_package
+
+
+def drive(url, concurrency, total):
+    http = requests.Session()
+    http.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+    body = {'message': TRACK_MESSAGE.format('CMS000001')}
+
+    def one(i):
+        return http.post(f'{url}/api/process', json=dict(body, sessionId=f'bench_{i % 100}'),
+                         timeout=60).status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(one, range(total)))
+    return total / (time.perf_counter() - start), sum(1 for s in statuses if s != 200)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help='benchmark the ASGI app under uvicorn workers')
+    args = parser.parse_args()
+
+    with StubBackend(packages={'CMS000001': make_package('CMS000001')}) as stub:
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            url = f'http://127.0.0.1:{args.port}'
+            env = dict(os.environ, CMS_API_URL=stub.url, WORKERS=str(workers),
+                       BIND=f'127.0.0.1:{args.port}', LOG_LEVEL='WARNING', **UNLIMITED)
+            command = [sys.executable, 'start.py', '--production']
+            if args.async_mode:
+                command.append('--async')
+            server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(url)
+                drive(url, args.concurrency, min(200, args.requests))  # warm every worker
+                rps, errors = drive(url, args.concurrency, args.requests)
+            finally:
+                server.terminate()
+                server.wait()
+            baseline = baseline or rps
+            print(f"{workers:>3} workers  {rps:8.1f} req/s  scaling {rps / baseline:4.2f}x  "
+                  f"errors {errors}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Synthetic message corpus for the chatbot benchmarks
+Fills message templates for every intent with every entity type the service
+extracts (tracking numbers, weights, phone numbers, emails, delivery speeds
+and complaint categories), so benchmark runs exercise the same mix of paths
+each time. Generation is deterministic for a given seed.
+
+Tracking IDs are drawn from CMS000000.. (the IDs the stub backend knows,
+see stub_backend.py) and, for `unknown_ids` of them, from IDs it does not.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.corpus [--count 10000] [--seed 1] [--output corpus.jsonl]
+"""
+
+import argparse
+import json
+import random
+import sys
+
+# Templates per intent; {slots} are filled by CorpusGenerator.fill
+TEMPLATES = {
+    'track_package': [
+        'Track my package {tracking_id}',
+        'Where is my package {tracking_id}?',
+        'track {tracking_id}',
+        'What is the status of shipment {tracking_id}',
+        '{tracking_id}',
+        'Can you track these packages {tracking_id} and {tracking_id}',
+        'Tracking status for {tracking_id}, {tracking_id} and {tracking_id} please',
+        'I want to track my package',
+        'track package delivery status'
+    ],
+    'file_complaint': [
+        'I want to file a complaint about my {complaint} package {tracking_id}',
+        'My package {tracking_id} arrived {complaint}',
+        'I need to report an issue, the delivery was {complaint}',
+        'complaint: {complaint} parcel, call me on {phone}',
+        'Package damaged, please email me at {email}',
+        'The courier was late and my package is {complaint}'
+    ],
+    'cost_inquiry': [
+        'How much does it cost to ship {weight}?',
+        'What is the price for {speed} delivery of a {weight} parcel',
+        'shipping cost estimate for {weight} {speed}',
+        'How much for {speed} shipping?',
+        'What are your shipping charges',
+        'price of delivery for {weight}'
+    ],
+    'location_update': [
+        'Where is my package right now',
+        'What is the current location of {tracking_id}',
+        'location update for my package',
+        'current position of my shipment {tracking_id}'
+    ],
+    'support_contact': [
+        'I need to talk to customer support',
+        'How can I contact your support team?',
+        'Please call me back on {phone}',
+        'Can someone from support email me at {email}',
+        'help me reach an agent'
+    ],
+    'greeting': ['Hello', 'Hi there', 'Good morning', 'hey', 'Hi, I need some help'],
+    'goodbye': ['Thanks, bye', 'Goodbye', 'thank you, that is all', 'see you later'],
+    'unknown': [
+        'What is the weather like today?',
+        'Tell me a joke',
+        'asdfgh qwerty',
+        'Do you sell phones?',
+        '?'
+    ]
+}
+
+WEIGHT_UNITS = ['kg', 'kg', 'g', 'grams', 'kilogram']
+SPEEDS = ['standard', 'express', 'same day', 'same-day', 'urgent', 'fast']
+COMPLAINTS = ['delayed', 'damaged', 'lost', 'wrong', 'poor', 'billing']
+NAMES = ['asha', 'ravi', 'meera', 'john', 'li', 'fatima']
+
+
+class CorpusGenerator:
+    """Draws (message, intent) pairs.
+
+    `intent_weights` sets the share of each intent (uniform by default);
+    `known_ids` is the number of stub backend IDs to draw tracking numbers
+    from and `unknown_ids` the share of tracking numbers that do not exist.
+    """
+
+    def __init__(self, seed=1, known_ids=1000, unknown_ids=0.1, intent_weights=None):
+        self.rng = random.Random(seed)
+        self.known_ids = known_ids
+        self.unknown_ids = unknown_ids
+        weights = intent_weights or {}
+        self.intents = list(TEMPLATES)
+        self.weights = [weights.get(intent, 1.0) for intent in self.intents]
+
+    def tracking_id(self):
+        if self.rng.random() < self.unknown_ids:
+            return f'CMX{self.rng.randrange(10 ** 6):06d}'
+        return f'CMS{self.rng.randrange(self.known_ids):06d}'
+
+    def weight(self):
+        unit = self.rng.choice(WEIGHT_UNITS)
+        if unit in ('g', 'grams'):
+            return f'{self.rng.randrange(100, 5000, 50)}{self.rng.choice(["", " "])}{unit}'
+        return f'{round(self.rng.uniform(0.2, 60), self.rng.choice([0, 1, 2]))} {unit}'
+
+    def phone(self):
+        prefix = self.rng.choice(['', '+91 ', '91-'])
+        return f'{prefix}{self.rng.randrange(6, 10)}{self.rng.randrange(10 ** 9):09d}'
+
+    def email(self):
+        return f'{self.rng.choice(NAMES)}{self.rng.randrange(100)}@example.com'
+
+    def fill(self, template):
+        slots = {
+            'tracking_id': self.tracking_id,
+            'weight': self.weight,
+            'speed': lambda: self.rng.choice(SPEEDS),
+            'complaint': lambda: self.rng.choice(COMPLAINTS),
+            'phone': self.phone,
+            'email': self.email
+        }
+        parts = template.split('{')
+        message = parts[0]
+        for part in parts[1:]:
+            name, rest = part.split('}', 1)
+            message += slots[name]() + rest
+        return message
+
+    def message(self):
+        intent = self.rng.choices(self.intents, self.weights)[0]
+        return self.fill(self.rng.choice(TEMPLATES[intent])), intent
+
+    def generate(self, count):
+        return [self.message() for _ in range(count)]
+
+
+def generate(count, seed=1, **options):
+    """`count` (message, intent) pairs"""
+    return CorpusGenerator(seed, **options).generate(count)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return [(record['message'], record['intent']) for record in map(json.loads, f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--known-ids', type=int, default=1000)
+    parser.add_argument('--unknown-ids', type=float, default=0.1)
+    parser.add_argument('--output', default='-', help='JSON lines file (default: stdout)')
+    args = parser.parse_args()
+
+    corpus = generate(args.count, args.seed, known_ids=args.known_ids,
+                      unknown_ids=args.unknown_ids)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for message, intent in corpus:
+            out.write(json.dumps({'message': message, 'intent': intent}) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Load test: sync (WSGI) vs async (ASGI) serving against a slow backend
+Starts the stub tracking backend with a fixed latency, then runs the Flask
+app as a single synchronous worker and the ASGI app under uvicorn, driving
+both with the same number of concurrent tracking requests
+
+Usage (from chatbot_service/):
+    python -m benchmarks.load_async [--latency 0.5] [--concurrency 50] [--requests 200]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stub_backend import StubBackend, make_package
+
+TRACK_MESSAGE = '{} track status of package where tracking shipment delivery location'
+
+# Throughput benchmarks drive a few sessions hard; lift the per-client limits
+UNLIMITED = {'RATE_LIMIT_PER_MINUTE': '0', 'TRACKING_RATE_LIMIT_PER_MINUTE': '0'}
+
+SERVERS = {
+    'sync (Flask, 1 worker)': [sys.executable, '-c',
+                               'import sys; from app import app; '
+                               'app.run(port=int(sys.argv[1]), threaded=False)'],
+    'async (uvicorn)': [sys.executable, '-m', 'uvicorn', 'asgi_app:app',
+                        '--log-level', 'warning', '--port'],
+}
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health', timeout=1).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} did not become ready')
+
+
+def drive(url, concurrency, total):
+    http = requests.Session()
+    http.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def one(i):
+        start = time.perf_counter()
+        response = http.post(f'{url}/api/process', timeout=120, json={
+            # Distinct IDs so the tracking cache cannot hide the backend latency
+            'message': TRACK_MESSAGE.format(f'CMS{i:06d}'),
+            'sessionId': f'load_{i % concurrency}'
+        })
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        'throughput': total / elapsed,
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(args.requests)}
+    with StubBackend(latency=args.latency, packages=packages) as stub:
+        env = dict(os.environ, CMS_API_URL=stub.url, TRACKING_POOL_SIZE=str(args.concurrency),
+                   NLP_WORKERS=os.environ.get('NLP_WORKERS', '4'), **UNLIMITED)
+        for label, command in SERVERS.items():
+            url = f'http://127.0.0.1:{args.port}'
+            server = subprocess.Popen(command + [str(args.port)], env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(url)
+                result = drive(url, args.concurrency, args.requests)
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{label:<24} {result['throughput']:8.1f} req/s  p50 {result['p50']:6.3f}s  "
+                  f"p99 {result['p99']:6.3f}s  errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
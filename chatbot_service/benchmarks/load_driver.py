@@ -0,0 +1,152 @@
+"""
+End-to-end load driver
+Starts the stub tracking backend and the production launcher (or targets a
+running service with --url), replays a synthetic corpus (see corpus.py)
+against /api/process from --concurrency clients and reports throughput,
+latency percentiles and the error rate, optionally to a JSON results file
+compared with a saved baseline.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.load_driver [--server production|production-async]
+                                     [--concurrency 32] [--requests 5000]
+                                     [--latency 0.02] [--jitter 0.03] [--error-rate 0.0]
+                                     [--output results.json] [--baseline baseline.json]
+    python -m benchmarks.load_driver --url http://127.0.0.1:8000 ...
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import requests
+
+from benchmarks import corpus, results
+from benchmarks.load_async import UNLIMITED, wait_ready
+from benchmarks.stub_backend import StubBackend, make_package
+
+SERVERS = {
+    'production': [sys.executable, 'start.py', '--production'],
+    'production-async': [sys.executable, 'start.py', '--production', '--async']
+}
+
+
+def percentile(values, fraction):
+    """values must be sorted"""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def drive(url, messages, concurrency, sessions):
+    """[(latency seconds, status)] for every message, sent from `concurrency`
+    threads; connection failures count as status 0"""
+    http = requests.Session()
+    http.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def one(index):
+        start = time.perf_counter()
+        try:
+            status = http.post(f'{url}/api/process', timeout=60, json={
+                'message': messages[index],
+                'sessionId': f'load_{index % sessions}'
+            }).status_code
+        except requests.exceptions.RequestException:
+            status = 0
+        return time.perf_counter() - start, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(len(messages))))
+
+
+def summarise(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    statuses = Counter(status for _, status in samples)
+    errors = len(samples) - statuses[200]
+    return {
+        'throughput': len(samples) / elapsed,
+        'mean': sum(latencies) / len(latencies),
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'error_rate': errors / len(samples),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', choices=sorted(SERVERS), default='production')
+    parser.add_argument('--url', help='drive an already running service instead')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8768)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200,
+                        help='requests sent (and not measured) before the run')
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.03)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--known-ids', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    results.add_arguments(parser)
+    args = parser.parse_args()
+
+    messages = [message for message, _ in corpus.generate(
+        args.warmup + args.requests, args.seed, known_ids=args.known_ids)]
+
+    with ExitStack() as stack:
+        url = args.url
+        if url is None:
+            packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}')
+                        for i in range(args.known_ids)}
+            stub = stack.enter_context(StubBackend(latency=args.latency, jitter=args.jitter,
+                                                   error_rate=args.error_rate,
+                                                   packages=packages))
+            url = f'http://127.0.0.1:{args.port}'
+            env = dict(os.environ, CMS_API_URL=stub.url, WORKERS=str(args.workers),
+                       WORKER_THREADS=str(args.threads), BIND=f'127.0.0.1:{args.port}',
+                       LOG_LEVEL='WARNING', LOG_MESSAGES='false', EVENT_LOG_PATH='',
+                       **UNLIMITED)
+            server = subprocess.Popen(SERVERS[args.server], env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            stack.callback(server.wait)
+            stack.callback(server.terminate)
+        wait_ready(url)
+
+        drive(url, messages[:args.warmup], args.concurrency, args.sessions)
+        start = time.perf_counter()
+        samples = drive(url, messages[args.warmup:], args.concurrency, args.sessions)
+        summary = summarise(samples, time.perf_counter() - start)
+
+    print(f"{args.requests} requests from {args.concurrency} clients "
+          f"({'service at ' + args.url if args.url else args.server}):")
+    print(f"  throughput {summary['throughput']:8.1f} req/s")
+    print(f"  latency    mean {summary['mean'] * 1000:.1f} ms  p50 {summary['p50'] * 1000:.1f} ms"
+          f"  p95 {summary['p95'] * 1000:.1f} ms  p99 {summary['p99'] * 1000:.1f} ms")
+    print(f"  errors     {summary['error_rate']:.2%}  statuses {summary['statuses']}")
+
+    metrics = {
+        'throughput_rps': results.metric(round(summary['throughput'], 2), 'req/s',
+                                         lower_is_better=False),
+        'latency_mean_ms': results.metric(round(summary['mean'] * 1000, 3), 'ms'),
+        'latency_p50_ms': results.metric(round(summary['p50'] * 1000, 3), 'ms'),
+        'latency_p95_ms': results.metric(round(summary['p95'] * 1000, 3), 'ms'),
+        'latency_p99_ms': results.metric(round(summary['p99'] * 1000, 3), 'ms'),
+        'error_rate': results.metric(round(summary['error_rate'], 5), 'ratio')
+    }
+    parameters = {key: value for key, value in vars(args).items()
+                  if key not in ('output', 'baseline', 'tolerance', 'port')}
+    report = results.build('load', parameters, metrics)
+    report['statuses'] = summary['statuses']
+    sys.exit(results.finish(report, args.output, args.baseline, args.tolerance))
+
+
+if __name__ == '__main__':
+    main()
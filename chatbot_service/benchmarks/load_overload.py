@@ -0,0 +1,105 @@
+"""
+Overload test for admission control
+Runs the production launcher against a slow stub backend and offers far
+more concurrent requests than its worker threads can serve, with and
+without admission control. Each request carries an X-Request-Start header
+stamped by the client, as a reverse proxy would add it.
+
+With admission control the service answers what it can within
+MAX_QUEUE_WAIT and sheds the rest with a fast 429, so the p99 latency of
+served requests stays bounded; without it every request queues.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.load_overload [--concurrency 200] [--requests 3000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.load_async import TRACK_MESSAGE, UNLIMITED, wait_ready
+from benchmarks.stub_backend import StubBackend, make_package
+
+CONFIGS = {
+    'no admission control': {'MAX_IN_FLIGHT': '0', 'MAX_QUEUE_WAIT': '0'},
+    'admission control': {'MAX_QUEUE_WAIT': '0.25'},
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def drive(url, concurrency, total, ids):
+    http = requests.Session()
+    http.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+
+    def one(i):
+        start = time.perf_counter()
+        response = http.post(f'{url}/api/process', timeout=300, json={
+            'message': TRACK_MESSAGE.format(f'CMS{i % ids:06d}'),
+            'sessionId': f'overload_{i}'
+        }, headers={'X-Request-Start': f't={time.time():.6f}'})
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    served = [latency for latency, status in results if status == 200]
+    shed = [latency for latency, status in results if status == 429]
+    return {
+        'goodput': len(served) / elapsed,
+        'served': len(served),
+        'shed': len(shed),
+        'other': len(results) - len(served) - len(shed),
+        'p50': percentile(served, 0.5),
+        'p99': percentile(served, 0.99),
+        'shed_p99': percentile(shed, 0.99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--ids', type=int, default=500,
+                        help='distinct tracking IDs (cache misses hit the slow backend)')
+    parser.add_argument('--port', type=int, default=8767)
+    args = parser.parse_args()
+
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(args.ids)}
+    with StubBackend(latency=args.latency, packages=packages) as stub:
+        for label, overrides in CONFIGS.items():
+            url = f'http://127.0.0.1:{args.port}'
+            env = dict(os.environ, CMS_API_URL=stub.url, WORKERS=str(args.workers),
+                       WORKER_THREADS=str(args.threads), BIND=f'127.0.0.1:{args.port}',
+                       LOG_LEVEL='WARNING', LOG_MESSAGES='false', EVENT_LOG_PATH='',
+                       TRACKING_CACHE_TTL='0', **UNLIMITED, **overrides)
+            server = subprocess.Popen([sys.executable, 'start.py', '--production'], env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(url)
+                result = drive(url, args.concurrency, args.requests, args.ids)
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{label:<22} goodput {result['goodput']:7.1f} req/s  "
+                  f"served {result['served']:5d}  p50 {result['p50']:6.3f}s  "
+                  f"p99 {result['p99']:6.3f}s  |  429s {result['shed']:5d} "
+                  f"(p99 {result['shed_p99']:6.3f}s)  other {result['other']}")
+
+
+if __name__ == '__main__':
+    main()
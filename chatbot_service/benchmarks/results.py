@@ -0,0 +1,129 @@
+"""
+Benchmark results files and regression checks
+Benchmarks that take --output write a JSON results file: the benchmark
+name, when and where it ran, its parameters and a set of named metrics,
+each with a unit and whether lower is better. Comparing a results file with
+a saved baseline flags every metric that got worse by more than the
+tolerance.
+
+Usage (from chatbot_service/):
+    python -m benchmarks.results baseline.json results.json [--tolerance 0.1]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+
+def metric(value, unit, lower_is_better=True):
+    return {'value': value, 'unit': unit, 'lower_is_better': lower_is_better}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def build(benchmark, parameters, metrics):
+    return {
+        'benchmark': benchmark,
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'parameters': parameters,
+        'metrics': metrics
+    }
+
+
+def write(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, tolerance=0.1):
+    """[(name, baseline value, current value, relative change, regressed)]
+    for the metrics both results have; `change` is positive when the metric
+    got worse"""
+    rows = []
+    for name, now in sorted(current['metrics'].items()):
+        before = baseline['metrics'].get(name)
+        if before is None:
+            continue
+        if before['value']:
+            change = (now['value'] - before['value']) / abs(before['value'])
+        else:
+            # e.g. an error rate that was zero
+            change = 0.0 if not now['value'] else math.copysign(math.inf, now['value'])
+        if not now.get('lower_is_better', True):
+            change = -change
+        rows.append((name, before['value'], now['value'], change, change > tolerance))
+    return rows
+
+
+def report(baseline, current, tolerance=0.1, out=sys.stdout):
+    """Print the comparison; returns the number of regressions"""
+    if baseline.get('benchmark') != current.get('benchmark'):
+        print(f"warning: comparing {current.get('benchmark')} results with a "
+              f"{baseline.get('benchmark')} baseline", file=out)
+    if baseline.get('parameters') != current.get('parameters'):
+        print("warning: the runs used different parameters", file=out)
+    rows = compare(baseline, current, tolerance)
+    print(f"{'metric':<36} {'baseline':>12} {'current':>12} {'change':>8}", file=out)
+    for name, before, now, change, regressed in rows:
+        unit = current['metrics'][name]['unit']
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<36} {before:>12.4g} {now:>12.4g} {change:>+7.1%} {unit}{flag}", file=out)
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} regression(s) beyond {tolerance:.0%} "
+          f"(baseline {baseline.get('commit')}, current {current.get('commit')})", file=out)
+    return regressions
+
+
+def finish(results, output=None, baseline=None, tolerance=0.1):
+    """Write `results` to `output` and compare them with `baseline`;
+    returns the process exit status (1 if anything regressed)"""
+    if output:
+        write(output, results)
+        print(f"results written to {output}")
+    if baseline:
+        return 1 if report(read(baseline), results, tolerance) else 0
+    return 0
+
+
+def add_arguments(parser):
+    """--output/--baseline/--tolerance for benchmarks that write results"""
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='results file to compare with; exits 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative change allowed before a metric counts as a regression')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+    sys.exit(1 if report(read(args.baseline), read(args.current), args.tolerance) else 0)
+
+
+if __name__ == '__main__':
+    main()
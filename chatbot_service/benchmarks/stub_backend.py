@@ -0,0 +1,157 @@
+"""
+Local stub of the CMS backend tracking API
+Serves GET /api/tracking/<id> in the same shape as backend/routes/tracking.js
+with configurable latency and error rate, and counts upstream requests
+
+Usage (from chatbot_service/):
+    python -m benchmarks.stub_backend [--port 5000] [--latency 0.05] [--jitter 0.0]
+                                      [--error-rate 0.0] [--advance-every 30]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_package(tracking_id, status='In Transit', location='Mumbai Hub'):
+    return {
+        'refNumber': tracking_id,
+        'status': status,
+        'currentLocation': location,
+        'expectedDeliveryDate': '2026-01-01'
+    }
+
+
+# Statuses a package moves through when the stub advances packages over time
+JOURNEY = [('Pending Pickup', None), ('Picked Up', 'Mumbai Hub'), ('In Transit', 'Pune Hub'),
+           ('Out for Delivery', 'Bengaluru'), ('Delivered', 'Bengaluru')]
+
+
+class StubBackend:
+    """Threaded HTTP server standing in for CMS_API_URL.
+
+    IDs in `packages` resolve to a package; any other ID returns the backend's
+    404 body. `latency` seconds, plus up to `jitter` more drawn uniformly,
+    are added to every request and `error_rate` of requests fail with a 500. With `advance_every` seconds, every package
+    moves one JOURNEY step further each interval after start() until it is
+    delivered.
+    """
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, packages=None, advance_every=None,
+                 jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.packages = packages if packages is not None else {}
+        self.advance_every = advance_every
+        self.started = time.monotonic()
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one segment; separate small writes stall
+            # on Nagle's algorithm and delayed ACKs (~40 ms per response)
+            wbufsize = 65536
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                prefix = '/api/tracking/'
+                if not self.path.startswith(prefix):
+                    return self._send(404, {'success': False, 'message': 'Not found'})
+                tracking_id = self.path[len(prefix):]
+                with stub._lock:
+                    stub.requests[tracking_id] += 1
+                if stub.latency or stub.jitter:
+                    time.sleep(stub.latency + random.uniform(0, stub.jitter))
+                if stub.error_rate and random.random() < stub.error_rate:
+                    return self._send(500, {'success': False, 'message': 'Server error'})
+                package = stub.lookup(tracking_id)
+                if package is None:
+                    return self._send(404, {'success': False,
+                                            'message': 'Invalid Tracking / Reference Number'})
+                self._send(200, {'success': True, 'message': 'Tracking details found',
+                                 'data': package})
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def lookup(self, tracking_id):
+        package = self.packages.get(tracking_id)
+        if package is None or not self.advance_every:
+            return package
+        step = min(int((time.monotonic() - self.started) / self.advance_every), len(JOURNEY) - 1)
+        status, location = JOURNEY[step]
+        return dict(package, status=status, currentLocation=location or package['currentLocation'])
+
+    @property
+    def total_requests(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='extra latency of up to this many seconds, drawn per request')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--ids', type=int, default=1000,
+                        help='number of known tracking IDs (CMS000000, CMS000001, ...)')
+    parser.add_argument('--advance-every', type=float, default=None,
+                        help='seconds between status changes of every package')
+    args = parser.parse_args()
+
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(args.ids)}
+    stub = StubBackend(args.port, args.latency, args.error_rate, packages, args.advance_every,
+                       args.jitter)
+    print(f"Stub CMS backend listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
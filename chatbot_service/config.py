@@ -14,24 +14,109 @@ class Config:
     PORT = int(os.environ.get('PORT', 8000))
     HOST = os.environ.get('HOST', '0.0.0.0')
     
+    # Production server settings (python start.py --production)
+    BIND = os.environ.get('BIND', f"{HOST}:{PORT}")
+    WORKERS = int(os.environ.get('WORKERS', os.cpu_count() or 1))
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 1))
+    WORKER_TIMEOUT = int(os.environ.get('WORKER_TIMEOUT', 30))
+    GRACEFUL_TIMEOUT = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+    MAX_REQUESTS = int(os.environ.get('MAX_REQUESTS', 10000))
+    MAX_REQUESTS_JITTER = int(os.environ.get('MAX_REQUESTS_JITTER', 1000))
+    
     # NLTK settings
     NLTK_DATA_PATH = os.environ.get('NLTK_DATA_PATH', './nltk_data')
+    NLP_SNAPSHOT_PATH = os.environ.get('NLP_SNAPSHOT_PATH',
+                                       os.path.join(NLTK_DATA_PATH, 'nlp_snapshot.json'))
     
     # Session settings
     SESSION_TIMEOUT = timedelta(hours=1)
     MAX_SESSIONS = int(os.environ.get('MAX_SESSIONS', 1000))
+    SESSION_CLEANUP_INTERVAL = int(os.environ.get('SESSION_CLEANUP_INTERVAL', 60))
+    SESSION_HISTORY_SIZE = int(os.environ.get('SESSION_HISTORY_SIZE', 100))
+    
+    # Event log settings (an empty EVENT_LOG_PATH disables the log)
+    EVENT_LOG_PATH = os.environ.get('EVENT_LOG_PATH', './data/chatbot_events.db')
+    EVENT_LOG_BATCH_SIZE = int(os.environ.get('EVENT_LOG_BATCH_SIZE', 1000))
+    EVENT_LOG_QUEUE_SIZE = int(os.environ.get('EVENT_LOG_QUEUE_SIZE', 100000))
+    EVENT_LOG_REPLAY_HOURS = float(os.environ.get('EVENT_LOG_REPLAY_HOURS', 24))
+    # Events older than this are deleted (0 keeps them forever)
+    EVENT_LOG_RETENTION_HOURS = float(os.environ.get('EVENT_LOG_RETENTION_HOURS',
+                                                     EVENT_LOG_REPLAY_HOURS))
+    EVENT_LOG_PRUNE_INTERVAL = float(os.environ.get('EVENT_LOG_PRUNE_INTERVAL', 300))
+    
+    # Analytics settings
+    ANALYTICS_ROLLUP_MINUTES = int(os.environ.get('ANALYTICS_ROLLUP_MINUTES', 60))
     
     # API settings
     CMS_API_URL = os.environ.get('CMS_API_URL', 'http://localhost:5000')
     
+    # Tracking lookup settings
+    TRACKING_CONNECT_TIMEOUT = float(os.environ.get('TRACKING_CONNECT_TIMEOUT', 2.0))
+    TRACKING_READ_TIMEOUT = float(os.environ.get('TRACKING_READ_TIMEOUT', 5.0))
+    TRACKING_CACHE_TTL = int(os.environ.get('TRACKING_CACHE_TTL', 30))
+    TRACKING_NEGATIVE_CACHE_TTL = int(os.environ.get('TRACKING_NEGATIVE_CACHE_TTL', 10))
+    TRACKING_CACHE_SIZE = int(os.environ.get('TRACKING_CACHE_SIZE', 10000))
+    TRACKING_POOL_SIZE = int(os.environ.get('TRACKING_POOL_SIZE', 20))
+    TRACKING_BREAKER_FAILURES = int(os.environ.get('TRACKING_BREAKER_FAILURES', 5))
+    TRACKING_BREAKER_RESET = int(os.environ.get('TRACKING_BREAKER_RESET', 30))
+    TRACKING_MAX_IDS_PER_MESSAGE = int(os.environ.get('TRACKING_MAX_IDS_PER_MESSAGE', 10))
+    TRACKING_FANOUT_WORKERS = int(os.environ.get('TRACKING_FANOUT_WORKERS', 16))
+    TRACKING_SUGGESTION_CACHE_SIZE = int(os.environ.get('TRACKING_SUGGESTION_CACHE_SIZE', 10000))
+    TRACKING_SUGGESTION_IDS_PER_SESSION = int(os.environ.get('TRACKING_SUGGESTION_IDS_PER_SESSION', 20))
+    
+    # Pricing (rate table JSON; the built-in rates apply while it is missing)
+    RATE_TABLE_PATH = os.environ.get('RATE_TABLE_PATH', './rate_table.json')
+    RATE_TABLE_CHECK_INTERVAL = float(os.environ.get('RATE_TABLE_CHECK_INTERVAL', 5))
+    PRICING_BATCH_MAX_SIZE = int(os.environ.get('PRICING_BATCH_MAX_SIZE', 10000))
+    
+    # Tracking subscriptions (server-sent events; limits are per worker process)
+    SUBSCRIPTION_POLL_INTERVAL = float(os.environ.get('SUBSCRIPTION_POLL_INTERVAL', 15))
+    SUBSCRIPTION_HEARTBEAT = float(os.environ.get('SUBSCRIPTION_HEARTBEAT', 15))
+    MAX_SUBSCRIPTIONS = int(os.environ.get('MAX_SUBSCRIPTIONS', 100))
+    
     # Logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MESSAGES = os.environ.get('LOG_MESSAGES', 'True').lower() == 'true'
+    
+    # Metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Request profiling (armed from /admin/profile or PROFILE_SIGNAL; 0 disables sampling)
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', './profiles')
+    PROFILE_SAMPLE_EVERY = int(os.environ.get('PROFILE_SAMPLE_EVERY', 0))
+    PROFILE_FLUSH_EVERY = int(os.environ.get('PROFILE_FLUSH_EVERY', 100))
+    PROFILE_SIGNAL = os.environ.get('PROFILE_SIGNAL', 'SIGUSR2')
+    PROFILE_SIGNAL_REQUESTS = int(os.environ.get('PROFILE_SIGNAL_REQUESTS', 100))
+    # Token for the /admin endpoints (X-Admin-Token header); empty disables them
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
     
-    # Rate limiting
+    # Rate limiting (per user/session; 0 disables a limit)
     RATE_LIMIT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_PER_MINUTE', 60))
+    RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', 10))
+    TRACKING_RATE_LIMIT_PER_MINUTE = int(os.environ.get('TRACKING_RATE_LIMIT_PER_MINUTE', 10))
+    # Each tracking ID costs a token, so a bucket must hold a full message's worth
+    TRACKING_RATE_LIMIT_BURST = max(int(os.environ.get('TRACKING_RATE_LIMIT_BURST', 10)),
+                                    TRACKING_MAX_IDS_PER_MESSAGE)
+    RATE_LIMIT_SLOTS = int(os.environ.get('RATE_LIMIT_SLOTS', 65536))
+    
+    # Admission control (per worker process; 0 disables a limit)
+    MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', 64))
+    ADMISSION_MAX_WAIT = float(os.environ.get('ADMISSION_MAX_WAIT', 0.1))
+    MAX_QUEUE_WAIT = float(os.environ.get('MAX_QUEUE_WAIT', 1.0))
     
     # NLP settings
+    NLP_WORKERS = int(os.environ.get('NLP_WORKERS', 4))
+    STEM_CACHE_SIZE = int(os.environ.get('STEM_CACHE_SIZE', 10000))
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 5000))
+    BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 1000))
     DEFAULT_CONFIDENCE_THRESHOLD = float(os.environ.get('DEFAULT_CONFIDENCE_THRESHOLD', 0.6))
+    FUZZY_MATCHING = os.environ.get('FUZZY_MATCHING', 'True').lower() == 'true'
+    
+    # Intent classifier: 'rules' (keyword/pattern scoring) or 'model' (linear
+    # model trained with train_intent_model.py)
+    INTENT_CLASSIFIER = os.environ.get('INTENT_CLASSIFIER', 'rules').lower()
+    INTENT_MODEL_PATH = os.environ.get('INTENT_MODEL_PATH', './models/intent_model.npz')
+    INTENT_MODEL_MIN_CONFIDENCE = float(os.environ.get('INTENT_MODEL_MIN_CONFIDENCE', 0.4))
     
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -0,0 +1,250 @@
+"""
+Durable event log for the CMS Chatbot Service
+SQLite (WAL) log of processed messages and session resets.
+Requests only enqueue events; a background thread writes them in batches
+and deletes those older than the retention window, and at startup the log
+is streamed back to rebuild sessions and analytics.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MESSAGE = 1
+RESET = 2
+
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind INTEGER NOT NULL,
+    session_id TEXT NOT NULL,
+    message TEXT,
+    intent TEXT,
+    confidence REAL,
+    entities TEXT,
+    response TEXT,
+    context TEXT
+)
+"""
+
+_INSERT = ("INSERT INTO events (ts, kind, session_id, message, intent, confidence, "
+           "entities, response, context) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':')) if value else None
+
+
+class EventLog:
+    """Queue-fed, batch-writing SQLite event log.
+
+    `record_message()` and `record_reset()` never touch the disk: they put
+    the event on a bounded queue (dropping and counting it if the queue is
+    full) and the writer thread inserts everything queued so far in one
+    transaction. Several processes may share the file; WAL mode lets the
+    writers take turns without blocking readers.
+
+    With a `retention` (seconds), the writer also deletes the events older
+    than that every `prune_interval` seconds, so the file (and the messages,
+    emails and phone numbers in it) is kept no longer than needed.
+    """
+
+    def __init__(self, path, batch_size=1000, queue_size=100000, retention=None,
+                 prune_interval=300, clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.clock = clock
+        self._queue = queue.Queue(queue_size)
+        self._writer = None
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(['written', 'batches', 'dropped', 'failed', 'pruned'], 0)
+
+    def connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(_SCHEMA)
+        return connection
+
+    def start(self):
+        """Start the writer thread (again in each forked worker)"""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        # A queue inherited across fork may hold locks of the parent's writer
+        self._queue = queue.Queue(self.queue_size)
+        self._writer = threading.Thread(target=self._write_loop, name='event-log-writer',
+                                        daemon=True)
+        self._writer.start()
+
+    def close(self, timeout=10):
+        """Write out queued events and stop the writer thread"""
+        if self._writer is None or not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def flush(self):
+        """Block until every event queued so far has been written"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+
+    def record_message(self, session_id, timestamp, message, intent, confidence, entities,
+                       response, context):
+        self._put((timestamp, MESSAGE, session_id, message, intent, confidence,
+                   entities, response, context))
+
+    def record_reset(self, session_id, timestamp):
+        self._put((timestamp, RESET, session_id, None, None, None, None, None, None))
+
+    def _write_loop(self):
+        try:
+            connection = self.connect()
+        except sqlite3.Error as e:
+            logger.error(f"Event log disabled, cannot open {self.path}: {e}")
+            return
+        stopping = False
+        pruned_at = None
+        while not stopping:
+            if self.retention and (pruned_at is None
+                                   or self.clock() - pruned_at >= self.prune_interval):
+                pruned_at = self.clock()
+                self.prune(connection)
+            # Everything queued since the last write goes into one transaction
+            batch = []
+            try:
+                event = self._queue.get(timeout=self.prune_interval if self.retention else None)
+            except queue.Empty:
+                continue
+            while True:
+                if event is _STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write(connection, batch)
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+        connection.close()
+
+    def _write(self, connection, batch):
+        if not batch:
+            return
+        rows = [(ts, kind, session_id, message, intent, confidence, _dumps(entities),
+                 response, _dumps(context))
+                for ts, kind, session_id, message, intent, confidence, entities, response, context
+                in batch]
+        try:
+            with connection:
+                connection.executemany(_INSERT, rows)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write {len(rows)} events to the event log: {e}")
+            with self._lock:
+                self._stats['failed'] += len(rows)
+            return
+        with self._lock:
+            self._stats['written'] += len(rows)
+            self._stats['batches'] += 1
+
+    def prune(self, connection):
+        """Delete the events logged before the retention window"""
+        first_id = self.first_id_since(connection, self.clock() - self.retention)
+        try:
+            with connection:
+                deleted = connection.execute('DELETE FROM events WHERE id < ?',
+                                             (first_id,)).rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Failed to prune the event log: {e}")
+            return
+        with self._lock:
+            self._stats['pruned'] += deleted
+
+    @staticmethod
+    def first_id_since(connection, timestamp):
+        """Smallest event id logged at or after `timestamp`.
+
+        Ids grow with time, so this is a binary search over the primary key
+        rather than a scan (or an index on ts).
+        """
+        low, high = connection.execute('SELECT MIN(id), MAX(id) FROM events').fetchone()
+        if low is None:
+            return 0
+        high += 1
+        while low < high:
+            middle = (low + high) // 2
+            row = connection.execute('SELECT id, ts FROM events WHERE id >= ? ORDER BY id LIMIT 1',
+                                     (middle,)).fetchone()
+            if row[1] >= timestamp:
+                high = middle
+            else:
+                low = row[0] + 1
+        return low
+
+    def replay(self, since=None, chunk_size=10000):
+        """Yield (ts, kind, session_id, message, intent, confidence, entities,
+        response, context) for every event logged since `since` (epoch
+        seconds; all events if None), oldest first.
+
+        Rows are streamed in chunks; identical entity and context JSON
+        documents decode to one shared dict.
+        """
+        if not os.path.exists(self.path):
+            return
+        connection = self.connect()
+        decoded = {}
+        try:
+            first_id = 0 if since is None else self.first_id_since(connection, since)
+            cursor = connection.execute(
+                'SELECT ts, kind, session_id, message, intent, confidence, entities, '
+                'response, context FROM events WHERE id >= ? ORDER BY id', (first_id,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if len(decoded) > chunk_size:
+                    decoded.clear()
+                for ts, kind, session_id, message, intent, confidence, entities, response, context in rows:
+                    yield (ts, kind, session_id, message, intent, confidence,
+                           self._decode(decoded, entities), response,
+                           self._decode(decoded, context))
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _decode(decoded, text):
+        if text is None:
+            return {}
+        value = decoded.get(text)
+        if value is None:
+            value = decoded[text] = json.loads(text)
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize()
+        return stats
@@ -0,0 +1,25 @@
+"""
+JSON encoding for API responses
+Uses orjson when it is installed, several times faster than the standard
+encoder, and falls back to json otherwise; both write compact UTF-8.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CONTENT_TYPE = 'application/json'
+
+if orjson is not None:
+    def dumps(value):
+        """JSON bytes of `value`"""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(value):
+        """JSON bytes of `value`"""
+        return _encoder.encode(value).encode('utf-8')
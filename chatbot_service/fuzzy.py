@@ -0,0 +1,206 @@
+"""
+Typo-tolerant lookups for the CMS Chatbot Service
+A SymSpell-style deletion index finds the terms within a small edit distance
+of a word without scanning the vocabulary. It backs the spelling correction
+applied before intent classification and the "did you mean" suggestions for
+mistyped tracking IDs.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+_WORD = re.compile(r'[a-z]+')
+
+
+def deletes(word, max_distance):
+    """Every string obtained by deleting up to `max_distance` characters"""
+    result = {word}
+    level = {word}
+    for _ in range(max_distance):
+        level = {item[:index] + item[index + 1:] for item in level for index in range(len(item))}
+        result |= level
+    return result
+
+
+def edit_distance(first, second, max_distance):
+    """Optimal string alignment distance (adjacent transpositions count as
+    one edit), or max_distance + 1 once it is certain to exceed it"""
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i] + [0] * len(second)
+        for j, second_char in enumerate(second, 1):
+            cost = first_char != second_char
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and j > 1 and first_char == second[j - 2]
+                    and first[i - 2] == second_char):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """Deletion index over a set of terms.
+
+    Each term is stored under every string reachable by deleting up to
+    `max_distance` of its characters; a query generates its own deletions
+    and only the terms sharing one are compared, so a lookup costs about
+    the same for ten terms as for ten thousand. With `capacity`, the least
+    recently added terms are dropped beyond that many.
+    """
+
+    def __init__(self, terms=(), max_distance=2, capacity=None):
+        self.max_distance = max_distance
+        self.capacity = capacity
+        self._terms = OrderedDict()
+        self._deletes = {}
+        self._lock = threading.Lock()
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def add(self, term):
+        with self._lock:
+            if term in self._terms:
+                self._terms.move_to_end(term)
+                return
+            self._terms[term] = None
+            for key in deletes(term, self.max_distance):
+                self._deletes.setdefault(key, set()).add(term)
+            if self.capacity is not None and len(self._terms) > self.capacity:
+                self._remove(next(iter(self._terms)))
+
+    def discard(self, term):
+        with self._lock:
+            if term in self._terms:
+                self._remove(term)
+
+    def _remove(self, term):
+        del self._terms[term]
+        for key in deletes(term, self.max_distance):
+            terms = self._deletes.get(key)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._deletes[key]
+
+    def lookup(self, word, max_distance=None):
+        """Terms closest to `word` within `max_distance` edits, as a sorted
+        list of (distance, term) sharing the smallest distance found"""
+        max_distance = self.max_distance if max_distance is None else min(
+            max_distance, self.max_distance)
+        if word in self._terms:
+            return [(0, word)]
+        with self._lock:
+            candidates = set()
+            for key in deletes(word, max_distance):
+                candidates.update(self._deletes.get(key, ()))
+        best = max_distance + 1
+        matches = []
+        for term in candidates:
+            distance = edit_distance(word, term, best if matches else max_distance)
+            if distance < best:
+                best = distance
+                matches = [term]
+            elif distance == best:
+                matches.append(term)
+        return [(best, term) for term in sorted(matches)]
+
+    def best(self, word, max_distance=None):
+        """The single closest term, or None if there is none or a tie"""
+        matches = self.lookup(word, max_distance)
+        return matches[0][1] if len(matches) == 1 else None
+
+
+class SpellCorrector:
+    """Rewrites misspelt words of a message to vocabulary terms.
+
+    Words of at least `min_length` letters that are neither in the
+    vocabulary nor `protected` are replaced by their unique closest
+    vocabulary term: one edit away, or two for words of `long_length`
+    letters or more. Ambiguous words are left alone, and corrections are
+    memoized for up to `cache_size` distinct words.
+    """
+
+    def __init__(self, vocabulary, protected=(), min_length=4, long_length=8,
+                 cache_size=10000):
+        self.index = FuzzyIndex(vocabulary, max_distance=2)
+        self.protected = frozenset(protected)
+        self.min_length = min_length
+        self.long_length = long_length
+        self.cache_size = cache_size
+        self._corrections = {}
+
+    def correct_word(self, word):
+        correction = self._corrections.get(word)
+        if correction is not None:
+            return correction
+        correction = word
+        if (len(word) >= self.min_length and word not in self.index
+                and word not in self.protected):
+            best = self.index.best(word, 2 if len(word) >= self.long_length else 1)
+            if best is not None:
+                correction = best
+        if len(self._corrections) < self.cache_size:
+            self._corrections[word] = correction
+        return correction
+
+    def correct(self, text):
+        """Lowercased `text` with misspelt words corrected"""
+        return _WORD.sub(lambda match: self.correct_word(match.group(0)), text.lower())
+
+
+class ScopedFuzzyIndex:
+    """Small FuzzyIndexes of recently added terms, one per scope.
+
+    For suggestions that must not leak between scopes (e.g. tracking IDs
+    between sessions): a lookup only sees the terms added to its own scope.
+    Each scope keeps its `terms_per_scope` most recently added terms, and
+    the `max_scopes` most recently used scopes are kept.
+    """
+
+    def __init__(self, max_scopes, terms_per_scope=20, max_distance=1):
+        self.max_scopes = max_scopes
+        self.terms_per_scope = terms_per_scope
+        self.max_distance = max_distance
+        self._scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._scopes)
+
+    def add(self, scope, term):
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is None:
+                index = self._scopes[scope] = FuzzyIndex(
+                    max_distance=self.max_distance, capacity=self.terms_per_scope)
+                if len(self._scopes) > self.max_scopes:
+                    self._scopes.popitem(last=False)
+            else:
+                self._scopes.move_to_end(scope)
+        index.add(term)
+
+    def best(self, scope, word):
+        """The single term of `scope` closest to `word`, other than `word`
+        itself, or None if there is none or a tie"""
+        with self._lock:
+            index = self._scopes.get(scope)
+        if index is None:
+            return None
+        matches = [term for _, term in index.lookup(word) if term != word]
+        return matches[0] if len(matches) == 1 else None
+
+    def discard_scope(self, scope):
+        with self._lock:
+            self._scopes.pop(scope, None)
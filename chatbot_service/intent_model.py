@@ -0,0 +1,220 @@
+"""
+Linear intent classifier for the CMS Chatbot Service
+Messages become hashed TF-IDF features (word stems, stem bigrams and
+character trigrams) scored by a multinomial logistic regression in NumPy.
+It is the alternative to the keyword rules, selected with
+INTENT_CLASSIFIER=model and trained offline with train_intent_model.py.
+"""
+
+import json
+import math
+import zlib
+
+import numpy as np
+
+import nlp
+
+# Stand-ins for tokens with digits, so unseen tracking IDs and weights
+# still count as evidence
+ID_TOKEN = '<id>'
+NUMBER_TOKEN = '<num>'
+
+
+def normalise_token(token):
+    if token.isdigit():
+        return NUMBER_TOKEN
+    if any(char.isdigit() for char in token):
+        return ID_TOKEN
+    return token
+
+
+def terms(text):
+    """Feature terms of a message.
+
+    Stopwords are kept ("how much", "where is" are strong cues), words are
+    stemmed, and character trigrams let misspelt or unseen forms of known
+    words still match.
+    """
+    tokens = [normalise_token(nlp.stem(token))
+              for token in nlp.tokenize(text.lower()) if token.isalnum()]
+    result = tokens + [f'{first} {second}' for first, second in zip(tokens, tokens[1:])]
+    for token in tokens:
+        if token[0] != '<':
+            padded = f'#{token}#'
+            result.extend('~' + padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class FeatureHasher:
+    """Maps terms to one of `n_features` columns with CRC32.
+
+    Hashes are stable across processes (unlike hash()), so a model trained
+    offline addresses the same columns in every worker. Term columns are
+    memoized up to `cache_size` terms.
+    """
+
+    def __init__(self, n_features, cache_size=100000):
+        self.n_features = n_features
+        self.cache_size = cache_size
+        self._columns = {}
+
+    def column(self, term):
+        column = self._columns.get(term)
+        if column is None:
+            column = zlib.crc32(term.encode('utf-8')) % self.n_features
+            if len(self._columns) < self.cache_size:
+                self._columns[term] = column
+        return column
+
+    def counts(self, text):
+        """{column: term count} for a message"""
+        counts = {}
+        for term in terms(text):
+            column = self.column(term)
+            counts[column] = counts.get(column, 0) + 1
+        return counts
+
+
+class IntentModel:
+    """Multinomial logistic regression over hashed TF-IDF features.
+
+    `weights` is (n_features x classes); only the rows of a message's
+    columns are read, so scoring costs O(terms x classes) whatever the
+    feature space. Predictions below `min_confidence` are returned as
+    `fallback`.
+    """
+
+    def __init__(self, classes, weights, bias, idf, min_confidence=0.4, fallback='unknown'):
+        self.classes = list(classes)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.min_confidence = min_confidence
+        self.fallback = fallback
+        self.hasher = FeatureHasher(len(self.idf))
+
+    def vectorize(self, text):
+        """(columns, values): sublinear TF-IDF, L2 normalised"""
+        counts = self.hasher.counts(text)
+        columns = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        values = np.fromiter((1.0 + math.log(count) for count in counts.values()),
+                             dtype=np.float32, count=len(counts))
+        values *= self.idf[columns]
+        norm = float(np.sqrt(values @ values))
+        if norm > 0:
+            values /= norm
+        return columns, values
+
+    def probabilities(self, text):
+        columns, values = self.vectorize(text)
+        return softmax(values @ self.weights[columns] + self.bias)
+
+    def probabilities_batch(self, texts):
+        """(messages x classes) probabilities, from one scatter-add"""
+        vectors = [self.vectorize(text) for text in texts]
+        rows = np.repeat(np.arange(len(vectors)), [len(columns) for columns, _ in vectors])
+        columns = np.concatenate([columns for columns, _ in vectors] or [np.zeros(0, np.int64)])
+        values = np.concatenate([values for _, values in vectors] or [np.zeros(0, np.float32)])
+        logits = np.tile(self.bias, (len(vectors), 1))
+        np.add.at(logits, rows, values[:, None] * self.weights[columns])
+        return softmax(logits)
+
+    def _decide(self, probabilities):
+        best = int(probabilities.argmax())
+        confidence = float(probabilities[best])
+        if confidence < self.min_confidence:
+            return self.fallback, 0.0
+        return self.classes[best], confidence
+
+    def classify(self, text):
+        """Return the best (intent, confidence) pair, or (fallback, 0.0)"""
+        return self._decide(self.probabilities(text))
+
+    def classify_batch(self, texts):
+        """Return [(intent, confidence), ...] in input order"""
+        if not texts:
+            return []
+        return [self._decide(row) for row in self.probabilities_batch(texts)]
+
+    def save(self, path, metadata=None):
+        """Write the model as a compressed .npz artifact"""
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, idf=self.idf,
+                            classes=np.array(self.classes),
+                            metadata=np.array(json.dumps(metadata or {})))
+
+    @classmethod
+    def load(cls, path, min_confidence=0.4, fallback='unknown'):
+        with np.load(path) as artifact:
+            return cls([str(name) for name in artifact['classes']], artifact['weights'],
+                       artifact['bias'], artifact['idf'], min_confidence, fallback)
+
+    @staticmethod
+    def metadata(path):
+        with np.load(path) as artifact:
+            return json.loads(str(artifact['metadata']))
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def train(examples, n_features=2 ** 18, epochs=300, learning_rate=0.05, l2=1e-4,
+          min_confidence=0.4, fallback='unknown'):
+    """Fit an IntentModel to (message, intent, weight) examples.
+
+    Full-batch Adam on the softmax cross-entropy. Training runs on the
+    compacted set of columns that occur in the examples, which are then
+    scattered back into the hashed weight matrix.
+    """
+    hasher = FeatureHasher(n_features)
+    classes = sorted({intent for _, intent, _ in examples})
+    class_index = {intent: i for i, intent in enumerate(classes)}
+
+    documents = [hasher.counts(text) for text, _, _ in examples]
+    frequency = np.zeros(n_features)
+    for counts in documents:
+        frequency[list(counts)] += 1
+    idf = (np.log((1 + len(documents)) / (1 + frequency)) + 1).astype(np.float32)
+
+    model = IntentModel(classes, np.zeros((n_features, len(classes))), np.zeros(len(classes)),
+                        idf, min_confidence, fallback)
+    rows, columns, values = [], [], []
+    for row, (text, _, _) in enumerate(examples):
+        row_columns, row_values = model.vectorize(text)
+        rows.append(np.full(len(row_columns), row))
+        columns.append(row_columns)
+        values.append(row_values)
+    rows = np.concatenate(rows)
+    used, local = np.unique(np.concatenate(columns), return_inverse=True)
+    values = np.concatenate(values).astype(np.float64)
+
+    targets = np.zeros((len(examples), len(classes)))
+    targets[np.arange(len(examples)), [class_index[intent] for _, intent, _ in examples]] = 1
+    sample_weights = np.array([weight for _, _, weight in examples], dtype=np.float64)
+    sample_weights /= sample_weights.sum()
+
+    weights = np.zeros((len(used), len(classes)))
+    bias = np.zeros(len(classes))
+    parameters = [weights, bias]
+    moments = [np.zeros_like(p) for p in parameters]
+    velocities = [np.zeros_like(p) for p in parameters]
+    for step in range(1, epochs + 1):
+        logits = np.tile(bias, (len(examples), 1))
+        np.add.at(logits, rows, values[:, None] * weights[local])
+        error = (softmax(logits) - targets) * sample_weights[:, None]
+        gradient_weights = l2 * weights
+        np.add.at(gradient_weights, local, values[:, None] * error[rows])
+        gradients = [gradient_weights, error.sum(axis=0)]
+        for parameter, gradient, moment, velocity in zip(parameters, gradients, moments,
+                                                         velocities):
+            moment *= 0.9
+            moment += 0.1 * gradient
+            velocity *= 0.999
+            velocity += 0.001 * gradient ** 2
+            parameter -= (learning_rate * (moment / (1 - 0.9 ** step))
+                          / (np.sqrt(velocity / (1 - 0.999 ** step)) + 1e-8))
+
+    full = np.zeros((n_features, len(classes)), dtype=np.float32)
+    full[used] = weights
+    return IntentModel(classes, full, bias, idf, min_confidence, fallback)
@@ -0,0 +1,202 @@
+"""
+NLP resources for the CMS Chatbot Service
+NLTK is imported and its data loaded on first use, from local paths only:
+Config.NLTK_DATA_PATH is searched first and nothing is downloaded at runtime.
+Stopwords and the stems of the known vocabulary can be served from a compact
+snapshot file so importing the service does not touch NLTK at all.
+
+Build-time usage (needs network access once):
+    python nlp.py download        # fetch NLTK data into NLTK_DATA_PATH
+    python nlp.py snapshot        # write the stopword/stem snapshot
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from functools import lru_cache
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# NLTK data the service needs; NLTK >= 3.9 tokenizes with punkt_tab,
+# older releases with punkt.
+RESOURCES = ['punkt_tab', 'punkt', 'stopwords']
+
+# Plain lowercase ASCII words separated by whitespace, '?' or '!' (plus an
+# optional sentence-final '.') tokenize identically with a regex: punkt and
+# the treebank rules only split such text on whitespace and around '?!.'.
+_FAST_PATH = re.compile(r'[a-z0-9?!\s]*')
+_FAST_TOKEN = re.compile(r'[a-z0-9]+|[?!.]')
+# Words the treebank tokenizer splits in two (can|not, gon|na, ...)
+_TREEBANK_SPLITS = frozenset(['cannot', 'gimme', 'gonna', 'gotta', 'lemme', 'wanna'])
+
+_lock = threading.RLock()
+_configured = False
+_snapshot = None
+_stopwords = None
+_stemmer = None
+_word_tokenize = None
+
+
+def _nltk():
+    """Import nltk with the bundled data directory first on its search path"""
+    global _configured
+    import nltk
+
+    if not _configured:
+        with _lock:
+            data_path = os.path.abspath(Config.NLTK_DATA_PATH)
+            if data_path not in nltk.data.path:
+                nltk.data.path.insert(0, data_path)
+            _configured = True
+    return nltk
+
+
+def load_snapshot():
+    """Return the stopword/stem snapshot, or an empty one if there is none"""
+    global _snapshot
+    if _snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                try:
+                    with open(Config.NLP_SNAPSHOT_PATH, encoding='utf-8') as f:
+                        _snapshot = json.load(f)
+                except FileNotFoundError:
+                    _snapshot = {}
+                except ValueError as e:
+                    logger.warning(f"Ignoring unreadable NLP snapshot {Config.NLP_SNAPSHOT_PATH}: {e}")
+                    _snapshot = {}
+    return _snapshot
+
+
+def get_stopwords():
+    """English stopwords, from the snapshot or the local NLTK corpus"""
+    global _stopwords
+    if _stopwords is None:
+        with _lock:
+            if _stopwords is None:
+                words = load_snapshot().get('stopwords')
+                if words is None:
+                    _nltk()
+                    from nltk.corpus import stopwords
+                    words = stopwords.words('english')
+                _stopwords = frozenset(words)
+    return _stopwords
+
+
+def get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        with _lock:
+            if _stemmer is None:
+                _nltk()
+                from nltk.stem import PorterStemmer
+                _stemmer = PorterStemmer()
+    return _stemmer
+
+
+@lru_cache(maxsize=Config.STEM_CACHE_SIZE)
+def stem(word):
+    """Porter stem of `word`, memoized; snapshot vocabulary skips NLTK"""
+    stemmed = load_snapshot().get('stems', {}).get(word)
+    if stemmed is None:
+        stemmed = get_stemmer().stem(word)
+    return stemmed
+
+
+def word_tokenize(text):
+    """NLTK punkt/treebank tokenization, loading the tokenizer on first use"""
+    global _word_tokenize
+    if _word_tokenize is None:
+        with _lock:
+            if _word_tokenize is None:
+                _nltk()
+                from nltk.tokenize import word_tokenize as tokenize
+                _word_tokenize = tokenize
+    return _word_tokenize(text)
+
+
+def tokenize(text):
+    """Tokenize like word_tokenize, skipping punkt for plain ASCII text"""
+    if text.isascii():
+        body = text.rstrip()
+        if len(body) > 1 and body[-1] == '.' and body[-2].isalnum():
+            body = body[:-1]
+        if _FAST_PATH.fullmatch(body):
+            tokens = _FAST_TOKEN.findall(text)
+            if _TREEBANK_SPLITS.isdisjoint(tokens):
+                return tokens
+    return word_tokenize(text)
+
+
+def missing_resources():
+    """Names of required NLTK resources not available locally"""
+    nltk = _nltk()
+
+    def available(path):
+        try:
+            nltk.data.find(path)
+            return True
+        except LookupError:
+            return False
+
+    missing = []
+    if not (available('tokenizers/punkt_tab') or available('tokenizers/punkt')):
+        missing.append('punkt_tab')
+    if not available('corpora/stopwords'):
+        missing.append('stopwords')
+    return missing
+
+
+def download_resources(path=None):
+    """Download the required NLTK data into `path` (build time only)"""
+    nltk = _nltk()
+    path = os.path.abspath(path or Config.NLTK_DATA_PATH)
+    os.makedirs(path, exist_ok=True)
+    for name in RESOURCES:
+        nltk.download(name, download_dir=path, quiet=True)
+
+
+def build_snapshot(vocabulary, path=None):
+    """Write stopwords and the stems of `vocabulary` to the snapshot file"""
+    _nltk()
+    from nltk.corpus import stopwords
+    stemmer = get_stemmer()
+    snapshot = {
+        'stopwords': sorted(stopwords.words('english')),
+        'stems': {word: stemmer.stem(word) for word in sorted(set(vocabulary))}
+    }
+    path = path or Config.NLP_SNAPSHOT_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    return path
+
+
+def known_vocabulary():
+    """Words the service stems at startup or sees most often"""
+    from app import INTENT_PATTERNS
+
+    vocabulary = set()
+    for config in INTENT_PATTERNS.values():
+        for keyword in config['keywords']:
+            vocabulary.add(keyword)
+            vocabulary.update(keyword.split())
+    return vocabulary
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'download':
+        download_resources()
+        logger.info(f"NLTK data downloaded to {os.path.abspath(Config.NLTK_DATA_PATH)}")
+    elif command == 'snapshot':
+        logger.info(f"NLP snapshot written to {build_snapshot(known_vocabulary())}")
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,252 @@
+"""
+Local shipping cost quotes for the CMS Chatbot Service
+Prices packages with the same formula as the backend's pricingUtils.js,
+(base cost + weight x cost per kg) x service multiplier, rounded half up,
+from a rate table that is reloaded when its JSON file changes.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mirrors PRICING_CONFIG in backend/utils/pricingUtils.js; used until a rate
+# table file exists
+DEFAULT_RATES = {
+    'currency': '₹',
+    'baseCost': 50,
+    'weightCostPerKg': 15,
+    'minWeight': 0.1,
+    'maxWeight': 50,
+    'serviceTypes': {
+        'Standard': {'multiplier': 1.0, 'deliveryDays': 3, 'displayName': 'Standard (3 days)',
+                     'icon': '📦', 'aliases': ['standard', 'normal', 'regular']},
+        'Express': {'multiplier': 1.5, 'deliveryDays': 1, 'displayName': 'Express (1 day)',
+                    'icon': '🚀', 'aliases': ['express', 'fast']},
+        'Same-day': {'multiplier': 2.0, 'deliveryDays': 0, 'displayName': 'Same-day',
+                     'icon': '⚡', 'aliases': ['same-day', 'urgent']}
+    }
+}
+
+# Multipliers to kilograms for the units extract_entities recognises
+UNIT_FACTORS = {
+    'kg': 1.0, 'kgs': 1.0, 'kilogram': 1.0, 'kilograms': 1.0,
+    'g': 0.001, 'gm': 0.001, 'gms': 0.001, 'gram': 0.001, 'grams': 0.001
+}
+
+_WEIGHT = re.compile(r'\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*', re.IGNORECASE)
+_NON_LETTERS = re.compile(r'[^a-z]')
+
+
+def to_kg(value, unit='kg'):
+    """Weight in kilograms of a number (or a string like '500g') in `unit`,
+    or None if it cannot be read"""
+    if isinstance(value, str):
+        match = _WEIGHT.fullmatch(value)
+        if match is None:
+            return None
+        value, unit = match.group(1), match.group(2) or unit
+    if isinstance(value, bool):
+        return None
+    factor = UNIT_FACTORS.get(str(unit or 'kg').strip().lower())
+    try:
+        weight = float(value)
+    except (TypeError, ValueError):
+        return None
+    if factor is None or not math.isfinite(weight):
+        return None
+    return weight * factor
+
+
+def service_key(name):
+    """Spelling-insensitive key of a service name ('Same day' -> 'sameday')"""
+    return _NON_LETTERS.sub('', str(name).lower())
+
+
+def round_half_up(value):
+    """JavaScript's Math.round for a non-negative number: x - floor(x) is
+    exact, unlike floor(x + 0.5), which can round up a value just below .5"""
+    whole = math.floor(value)
+    return int(whole) + 1 if value - whole >= 0.5 else int(whole)
+
+
+class RateTable:
+    """A parsed rate table with the per-service multipliers in an array.
+
+    A package of w kg by service i costs
+    round((base_cost + w * cost_per_kg) * multipliers[i]), evaluated in the
+    backend's order so the floating-point rounding matches it exactly;
+    pricing a batch is a couple of array operations. offsets and slopes
+    (base and per-kg cost per service) are for display only.
+    """
+
+    def __init__(self, rates):
+        self.currency = rates.get('currency', '₹')
+        self.base_cost = float(rates['baseCost'])
+        self.cost_per_kg = float(rates['weightCostPerKg'])
+        self.min_weight = float(rates['minWeight'])
+        self.max_weight = float(rates['maxWeight'])
+        self.services = []
+        self.details = []
+        self.index = {}
+        for name, service in rates['serviceTypes'].items():
+            multiplier = float(service['multiplier'])
+            self.index[service_key(name)] = len(self.services)
+            for alias in service.get('aliases', ()):
+                self.index.setdefault(service_key(alias), len(self.services))
+            self.services.append(name)
+            self.details.append({
+                'displayName': service.get('displayName', name),
+                'icon': service.get('icon', '📦'),
+                'deliveryDays': int(service['deliveryDays']),
+                'multiplier': multiplier
+            })
+        if not self.services:
+            raise ValueError('Rate table lists no service types')
+        self.multipliers = np.array([detail['multiplier'] for detail in self.details])
+        self.offsets = np.array([self.base_cost * detail['multiplier']
+                                 for detail in self.details])
+        self.slopes = np.array([self.cost_per_kg * detail['multiplier']
+                                for detail in self.details])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def service_index(self, name):
+        """Index of a service by name or alias, or None"""
+        return self.index.get(service_key(name)) if name else None
+
+    def valid_weight(self, weight_kg):
+        return weight_kg is not None and self.min_weight <= weight_kg <= self.max_weight
+
+    def cost(self, weight_kg, index):
+        # Same order of operations as calculateShippingCost in the backend
+        return round_half_up((self.base_cost + weight_kg * self.cost_per_kg)
+                             * self.details[index]['multiplier'])
+
+    def quote(self, weight_kg, index):
+        detail = self.details[index]
+        return {
+            'serviceType': self.services[index],
+            'weightKg': round(weight_kg, 3),
+            'cost': self.cost(weight_kg, index),
+            'deliveryDays': detail['deliveryDays']
+        }
+
+    def quote_all(self, weight_kg):
+        """Quotes for every service, in table order"""
+        return [self.quote(weight_kg, index) for index in range(len(self.services))]
+
+    def cost_batch(self, weights_kg, indexes):
+        """(costs, valid) arrays for parallel arrays of weights and service
+        indexes; rows with a NaN weight, an out-of-range weight or a
+        negative index are invalid and cost 0"""
+        weights_kg = np.asarray(weights_kg, dtype=np.float64)
+        indexes = np.asarray(indexes, dtype=np.int64)
+        known = indexes >= 0
+        safe = np.where(known, indexes, 0)
+        with np.errstate(invalid='ignore'):
+            valid = known & (weights_kg >= self.min_weight) & (weights_kg <= self.max_weight)
+        totals = ((self.base_cost + np.where(valid, weights_kg, 0) * self.cost_per_kg)
+                  * self.multipliers[safe])
+        costs = np.floor(totals)
+        costs += totals - costs >= 0.5
+        return np.where(valid, costs, 0).astype(np.int64), valid
+
+    def quote_batch(self, items):
+        """Quotes for a list of {weight, unit, serviceType} rows, in order;
+        rows that cannot be priced get {'error': ...} instead"""
+        weights = np.full(len(items), np.nan)
+        indexes = np.full(len(items), -1, dtype=np.int64)
+        for row, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            index = self.service_index(item.get('serviceType'))
+            weight_kg = to_kg(item.get('weight'), item.get('unit', 'kg'))
+            if index is not None:
+                indexes[row] = index
+                if weight_kg is not None:
+                    weights[row] = weight_kg
+        costs, valid = self.cost_batch(weights, indexes)
+        results = []
+        for index, weight_kg, cost, ok in zip(indexes.tolist(), weights.tolist(),
+                                              costs.tolist(), valid.tolist()):
+            if ok:
+                results.append({
+                    'serviceType': self.services[index],
+                    'weightKg': round(weight_kg, 3),
+                    'cost': cost,
+                    'deliveryDays': self.details[index]['deliveryDays']
+                })
+            elif index < 0:
+                results.append({'error': 'Invalid service type'})
+            else:
+                results.append({'error': f'Invalid weight (must be {self.min_weight:g} to '
+                                         f'{self.max_weight:g} kg)'})
+        return results
+
+
+class RateTableSource:
+    """The current RateTable, reloaded when its file changes.
+
+    The file's modification time is checked at most every `check_interval`
+    seconds, on access. A file that is missing leaves DEFAULT_RATES in use;
+    one that cannot be parsed is logged and the previous table kept.
+    """
+
+    def __init__(self, path, check_interval=5.0, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._table = RateTable(DEFAULT_RATES)
+        self._mtime = None
+        self._checked_at = None
+        self.reloads = 0
+        self.refresh()
+
+    def get(self):
+        now = self._clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            self.refresh(now)
+        return self._table
+
+    def refresh(self, now=None):
+        """Reload the table if the file changed since it was last read"""
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is checking; keep serving the current table
+        try:
+            self._checked_at = self._clock() if now is None else now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns if self.path else None
+            except OSError:
+                mtime = None
+            if mtime == self._mtime:
+                return
+            if mtime is None:
+                self._table = RateTable(DEFAULT_RATES)
+                self._mtime = None
+                logger.warning(f"Rate table {self.path} is missing; using the default rates")
+                return
+            try:
+                table = RateTable.load(self.path)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.error(f"Could not load rate table {self.path}, keeping the current "
+                             f"rates: {e}")
+                self._mtime = mtime
+                return
+            self._table = table
+            self._mtime = mtime
+            self.reloads += 1
+            logger.info(f"Loaded rate table {self.path} ({len(table.services)} services)")
+        finally:
+            self._lock.release()
@@ -0,0 +1,198 @@
+"""
+On-demand request profiling for the CMS Chatbot Service
+Profiles the next N requests (armed from the admin endpoint or a signal)
+or a sample of 1 in K requests with cProfile, aggregates the profiles and
+writes them as pstats files with a text summary. While nothing is armed or
+sampled, requests only check one attribute.
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    """The profiles of one selected request; a request may run several
+    chunks (e.g. on different threads), each profiled separately"""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.profiles = []
+
+    def run(self, function, *args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows only one)
+            return function(*args, **kwargs)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            self.profiles.append(profile)
+
+    def end(self):
+        self.profiler._collect(self.profiles)
+
+
+class RequestProfiler:
+    """Selects requests to profile and aggregates their profiles.
+
+    arm(n) profiles the next n requests and writes one file once the last
+    of them finishes. With `sample_every` K, 1 in K requests is profiled
+    and a file is written every `flush_every` profiled requests. Files go to
+    `directory` as profile-<time>-<pid>-<n>.pstats (load with pstats or
+    snakeviz) next to a .txt summary of the top functions.
+    """
+
+    def __init__(self, directory, sample_every=0, flush_every=100, keep_files=20):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.sample_every = sample_every
+        self.remaining = 0
+        self.active = sample_every > 0
+        self.profiled = 0
+        self.files = deque(maxlen=keep_files)
+        self._signalled = 0
+        self._seen = 0
+        self._in_flight = 0
+        self._stats = None
+        self._collected = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def arm(self, count):
+        """Profile the next `count` requests"""
+        with self._lock:
+            self.remaining = max(self.remaining, count)
+            self._update()
+
+    def set_sample_every(self, every):
+        """Profile 1 in `every` requests; 0 stops sampling"""
+        with self._lock:
+            self.sample_every = max(0, every)
+            self._update()
+
+    def _update(self):
+        self.active = bool(self.remaining or self.sample_every or self._signalled)
+
+    def _handle_signal(self, count):
+        # Runs between bytecodes of the main thread, which may hold the
+        # lock; leave the arming to the next begin()
+        self._signalled = count
+        self.active = True
+
+    def install_signal_handler(self, signame, count):
+        """Arm `count` requests when the process receives `signame` (e.g.
+        'SIGUSR2'); must run in the main thread"""
+        try:
+            signal.signal(getattr(signal, signame),
+                          lambda signum, frame: self._handle_signal(count))
+        except (AttributeError, ValueError, OSError) as e:
+            logger.warning(f"Profiling signal {signame} not installed: {e}")
+
+    def begin(self):
+        """A RequestProfile if this request is to be profiled, else None"""
+        with self._lock:
+            if self._signalled:
+                self.remaining = max(self.remaining, self._signalled)
+                self._signalled = 0
+            selected = False
+            if self.remaining:
+                self.remaining -= 1
+                selected = True
+            elif self.sample_every:
+                self._seen += 1
+                selected = self._seen % self.sample_every == 0
+            self._update()
+            if not selected:
+                return None
+            self._in_flight += 1
+        return RequestProfile(self)
+
+    def wrap(self, function):
+        """`function` profiled when begin() selects the call"""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.active:
+                return function(*args, **kwargs)
+            request_profile = self.begin()
+            if request_profile is None:
+                return function(*args, **kwargs)
+            try:
+                return request_profile.run(function, *args, **kwargs)
+            finally:
+                request_profile.end()
+        return wrapper
+
+    def _collect(self, profiles):
+        stats = pstats.Stats(*profiles) if profiles else None
+        with self._lock:
+            self._in_flight -= 1
+            self.profiled += 1
+            if stats is not None:
+                if self._stats is None:
+                    self._stats = stats
+                else:
+                    self._stats.add(stats)
+                self._collected += 1
+            batch_done = not self.remaining and not self._in_flight and not self.sample_every
+            taken = self._take() if batch_done or self._collected >= self.flush_every else None
+        if taken is not None:
+            self._write(*taken)
+
+    def flush(self):
+        """Write the profiles collected so far; returns the path or None"""
+        with self._lock:
+            taken = self._take()
+        return self._write(*taken) if taken is not None else None
+
+    def _take(self):
+        if self._stats is None:
+            return None
+        taken = (self._stats, self._collected, self._sequence + 1)
+        self._stats = None
+        self._collected = 0
+        self._sequence += 1
+        return taken
+
+    def _write(self, stats, requests, sequence):
+        # Outside the lock: requests keep being selected while this writes
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(self.directory, f'profile-{stamp}-{os.getpid()}-{sequence}')
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.sort_stats('cumulative').print_stats(40)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stats.dump_stats(path + '.pstats')
+            with open(path + '.txt', 'w', encoding='utf-8') as f:
+                f.write(f"{requests} profiled requests\n")
+                f.write(summary.getvalue())
+        except OSError as e:
+            logger.error(f"Could not write profile {path}: {e}")
+            return None
+        self.files.append(path + '.pstats')
+        logger.info(f"Wrote profile of {requests} requests to {path}.pstats")
+        return path + '.pstats'
+
+    def status(self):
+        with self._lock:
+            return {
+                'active': self.active,
+                'remaining': self.remaining + self._signalled,
+                'sampleEvery': self.sample_every,
+                'profiledRequests': self.profiled,
+                'unwrittenRequests': self._collected,
+                'files': list(self.files)
+            }
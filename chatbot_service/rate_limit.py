@@ -0,0 +1,125 @@
+"""
+Rate limiting and admission control for the CMS Chatbot Service
+Token buckets per client live in an anonymous shared memory map created at
+import, before the production launcher forks, so every worker process
+enforces the same budget. Admission control caps the work in flight in
+each process and sheds requests that already waited too long in a queue.
+"""
+
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+from hashlib import blake2b
+
+# key id, tokens, last refill (monotonic seconds, shared by all processes)
+_SLOT = struct.Struct('<Qdd')
+
+
+def _key_id(key):
+    return int.from_bytes(blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class RateLimiter:
+    """Token buckets keyed by client, shared between forked processes.
+
+    Buckets hold up to `burst` tokens and refill at `per_minute` tokens per
+    minute. They are stored in a fixed table of `slots` entries addressed by
+    a hash of the key, so a check is O(1) and memory is bounded: a key whose
+    slot was taken over by another key simply starts again with a full
+    bucket. Updates are serialised by `stripes` process-shared locks.
+    A `per_minute` of 0 disables the limiter.
+    """
+
+    def __init__(self, per_minute, burst=None, slots=65536, stripes=64, clock=time.monotonic):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.burst = float(burst if burst else per_minute)
+        self.slots = slots
+        self._clock = clock
+        self._memory = mmap.mmap(-1, _SLOT.size * slots)
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+
+    def allow(self, key, cost=1):
+        """Take `cost` tokens from `key`'s bucket.
+
+        Returns 0 if the request may proceed, otherwise the number of seconds
+        until enough tokens will have refilled.
+        """
+        if self.per_minute <= 0:
+            return 0
+        key_id = _key_id(key)
+        slot = key_id % self.slots
+        offset = slot * _SLOT.size
+        with self._locks[slot % len(self._locks)]:
+            now = self._clock()
+            stored, tokens, last = _SLOT.unpack_from(self._memory, offset)
+            if stored != key_id:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= cost:
+                _SLOT.pack_into(self._memory, offset, key_id, tokens - cost, now)
+                return 0
+            _SLOT.pack_into(self._memory, offset, key_id, tokens, now)
+        return (cost - tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-process limit on concurrently handled requests.
+
+    `acquire()` waits up to `max_wait` seconds for one of `max_in_flight`
+    slots (0 disables the limit), and `queue_wait()` reads how long a
+    request sat in the proxy's queue from an X-Request-Start header, so
+    requests that are already stale can be shed before doing any work.
+    """
+
+    def __init__(self, max_in_flight, max_wait=0.0, max_queue_wait=0.0):
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self.max_queue_wait = max_queue_wait
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight > 0 else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def acquire(self, blocking=True):
+        if self._slots is not None:
+            if blocking and self.max_wait > 0:
+                admitted = self._slots.acquire(timeout=self.max_wait)
+            else:
+                admitted = self._slots.acquire(blocking=False)
+            if not admitted:
+                return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @staticmethod
+    def queue_wait(header, now=None):
+        """Seconds since the X-Request-Start time `header`, or 0 if absent.
+
+        Accepts the usual "t=<epoch>" forms in seconds (nginx $msec),
+        milliseconds or microseconds.
+        """
+        if not header:
+            return 0.0
+        try:
+            started = float(header.strip().lstrip('t='))
+        except ValueError:
+            return 0.0
+        if started > 1e14:
+            started /= 1e6
+        elif started > 1e11:
+            started /= 1e3
+        return max(0.0, (time.time() if now is None else now) - started)
+
+    def stale(self, header):
+        """True if the request already queued longer than `max_queue_wait`"""
+        return self.max_queue_wait > 0 and self.queue_wait(header) > self.max_queue_wait
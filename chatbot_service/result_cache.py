@@ -0,0 +1,69 @@
+"""
+Whole-message result cache for the CMS Chatbot Service
+Remembers the intent, confidence and entities of recently seen messages so
+repeated inputs (quick replies above all) skip the NLP pipeline
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def cache_key(message):
+    """Normalise a message into its cache key.
+
+    Only trailing whitespace is dropped: case and leading whitespace change
+    the extracted entities or the '^'-anchored intent patterns, so they must
+    stay part of the key for cached results to equal computed ones.
+    """
+    return message.rstrip()
+
+
+class ResultCache:
+    """Thread-safe LRU cache of (intent, confidence, entities) per message"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = result
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def skip(self):
+        """Count a result that was not cached because it is message specific"""
+        with self._lock:
+            self.skipped += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'skipped': self.skipped,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,132 @@
+"""
+Compact per-session message history for the CMS Chatbot Service
+Messages are stored as slotted records in a fixed-size ring buffer, with
+intents and canned bot replies interned as small integer IDs and epoch
+timestamps, and are expanded back into API dicts only when read
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class Interner:
+    """Two-way table between strings and small integer IDs.
+
+    Values passed at construction (and, while `max_size` allows, new ones)
+    are stored once and referenced by index; anything else is kept as is,
+    so message specific text never grows the table.
+    """
+
+    def __init__(self, values=(), max_size=None):
+        self._values = []
+        self._ids = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self._add(value)
+        self.max_size = len(self._values) if max_size is None else max_size
+
+    def __len__(self):
+        return len(self._values)
+
+    def _add(self, value):
+        key = self._ids.get(value)
+        if key is None:
+            key = self._ids[value] = len(self._values)
+            self._values.append(value)
+        return key
+
+    def encode(self, value):
+        """Integer ID for `value`, or `value` itself if it is not interned"""
+        key = self._ids.get(value)
+        if key is not None:
+            return key
+        if len(self._values) >= self.max_size:
+            return value
+        with self._lock:
+            return self._add(value) if len(self._values) < self.max_size else value
+
+    def decode(self, key):
+        return self._values[key] if type(key) is int else key
+
+
+class MessageRecord:
+    """One user message and the bot's reply, as stored in a session"""
+
+    __slots__ = ('timestamp', 'user_message', 'intent', 'confidence', 'entities', 'bot_response')
+
+    def __init__(self, timestamp, user_message, intent, confidence, entities, bot_response):
+        self.timestamp = timestamp
+        self.user_message = user_message
+        self.intent = intent
+        self.confidence = confidence
+        self.entities = entities
+        self.bot_response = bot_response
+
+
+class MessageHistory:
+    """Ring buffer of the last `capacity` MessageRecords of a session.
+
+    Every message gets a sequence number (its position in the session since
+    it started, including messages that have since been overwritten), which
+    is what `page()` takes as its `before` cursor.
+    """
+
+    __slots__ = ('intents', 'responses', 'records', 'total')
+
+    def __init__(self, capacity, intents, responses):
+        self.intents = intents
+        self.responses = responses
+        self.records = deque(maxlen=capacity)
+        self.total = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, user_message, intent, confidence, entities, bot_response, timestamp):
+        """Store a message; returns the intent of the record it overwrote, if any"""
+        dropped = None
+        if len(self.records) == self.records.maxlen:
+            dropped = self.intents.decode(self.records[0].intent) if self.records else intent
+        self.records.append(MessageRecord(
+            timestamp, user_message, self.intents.encode(intent), confidence,
+            entities or None, self.responses.encode(bot_response)
+        ))
+        self.total += 1
+        return dropped
+
+    def last_timestamp(self):
+        """Epoch time of the newest message, or 0 for an empty history"""
+        records = self.records
+        return records[-1].timestamp if records else 0.0
+
+    def intent_names(self):
+        """Intents of the retained messages, oldest first"""
+        decode = self.intents.decode
+        return [decode(record.intent) for record in list(self.records)]
+
+    def page(self, limit=None, before=None):
+        """Return (messages, next_before) for the newest `limit` messages
+        with a sequence number below `before`, oldest first.
+
+        `next_before` is the cursor for the preceding page, or None when no
+        older retained messages remain.
+        """
+        records = list(self.records)
+        first = self.total - len(records)
+        end = len(records) if before is None else max(0, min(before - first, len(records)))
+        start = 0 if limit is None else max(0, end - max(limit, 0))
+        messages = [self.to_dict(record, first + index)
+                    for index, record in enumerate(records[start:end], start)]
+        return messages, (first + start if start > 0 else None)
+
+    def to_dict(self, record, sequence):
+        return {
+            'id': sequence,
+            'timestamp': datetime.fromtimestamp(record.timestamp).isoformat(),
+            'user_message': record.user_message,
+            'intent': self.intents.decode(record.intent),
+            'confidence': record.confidence,
+            'entities': record.entities or {},
+            'bot_response': self.responses.decode(record.bot_response)
+        }
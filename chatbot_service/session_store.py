@@ -0,0 +1,150 @@
+"""
+Bounded session storage for the CMS Chatbot Service
+In-memory LRU store with idle-timeout expiry, safe to share between the
+threads of a threaded WSGI server
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionStore:
+    """Thread-safe session store with an LRU size cap and a TTL.
+
+    Entries are kept in last-access order, so the least recently used session
+    is always at the front: evicting at the cap and expiring idle sessions are
+    both O(1) pops from the front. Expiry happens lazily on access and on
+    writes, and periodically from an optional background reaper thread.
+    """
+
+    def __init__(self, max_sessions, ttl_seconds, on_evict=None, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._clock = clock
+        self._data = OrderedDict()  # session_id -> [last_access, value]
+        self._lock = threading.RLock()
+        self._reaper = None
+        self._stop = threading.Event()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+    def _expired(self, entry, now):
+        return now - entry[0] >= self.ttl_seconds
+
+    def _remove(self, session_id):
+        entry = self._data.pop(session_id)
+        if self.on_evict:
+            self.on_evict(session_id, entry[1])
+
+    def get(self, session_id, default=None):
+        """Return the session and mark it as recently used"""
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return default
+            now = self._clock()
+            if self._expired(entry, now):
+                self._remove(session_id)
+                self.expirations += 1
+                return default
+            entry[0] = now
+            self._data.move_to_end(session_id)
+            return entry[1]
+
+    def peek(self, session_id, default=None):
+        """Return the session without refreshing its TTL or LRU position"""
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None or self._expired(entry, self._clock()):
+                return default
+            return entry[1]
+
+    def put(self, session_id, value):
+        """Insert or replace a session, evicting the LRU entry at the cap"""
+        with self._lock:
+            now = self._clock()
+            if session_id in self._data:
+                self._data[session_id] = [now, value]
+                self._data.move_to_end(session_id)
+                return
+            self._data[session_id] = [now, value]
+            self._expire(now, limit=2)
+            while len(self._data) > self.max_sessions:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def get_or_create(self, session_id, factory):
+        """Return the live session, creating it with factory() when missing"""
+        with self._lock:
+            value = self.get(session_id)
+            if value is None:
+                value = factory()
+                self.put(session_id, value)
+            return value
+
+    def delete(self, session_id):
+        """Remove a session; returns True if it existed"""
+        with self._lock:
+            if session_id not in self._data:
+                return False
+            self._remove(session_id)
+            return True
+
+    def _expire(self, now, limit=None):
+        removed = 0
+        while self._data and (limit is None or removed < limit):
+            session_id, entry = next(iter(self._data.items()))
+            if not self._expired(entry, now):
+                break
+            self._remove(session_id)
+            removed += 1
+        self.expirations += removed
+        return removed
+
+    def expire(self):
+        """Drop every session idle for longer than the TTL"""
+        with self._lock:
+            return self._expire(self._clock())
+
+    def items(self):
+        """Snapshot of the live (session_id, session) pairs"""
+        with self._lock:
+            now = self._clock()
+            return [(session_id, entry[1]) for session_id, entry in self._data.items()
+                    if not self._expired(entry, now)]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def start_reaper(self, interval):
+        """Expire idle sessions every `interval` seconds in a daemon thread"""
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._stop.clear()
+        self._reaper = threading.Thread(target=self._reap, args=(interval,),
+                                        name='session-reaper', daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self):
+        self._stop.set()
+
+    def _reap(self, interval):
+        while not self._stop.wait(interval):
+            self.expire()
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'max_sessions': self.max_sessions,
+            'ttl_seconds': self.ttl_seconds,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
@@ -31,23 +31,16 @@ def install_dependencies():
         sys.exit(1)
 
 def download_nltk_data():
-    """Download required NLTK data"""
+    """Download NLTK data into NLTK_DATA_PATH and build the NLP snapshot
+    
+    Only runs with --download-nltk (e.g. while building an image); the
+    service itself never downloads anything.
+    """
     try:
-        import nltk
+        import nlp
         logger.info("Downloading NLTK data...")
-        
-        # Download required datasets
-        datasets = ['punkt', 'stopwords', 'averaged_perceptron_tagger']
-        for dataset in datasets:
-            try:
-                nltk.data.find(f'tokenizers/{dataset}' if dataset == 'punkt' 
-                             else f'taggers/{dataset}' if dataset == 'averaged_perceptron_tagger'
-                             else f'corpora/{dataset}')
-                logger.info(f"NLTK dataset '{dataset}' already exists")
-            except LookupError:
-                logger.info(f"Downloading NLTK dataset: {dataset}")
-                nltk.download(dataset, quiet=True)
-        
+        nlp.download_resources()
+        logger.info(f"NLP snapshot written to {nlp.build_snapshot(nlp.known_vocabulary())}")
         logger.info("NLTK data ready")
         
     except ImportError:
@@ -57,6 +50,21 @@ def download_nltk_data():
         logger.error(f"Failed to download NLTK data: {e}")
         sys.exit(1)
 
+def check_nltk_data():
+    """Check that the NLTK data is available locally, without downloading"""
+    try:
+        import nlp
+        missing = nlp.missing_resources()
+    except ImportError:
+        logger.error("NLTK not installed. Please run: pip install nltk")
+        sys.exit(1)
+    
+    if missing:
+        logger.error(f"Missing NLTK data: {', '.join(missing)}. "
+                     f"Run: python start.py --download-nltk (or python nlp.py download)")
+        sys.exit(1)
+    logger.info("NLTK data available locally")
+
 def check_environment():
     """Check environment variables and configuration"""
     logger.info("Checking environment configuration...")
@@ -73,7 +81,7 @@ def check_environment():
         value = os.environ.get(var, default)
         logger.info(f"{var}: {value}")
 
-def start_service():
+def start_service(async_mode=False):
     """Start the chatbot service"""
     try:
         port = os.environ.get('PORT', 8000)
@@ -83,14 +91,119 @@ def start_service():
         logger.info(f"Debug mode: {debug}")
         os.environ['CMS_API_URL'] = os.environ.get('CMS_API_URL', 'http://localhost:5000')
         
+        if async_mode:
+            # Serve the ASGI app: backend calls no longer block the worker
+            import uvicorn
+            logger.info("Serving in async (ASGI) mode")
+            uvicorn.run('asgi_app:app', host='0.0.0.0', port=int(port),
+                        log_level='debug' if debug else 'info')
+            return
+        
         # Import and run the Flask app
-        from app import app
+        from app import app, install_profiling_signal, restore_sessions, warm_up
+        warm_up()
+        restore_sessions()
+        install_profiling_signal()
         app.run(host='0.0.0.0', port=int(port), debug=debug)
         
     except Exception as e:
         logger.error(f"Failed to start service: {e}")
         sys.exit(1)
 
+def load_preloaded_app(async_mode=False):
+    """Import the app and warm its NLP state once, in the gunicorn master"""
+    import gc
+    import app as chatbot
+    
+    chatbot.warm_up()
+    chatbot.restore_sessions()
+    application = chatbot.app
+    if async_mode:
+        from asgi_app import app as application
+    
+    # Keep the preloaded objects out of the collector so its bookkeeping
+    # does not dirty the pages shared copy-on-write with the workers
+    gc.freeze()
+    return application
+
+def post_fork(server, worker):
+    """Restart the per-process background threads in each new worker"""
+    import app as chatbot
+    chatbot.start_background_tasks()
+
+def post_worker_init(worker):
+    """Install the profiling signal handler once the worker has reset its
+    signals (gunicorn leaves SIGUSR2 at its default, terminating, action)"""
+    import app as chatbot
+    chatbot.install_profiling_signal()
+
+def worker_class(async_mode, threads):
+    """gunicorn worker class for the production service
+    
+    Sync workers only heartbeat between requests and serve one at a time,
+    so /api/tracking/<id>/subscribe refuses streams on them (503); threaded
+    (gthread) workers serve them, and ASGI workers serve many per worker.
+    """
+    if async_mode:
+        return 'uvicorn.workers.UvicornWorker'
+    return 'gthread' if threads > 1 else 'sync'
+
+def gunicorn_options(async_mode=False):
+    """gunicorn settings for start_production_service"""
+    from config import Config
+    
+    return {
+        'bind': Config.BIND,
+        'workers': Config.WORKERS,
+        'worker_class': worker_class(async_mode, Config.WORKER_THREADS),
+        'threads': Config.WORKER_THREADS,
+        'timeout': Config.WORKER_TIMEOUT,
+        'graceful_timeout': Config.GRACEFUL_TIMEOUT,
+        'max_requests': Config.MAX_REQUESTS,
+        'max_requests_jitter': Config.MAX_REQUESTS_JITTER,
+        'preload_app': True,
+        'post_fork': post_fork,
+        'post_worker_init': post_worker_init,
+        'loglevel': Config.LOG_LEVEL.lower(),
+    }
+
+def start_production_service(async_mode=False):
+    """Start the service as a pre-forking multi-worker gunicorn server
+    
+    NLTK resources, stopwords, the stemmer and the intent tables are loaded
+    once in the master and shared copy-on-write with the forked workers.
+    Workers are recycled after MAX_REQUESTS (+ jitter) requests. Send HUP to
+    the master to gracefully replace the workers; since the app is preloaded,
+    new code is picked up with USR2 followed by TERM to the old master.
+    Sessions live in each worker's memory.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+        from config import Config
+        
+        os.environ['CMS_API_URL'] = os.environ.get('CMS_API_URL', 'http://localhost:5000')
+        
+        options = gunicorn_options(async_mode)
+        if options['worker_class'] == 'sync':
+            logger.info("Sync workers refuse tracking subscriptions; "
+                        "use --async (or WORKER_THREADS > 1) to serve them")
+        
+        class ChatbotApplication(BaseApplication):
+            def load_config(self):
+                for key, value in options.items():
+                    self.cfg.set(key, value)
+            
+            def load(self):
+                return load_preloaded_app(async_mode)
+        
+        logger.info(f"Starting CMS Chatbot Service on {Config.BIND} "
+                    f"with {Config.WORKERS} workers")
+        ChatbotApplication().run()
+        
+    except Exception as e:
+        logger.error(f"Failed to start service: {e}")
+        sys.exit(1)
+
 def main():
     """Main startup function"""
     print("CMS Chatbot Service Startup")
@@ -103,8 +216,10 @@ def main():
     if '--install' in sys.argv or not os.path.exists('requirements.txt'):
         install_dependencies()
     
-    # Download NLTK data
-    download_nltk_data()
+    # Fetch NLTK data only when asked; otherwise just verify it offline
+    if '--download-nltk' in sys.argv:
+        download_nltk_data()
+    check_nltk_data()
     
     # Check environment
     check_environment()
@@ -116,7 +231,11 @@ def main():
     print("   API docs: http://localhost:8000/api/")
     print()
     
-    start_service()
+    async_mode = '--async' in sys.argv
+    if '--production' in sys.argv:
+        start_production_service(async_mode=async_mode)
+    else:
+        start_service(async_mode=async_mode)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Tracking subscriptions for the CMS Chatbot Service
+Followers of a parcel share one upstream poller per tracking ID; each
+subscriber gets a queue that receives a status only when the status or
+location changes, so backend load grows with unique IDs, not subscribers
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+
+from tracking_client import UNAVAILABLE_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a parcel no longer changes; the feed then ends
+TERMINAL_STATUSES = frozenset(['Delivered', 'Cancelled', 'Returned'])
+
+# Put on a subscriber's queue after the last status of a finished feed
+END = None
+
+
+class _Feed:
+    """Shared state of the poller for one tracking ID"""
+
+    __slots__ = ('subscribers', 'last', 'last_key', 'done', 'stop', 'poller')
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last = None
+        self.last_key = None
+        self.done = False
+        self.stop = None
+        self.poller = None
+
+
+class BaseSubscriptionHub:
+    """Feed bookkeeping and change detection shared by both hubs.
+
+    A feed is created by its first subscriber and torn down (stopping its
+    poller) when the last one leaves. Backend errors are not published:
+    subscribers keep the last known status until the next successful poll.
+    """
+
+    def __init__(self, client, interval=15, max_subscribers=100):
+        self.client = client
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._feeds = {}
+        self._subscribers = 0
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(['polls', 'changes', 'rejected'], 0)
+
+    def _update(self, feed, result):
+        """Record a poll result; returns the subscribers to send it to"""
+        if not result['found'] and result.get('message') == UNAVAILABLE_MESSAGE:
+            return []
+        key = (result['found'], result.get('status'), result.get('location'))
+        with self._lock:
+            self._stats['polls'] += 1
+            if key == feed.last_key:
+                return []
+            feed.last_key = key
+            feed.last = result
+            feed.done = not result['found'] or result.get('status') in TERMINAL_STATUSES
+            self._stats['changes'] += 1
+            return list(feed.subscribers)
+
+    def _attach(self, tracking_id, subscriber, put):
+        """Add a subscriber, handing it the current status through `put`.
+
+        Returns (feed, created), or (None, False) when the hub is full.
+        """
+        with self._lock:
+            if self._subscribers >= self.max_subscribers:
+                self._stats['rejected'] += 1
+                return None, False
+            feed = self._feeds.get(tracking_id)
+            created = feed is None
+            if created:
+                feed = self._feeds[tracking_id] = _Feed()
+            elif feed.last is not None:
+                # Late subscribers start from the current status
+                put(feed.last)
+                if feed.done:
+                    put(END)
+            feed.subscribers.add(subscriber)
+            self._subscribers += 1
+            return feed, created
+
+    def _detach(self, tracking_id, subscriber):
+        """Remove a subscriber; returns the feed if it has no subscribers left"""
+        with self._lock:
+            feed = self._feeds.get(tracking_id)
+            if feed is None or subscriber not in feed.subscribers:
+                return None
+            feed.subscribers.discard(subscriber)
+            self._subscribers -= 1
+            if feed.subscribers:
+                return None
+            del self._feeds[tracking_id]
+            return feed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['feeds'] = len(self._feeds)
+            stats['subscribers'] = self._subscribers
+        return stats
+
+
+class SubscriptionHub(BaseSubscriptionHub):
+    """Thread-based hub for the WSGI app; subscribers are queue.Queues"""
+
+    def subscribe(self, tracking_id):
+        """Return a queue of status results for `tracking_id`, or None if the
+        hub is at max_subscribers"""
+        subscriber = queue.Queue()
+        feed, created = self._attach(tracking_id, subscriber, subscriber.put)
+        if feed is None:
+            return None
+        if created:
+            feed.stop = threading.Event()
+            feed.poller = threading.Thread(target=self._poll, args=(tracking_id, feed),
+                                           name=f'track-{tracking_id}', daemon=True)
+            feed.poller.start()
+        return subscriber
+
+    def unsubscribe(self, tracking_id, subscriber):
+        feed = self._detach(tracking_id, subscriber)
+        if feed is not None:
+            feed.stop.set()
+
+    def _poll(self, tracking_id, feed):
+        while not feed.stop.is_set():
+            result = self.client.refresh(tracking_id)
+            for subscriber in self._update(feed, result):
+                subscriber.put(result)
+                if feed.done:
+                    subscriber.put(END)
+            if feed.done:
+                return
+            feed.stop.wait(self.interval)
+
+
+class AsyncSubscriptionHub(BaseSubscriptionHub):
+    """Task-based hub for the ASGI app; subscribers are asyncio.Queues.
+
+    Must be used from a single event loop.
+    """
+
+    def subscribe(self, tracking_id):
+        subscriber = asyncio.Queue()
+        feed, created = self._attach(tracking_id, subscriber, subscriber.put_nowait)
+        if feed is None:
+            return None
+        if created:
+            feed.poller = asyncio.get_running_loop().create_task(self._poll(tracking_id, feed))
+        return subscriber
+
+    def unsubscribe(self, tracking_id, subscriber):
+        feed = self._detach(tracking_id, subscriber)
+        if feed is not None and feed.poller is not None:
+            feed.poller.cancel()
+
+    async def _poll(self, tracking_id, feed):
+        while True:
+            result = await self.client.refresh(tracking_id)
+            for subscriber in self._update(feed, result):
+                subscriber.put_nowait(result)
+                if feed.done:
+                    subscriber.put_nowait(END)
+            if feed.done:
+                return
+            await asyncio.sleep(self.interval)
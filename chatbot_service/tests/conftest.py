@@ -0,0 +1,13 @@
+"""
+Test setup for the CMS Chatbot Service
+The service modules are flat files in chatbot_service/; importing app must
+not open the event log or log every message.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('EVENT_LOG_PATH', '')
+os.environ.setdefault('LOG_MESSAGES', 'false')
@@ -0,0 +1,95 @@
+"""
+Batch processing against the per-message path: analyze_batch and
+extract_entities_bulk must give exactly what analyze_message and
+extract_entities give one message at a time, in input order
+"""
+
+import pytest
+
+import nlp
+from batch_scoring import BatchIntentScorer
+from benchmarks import corpus
+from benchmarks.bench_preprocess import REGRESSION_CORPUS
+from benchmarks.stub_backend import StubBackend, make_package
+from intent_matcher import IntentMatcher
+from result_cache import ResultCache
+
+MESSAGES = REGRESSION_CORPUS + [message for message, _ in corpus.generate(500, seed=13)]
+
+# Entities next to the separator between joined texts, or none at all
+EDGE_CASES = [
+    '',
+    '9876543210',
+    'call +91 98765 43210',
+    'CMS000001',
+    '5kg',
+    'mail a@example.com',
+    '-',
+    ' ',
+    'express 2 kg to CMS000002 and 9876543210',
+]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """The app with result caching off, so both paths really run"""
+    import app
+
+    monkeypatch.setattr(app, 'result_cache', ResultCache(0))
+    return app
+
+
+def test_analyze_batch_matches_analyze_message(app):
+    messages = MESSAGES + EDGE_CASES + MESSAGES[:20]
+    assert app.analyze_batch(messages) == [app.analyze_message(message) for message in messages]
+
+
+def test_batch_scorer_matches_the_matcher(app):
+    texts = [message.lower() for message in MESSAGES]
+    stemmed = [app.preprocess_text(message)[1] for message in MESSAGES]
+    assert app.get_batch_scorer().classify(texts, stemmed) == \
+        [app.intent_matcher.classify(text, stems) for text, stems in zip(texts, stemmed)]
+
+
+def test_batch_scores_match_the_matcher_below_the_thresholds(app, monkeypatch):
+    """With every threshold at 0 each intent's score is compared, not just
+    the ones clearing the shipped thresholds"""
+    for config in app.INTENT_PATTERNS.values():
+        monkeypatch.setitem(config, 'confidence_threshold', 0.0)
+    matcher = IntentMatcher(app.INTENT_PATTERNS, nlp.stem)
+    texts = [message.lower() for message in MESSAGES]
+    stemmed = [app.preprocess_text(message)[1] for message in MESSAGES]
+    scores = BatchIntentScorer(matcher).scores(texts, stemmed)
+    for row, (text, stems) in enumerate(zip(texts, stemmed)):
+        assert dict(zip(matcher.intents, scores[row].tolist())) == matcher.score(text, stems)
+    assert BatchIntentScorer(matcher).classify(texts, stemmed) == \
+        [matcher.classify(text, stems) for text, stems in zip(texts, stemmed)]
+
+
+@pytest.mark.parametrize('texts', [
+    MESSAGES + EDGE_CASES,
+    EDGE_CASES + EDGE_CASES[::-1],
+    ['9876543210'] * 5,
+    ['CMS000001 has a \x00 in it', 'CMS000002'],
+    [],
+])
+def test_extract_entities_bulk_matches_extract_entities(app, texts):
+    assert app.extract_entities_bulk(texts) == [app.extract_entities(text) for text in texts]
+
+
+def test_batch_endpoint_matches_single_requests(app, monkeypatch):
+    monkeypatch.setattr(app.rate_limiter, 'per_minute', 0)
+    monkeypatch.setattr(app.tracking_limiter, 'per_minute', 0)
+    items = [{'message': message, 'sessionId': f'batch_{index % 7}'}
+             for index, message in enumerate(MESSAGES[:200])]
+    packages = {f'CMS{i:06d}': make_package(f'CMS{i:06d}') for i in range(1000)}
+    with StubBackend(packages=packages) as stub:
+        monkeypatch.setattr(app.tracking_client, 'base_url', stub.url)
+        client = app.app.test_client()
+        single = [client.post('/api/process', json=item).get_json() for item in items]
+        batched = client.post('/api/process/batch', json={'items': items}).get_json()['results']
+
+    assert len(batched) == len(items)
+    for one, many in zip(single, batched):
+        assert (many['intent'], many['confidence'], many['entities']) == \
+            (one['intent'], one['confidence'], one['entities'])
@@ -0,0 +1,84 @@
+"""
+Event log retention: the writer thread deletes events older than the
+retention window, on startup and then every prune_interval seconds
+"""
+
+import time
+
+import event_log as events
+
+HOUR = 3600
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def record(log, session_id, timestamp):
+    log.record_message(session_id, timestamp, 'where is CMS000001', 'track_package', 0.9,
+                       {'tracking_numbers': ['CMS000001']}, 'On its way', {})
+
+
+def sessions(path):
+    return [session_id for _, _, session_id, *_ in events.EventLog(path).replay()]
+
+
+def test_expired_events_are_pruned_at_startup(tmp_path):
+    path = str(tmp_path / 'events.db')
+    clock = FakeClock()
+    log = events.EventLog(path)
+    log.start()
+    for hours_ago in (50, 30, 2, 1):
+        record(log, f'{hours_ago}h', clock() - hours_ago * HOUR)
+    log.close()
+
+    log = events.EventLog(path, retention=24 * HOUR, prune_interval=60, clock=clock)
+    log.start()
+    wait_for(lambda: log.stats()['pruned'] == 2)
+    log.close()
+    assert sessions(path) == ['2h', '1h']
+
+
+def test_writer_prunes_periodically(tmp_path):
+    path = str(tmp_path / 'events.db')
+    clock = FakeClock()
+    log = events.EventLog(path, retention=24 * HOUR, prune_interval=0.05, clock=clock)
+    log.start()
+    for index in range(10):
+        record(log, f'early{index}', clock())
+    log.flush()
+    clock.advance(12 * HOUR)
+    record(log, 'later', clock())
+    log.flush()
+    time.sleep(0.2)
+    assert log.stats()['pruned'] == 0
+
+    # The early events leave the window while the log sits idle
+    clock.advance(13 * HOUR)
+    wait_for(lambda: log.stats()['pruned'] == 10)
+    log.close()
+    assert sessions(path) == ['later']
+
+
+def test_no_retention_keeps_everything(tmp_path):
+    path = str(tmp_path / 'events.db')
+    log = events.EventLog(path)
+    log.start()
+    record(log, 'old', time.time() - 1000 * HOUR)
+    log.close()
+    assert sessions(path) == ['old']
+    assert log.stats()['pruned'] == 0
@@ -0,0 +1,39 @@
+"""
+Tracking ID suggestions stay within their session and are never a guess
+"""
+
+from fuzzy import ScopedFuzzyIndex
+
+
+def test_suggestions_come_only_from_the_same_scope():
+    index = ScopedFuzzyIndex(max_scopes=10)
+    index.add('owner', 'CMS000123')
+    assert index.best('owner', 'CMS000124') == 'CMS000123'
+    assert index.best('other', 'CMS000124') is None
+
+
+def test_ties_are_not_suggested():
+    index = ScopedFuzzyIndex(max_scopes=10)
+    for number in range(1, 5):
+        index.add('owner', f'CMS00000{number}')
+    assert index.best('owner', 'CMS000005') is None
+
+
+def test_known_term_is_not_suggested_for_itself():
+    index = ScopedFuzzyIndex(max_scopes=10)
+    index.add('owner', 'CMS000123')
+    assert index.best('owner', 'CMS000123') is None
+
+
+def test_scopes_and_terms_are_bounded():
+    index = ScopedFuzzyIndex(max_scopes=2, terms_per_scope=1)
+    index.add('first', 'CMS000123')
+    index.add('first', 'CMS000456')
+    assert index.best('first', 'CMS000124') is None
+    assert index.best('first', 'CMS000457') == 'CMS000456'
+    index.add('second', 'CMS000123')
+    index.add('third', 'CMS000123')
+    assert len(index) == 2
+    assert index.best('first', 'CMS000457') is None
+    index.discard_scope('third')
+    assert index.best('third', 'CMS000124') is None
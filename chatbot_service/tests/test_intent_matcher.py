@@ -0,0 +1,58 @@
+"""
+IntentMatcher against the per-intent scoring loop classify_intent used
+before it (kept in benchmarks/bench_intent_matcher.py): scores must be
+identical, not just close
+"""
+
+import pytest
+
+import nlp
+from app import INTENT_PATTERNS, intent_matcher, preprocess_text
+from benchmarks import corpus
+from benchmarks.bench_intent_matcher import compiled_scores, legacy_scores
+from benchmarks.bench_preprocess import REGRESSION_CORPUS
+from intent_matcher import IntentMatcher
+
+MESSAGES = REGRESSION_CORPUS + [message for message, _ in corpus.generate(500, seed=11)]
+
+
+def legacy_classify(text):
+    """The reference loop's choice: the first best-scoring intent"""
+    scores = legacy_scores(text)
+    if not scores:
+        return 'unknown', 0.0
+    best = max(scores, key=scores.get)
+    return best, scores[best]
+
+
+@pytest.fixture
+def unthresholded(monkeypatch):
+    """A matcher, and the reference loop, that report every intent's score"""
+    for config in INTENT_PATTERNS.values():
+        monkeypatch.setitem(config, 'confidence_threshold', 0.0)
+    return IntentMatcher(INTENT_PATTERNS, nlp.stem)
+
+
+def test_scores_match_the_reference_loop():
+    mismatches = [(message, legacy_scores(message), compiled_scores(message))
+                  for message in MESSAGES if legacy_scores(message) != compiled_scores(message)]
+    assert not mismatches
+
+
+def test_every_intent_score_matches_the_reference_loop(unthresholded):
+    mismatches = []
+    for message in MESSAGES:
+        expected = legacy_scores(message)
+        actual = unthresholded.score(message.lower(), preprocess_text(message)[1])
+        if actual != expected:
+            mismatches.append((message, expected, actual))
+    assert not mismatches
+    # The comparison covers real hits, not just zeros
+    assert sum(any(legacy_scores(message).values()) for message in MESSAGES) > len(MESSAGES) // 2
+
+
+def test_classification_matches_the_reference_loop():
+    for message in MESSAGES:
+        _, stemmed_tokens = preprocess_text(message)
+        assert intent_matcher.classify(message.lower(), stemmed_tokens) == \
+            legacy_classify(message), message
@@ -0,0 +1,33 @@
+"""
+preprocess_text (regex fast path, memoized stems) against the original
+punkt tokenizer and unmemoized stemmer kept in benchmarks/bench_preprocess.py:
+tokens, intents and entities must not change
+"""
+
+import nlp
+from app import preprocess_text
+from benchmarks import corpus
+from benchmarks.bench_preprocess import REGRESSION_CORPUS, legacy_preprocess, pipeline
+
+MESSAGES = REGRESSION_CORPUS + [message for message, _ in corpus.generate(500, seed=12)] + [
+    "Don't ship it, it's broken",
+    "WHERE IS MY PARCEL",
+    "tab\tseparated\nlines",
+    "café délivery",
+    "price: $12.50 (approx.)",
+]
+
+
+def test_pipeline_matches_the_original_tokenizer():
+    changed = [(message, pipeline(legacy_preprocess, message), pipeline(preprocess_text, message))
+               for message in MESSAGES
+               if pipeline(legacy_preprocess, message) != pipeline(preprocess_text, message)]
+    assert not changed
+
+
+def test_memoized_stems_match_the_stemmer():
+    stemmer = nlp.get_stemmer()
+    for message in MESSAGES:
+        tokens, stemmed_tokens = preprocess_text(message)
+        assert stemmed_tokens == [stemmer.stem(token) for token in tokens]
+    assert nlp.stem.cache_info().currsize <= nlp.stem.cache_info().maxsize
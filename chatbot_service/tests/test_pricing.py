@@ -0,0 +1,67 @@
+"""
+Local quotes must match the backend's calculateShippingCost exactly
+"""
+
+import json
+import math
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from pricing import DEFAULT_RATES, RateTable
+
+PRICING_UTILS = os.path.join(os.path.dirname(__file__), '..', '..', 'backend', 'utils',
+                             'pricingUtils.js')
+
+# 0.1 to 50 kg in 1 g steps
+WEIGHTS = [grams / 1000 for grams in range(100, 50001)]
+
+
+def js_cost(weight, multiplier, rates=DEFAULT_RATES):
+    """calculateShippingCost evaluated as JavaScript does: the same double
+    operations in the same order, then Math.round (halves up)"""
+    total = (rates['baseCost'] + weight * rates['weightCostPerKg']) * multiplier
+    whole = math.floor(total)
+    return int(whole) + (1 if total - whole >= 0.5 else 0)
+
+
+@pytest.fixture(scope='module')
+def table():
+    return RateTable(DEFAULT_RATES)
+
+
+def test_cost_matches_javascript_reference(table):
+    for index, detail in enumerate(table.details):
+        expected = [js_cost(weight, detail['multiplier']) for weight in WEIGHTS]
+        assert [table.cost(weight, index) for weight in WEIGHTS] == expected
+        costs, valid = table.cost_batch(WEIGHTS, [index] * len(WEIGHTS))
+        assert valid.all()
+        assert costs.tolist() == expected
+
+
+def test_weights_where_precomputed_coefficients_round_differently(table):
+    express = table.service_index('Express')
+    assert table.cost(17.4, express) == 467
+    assert table.cost(19.4, express) == 512
+    costs, _ = table.cost_batch([17.4, 19.4], [express, express])
+    assert costs.tolist() == [467, 512]
+
+
+@pytest.mark.skipif(shutil.which('node') is None or not os.path.exists(PRICING_UTILS),
+                    reason='needs node and backend/utils/pricingUtils.js')
+def test_cost_matches_backend(table):
+    script = (f"const {{calculateShippingCost}} = require({json.dumps(os.path.abspath(PRICING_UTILS))});"
+              f"const services = {json.dumps(table.services)};"
+              "const costs = [];"
+              "for (let grams = 100; grams <= 50000; grams++)"
+              "  for (const service of services) costs.push(calculateShippingCost(grams / 1000, service));"
+              "console.log(JSON.stringify(costs));")
+    backend = json.loads(subprocess.run(['node', '-e', script], capture_output=True, text=True,
+                                        check=True, timeout=60).stdout)
+    weights = np.repeat(WEIGHTS, len(table.services))
+    indexes = np.tile(np.arange(len(table.services)), len(WEIGHTS))
+    costs, _ = table.cost_batch(weights, indexes)
+    assert costs.tolist() == backend
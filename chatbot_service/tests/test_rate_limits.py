@@ -0,0 +1,87 @@
+"""
+Tracking budget: every tracking ID a message looks up takes one token, in
+/api/process, /api/process/batch and the ASGI app alike
+"""
+
+import pytest
+
+from benchmarks.load_async import TRACK_MESSAGE
+from benchmarks.stub_backend import StubBackend, make_package
+from config import Config
+from rate_limit import RateLimiter
+
+IDS = [f'CMS{i:06d}' for i in range(1, 11)]
+
+
+def message(ids):
+    return {'message': TRACK_MESSAGE.format(' '.join(ids)), 'sessionId': 'budget'}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """The Flask app with a frozen tracking budget of 10 and a stub backend"""
+    import app
+
+    limiter = RateLimiter(10, 10, slots=1024, clock=FakeClock())
+    monkeypatch.setattr(app, 'tracking_limiter', limiter)
+    monkeypatch.setattr(app.rate_limiter, 'per_minute', 0)
+    with StubBackend(packages={i: make_package(i) for i in IDS}) as stub:
+        monkeypatch.setattr(app.tracking_client, 'base_url', stub.url)
+        yield app
+
+
+def tokens_left(limiter):
+    """Tokens in the 'budget' bucket, found by draining it"""
+    left = 0
+    while not limiter.allow('budget'):
+        left += 1
+    return left
+
+
+def test_burst_holds_a_full_message():
+    assert Config.TRACKING_RATE_LIMIT_BURST >= Config.TRACKING_MAX_IDS_PER_MESSAGE
+
+
+def test_ten_id_message_takes_ten_tokens(app):
+    intent, _, entities = app.analyze_message(message(IDS)['message'])
+    assert len(app.tracking_lookup_ids(intent, entities)) == 10
+    client = app.app.test_client()
+    assert client.post('/api/process', json=message(IDS)).status_code == 200
+    response = client.post('/api/process', json=message(IDS[:1]))
+    assert response.status_code == 429
+    assert response.get_json()['reason'] == 'tracking_rate_limited'
+
+
+def test_each_id_is_charged(app):
+    client = app.app.test_client()
+    assert client.post('/api/process', json=message(IDS[:3])).status_code == 200
+    assert tokens_left(app.tracking_limiter) == 7
+
+
+def test_batch_items_are_charged_per_id(app):
+    response = app.app.test_client().post('/api/process/batch', json={
+        'items': [message(IDS[:4]), message(IDS[4:8]), message(IDS[:3])]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result.get('reason') for result in results] == [None, None, 'tracking_rate_limited']
+    assert tokens_left(app.tracking_limiter) == 2
+
+
+def test_asgi_message_takes_one_token_per_id(app, monkeypatch):
+    from starlette.testclient import TestClient
+
+    import asgi_app
+
+    monkeypatch.setattr(asgi_app, 'tracking_limiter', app.tracking_limiter)
+    monkeypatch.setattr(asgi_app.tracking_client, 'base_url', app.tracking_client.base_url)
+    with TestClient(asgi_app.app) as client:
+        assert client.post('/api/process', json=message(IDS[:6])).status_code == 200
+    assert tokens_left(app.tracking_limiter) == 4
@@ -0,0 +1,47 @@
+"""
+Production launcher settings: the gunicorn worker class decides whether
+tracking subscription streams can be served
+"""
+
+import pytest
+from gunicorn.config import Config as GunicornConfig
+
+import start
+from config import Config
+
+
+def loaded(options):
+    """gunicorn's own view of the launcher options"""
+    config = GunicornConfig()
+    for key, value in options.items():
+        config.set(key, value)
+    return config
+
+
+@pytest.mark.parametrize('async_mode, threads, expected', [
+    (False, 1, 'sync'),
+    (False, 4, 'gthread'),
+    (True, 1, 'uvicorn.workers.UvicornWorker'),
+    (True, 4, 'uvicorn.workers.UvicornWorker'),
+])
+def test_worker_class(monkeypatch, async_mode, threads, expected):
+    monkeypatch.setattr(Config, 'WORKER_THREADS', threads)
+    options = start.gunicorn_options(async_mode)
+    assert options['worker_class'] == expected
+    config = loaded(options)
+    assert config.worker_class_str == expected
+    assert config.threads == threads
+
+
+def test_sync_workers_are_single_threaded_and_refuse_streams(monkeypatch):
+    """A sync worker would hold a stream past WORKER_TIMEOUT; the app sees
+    it as wsgi.multithread False and answers 503 instead"""
+    import app
+
+    monkeypatch.setattr(Config, 'WORKER_THREADS', 1)
+    monkeypatch.setattr(app.tracking_limiter, 'per_minute', 0)
+    config = loaded(start.gunicorn_options(False))
+    assert config.worker_class.__name__ == 'SyncWorker'
+    response = app.app.test_client().get('/api/tracking/CMS000001/subscribe',
+                                         environ_overrides={'wsgi.multithread': False})
+    assert response.status_code == 503
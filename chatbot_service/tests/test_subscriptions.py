@@ -0,0 +1,185 @@
+"""
+Tracking subscriptions against a stub backend whose packages move through
+their journey over time: one poller per ID, fan-out only on changes, an end
+once a parcel is delivered or unknown, and feeds torn down on disconnect
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from benchmarks.stub_backend import JOURNEY, StubBackend, make_package
+from subscriptions import END, AsyncSubscriptionHub, SubscriptionHub
+from tracking_client import AsyncTrackingClient, TrackingClient
+
+KNOWN = 'CMS000001'
+UNKNOWN = 'CMS999999'
+ADVANCE_EVERY = 0.15
+POLL_INTERVAL = 0.03
+
+STATUSES = [status for status, _ in JOURNEY]
+
+# As under gthread workers or the development server
+THREADED = {'wsgi.multithread': True}
+
+
+@pytest.fixture
+def stub():
+    with StubBackend(packages={KNOWN: make_package(KNOWN)},
+                     advance_every=ADVANCE_EVERY) as backend:
+        yield backend
+
+
+@pytest.fixture
+def app(stub, monkeypatch):
+    """The Flask app, tracking on `stub` without rate limits"""
+    import app
+
+    monkeypatch.setattr(app.tracking_limiter, 'per_minute', 0)
+    monkeypatch.setattr(app.tracking_client, 'base_url', stub.url)
+    # A hub of its own: importing asgi_app installs its async hub in app
+    monkeypatch.setattr(app, 'tracking_hub', SubscriptionHub(app.tracking_client, POLL_INTERVAL))
+    return app
+
+
+def drain(subscriber, timeout=5):
+    """Results put on a queue.Queue up to END"""
+    results = []
+    deadline = time.monotonic() + timeout
+    while True:
+        result = subscriber.get(timeout=max(0, deadline - time.monotonic()))
+        if result is END:
+            return results
+        results.append(result)
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_subscribers_get_each_change_once_then_end(stub):
+    hub = SubscriptionHub(TrackingClient(stub.url), interval=POLL_INTERVAL)
+    stub.started = time.monotonic()
+    first = hub.subscribe(KNOWN)
+    second = hub.subscribe(KNOWN)
+
+    for subscriber in (first, second):
+        assert [result['status'] for result in drain(subscriber)] == STATUSES
+    stats = hub.stats()
+    assert stats['changes'] == len(JOURNEY)
+    # Several polls per status, yet only changes were sent
+    assert stats['polls'] > stats['changes']
+    # One poller for both subscribers
+    assert stub.requests[KNOWN] == stats['polls']
+
+
+def test_late_subscriber_starts_from_the_current_status(stub):
+    hub = SubscriptionHub(TrackingClient(stub.url), interval=POLL_INTERVAL)
+    stub.started = time.monotonic()
+    first = hub.subscribe(KNOWN)
+    assert first.get(timeout=2)['status'] == STATUSES[0]
+    late = hub.subscribe(KNOWN)
+    statuses = [result['status'] for result in drain(late)]
+    assert statuses[0] in STATUSES[:2]
+    assert statuses[-1] == STATUSES[-1]
+    assert statuses == sorted(statuses, key=STATUSES.index)
+
+
+def test_unknown_id_ends_after_one_event(stub):
+    hub = SubscriptionHub(TrackingClient(stub.url), interval=POLL_INTERVAL)
+    results = drain(hub.subscribe(UNKNOWN))
+    assert len(results) == 1 and not results[0]['found']
+    wait_for(lambda: hub.stats()['feeds'] == 1)
+    time.sleep(5 * POLL_INTERVAL)
+    assert stub.requests[UNKNOWN] == 1
+
+
+def test_unsubscribing_tears_down_the_feed(stub):
+    hub = SubscriptionHub(TrackingClient(stub.url), interval=POLL_INTERVAL)
+    first = hub.subscribe(KNOWN)
+    second = hub.subscribe(KNOWN)
+    first.get(timeout=2)
+    feed_poller = hub._feeds[KNOWN].poller
+    hub.unsubscribe(KNOWN, first)
+    assert hub.stats()['feeds'] == 1
+    hub.unsubscribe(KNOWN, second)
+    assert hub.stats() | {'polls': 0, 'changes': 0} == {
+        'polls': 0, 'changes': 0, 'rejected': 0, 'feeds': 0, 'subscribers': 0}
+    feed_poller.join(timeout=2)
+    assert not feed_poller.is_alive()
+    polled = stub.requests[KNOWN]
+    time.sleep(5 * POLL_INTERVAL)
+    assert stub.requests[KNOWN] == polled
+
+
+def test_hub_refuses_subscribers_beyond_its_limit(stub):
+    hub = SubscriptionHub(TrackingClient(stub.url), interval=POLL_INTERVAL, max_subscribers=1)
+    subscriber = hub.subscribe(KNOWN)
+    assert hub.subscribe(KNOWN) is None
+    assert hub.stats()['rejected'] == 1
+    hub.unsubscribe(KNOWN, subscriber)
+
+
+def test_async_hub_sequence_and_cleanup(stub):
+    async def run():
+        client = AsyncTrackingClient(stub.url)
+        hub = AsyncSubscriptionHub(client, interval=POLL_INTERVAL)
+        try:
+            stub.started = time.monotonic()
+            subscriber = hub.subscribe(KNOWN)
+            statuses = []
+            while (result := await asyncio.wait_for(subscriber.get(), 5)) is not END:
+                statuses.append(result['status'])
+            hub.unsubscribe(KNOWN, subscriber)
+
+            dropped = hub.subscribe(KNOWN)
+            await asyncio.wait_for(dropped.get(), 2)
+            poller = hub._feeds[KNOWN].poller
+            hub.unsubscribe(KNOWN, dropped)
+            await asyncio.sleep(0)
+            return statuses, hub.stats(), poller
+        finally:
+            await client.aclose()
+
+    statuses, stats, poller = asyncio.run(run())
+    assert statuses == STATUSES
+    assert stats['feeds'] == 0 and stats['subscribers'] == 0
+    assert poller.done()
+
+
+def test_sse_endpoint_streams_statuses_then_end(app, stub):
+    stub.started = time.monotonic()
+    response = app.app.test_client().get(f'/api/tracking/{KNOWN}/subscribe', buffered=False,
+                                         environ_overrides=THREADED)
+    assert response.mimetype == 'text/event-stream'
+    events = [chunk.decode() for chunk in response.response]
+    response.close()
+
+    statuses = [json.loads(event.split('data: ', 1)[1])['status'] for event in events
+                if event.startswith('event: status')]
+    assert statuses == STATUSES
+    assert events[-1].startswith('event: end')
+    assert app.tracking_hub.stats()['feeds'] == 0
+
+
+def test_sse_disconnect_removes_the_feed(app, stub):
+    response = app.app.test_client().get(f'/api/tracking/{KNOWN}/subscribe', buffered=False,
+                                         environ_overrides=THREADED)
+    assert next(iter(response.response)).startswith(b'event: status')
+    assert app.tracking_hub.stats()['feeds'] == 1
+    response.close()
+    assert app.tracking_hub.stats()['feeds'] == 0
+
+
+def test_sync_workers_refuse_streams(app, stub):
+    response = app.app.test_client().get(f'/api/tracking/{KNOWN}/subscribe',
+                                         environ_overrides={'wsgi.multithread': False})
+    assert response.status_code == 503
+    assert response.get_json()['endpoint'] == f'/api/tracking/{KNOWN}/subscribe'
+    assert app.tracking_hub.stats()['subscribers'] == 0
+    assert stub.total_requests == 0
@@ -0,0 +1,297 @@
+"""
+Tracking client against the local stub backend: caching, coalescing,
+circuit breaking and timeouts, counted by the requests that reach the stub
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.stub_backend import StubBackend, make_package
+from tracking_client import (UNAVAILABLE_MESSAGE, AsyncTrackingClient, CircuitBreaker,
+                             TrackingClient, TTLCache)
+
+KNOWN = 'CMS000001'
+UNKNOWN = 'CMS999999'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def stub():
+    with StubBackend(packages={KNOWN: make_package(KNOWN)}) as backend:
+        yield backend
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_client(stub, clock, **options):
+    """TrackingClient whose cache and breaker run on `clock`"""
+    options.setdefault('cache_ttl', 30)
+    options.setdefault('negative_ttl', 10)
+    client = TrackingClient(stub.url, **options)
+    client.cache = TTLCache(100, clock=clock)
+    client.breaker = CircuitBreaker(options.get('breaker_failures', 3),
+                                    options.get('breaker_reset', 30), clock=clock)
+    return client
+
+
+def test_found_package_is_cached_for_cache_ttl(stub, clock):
+    client = make_client(stub, clock, cache_ttl=30)
+    first = client.get_status(KNOWN)
+    assert first['found'] and first['status'] == 'In Transit'
+    clock.advance(29)
+    assert client.get_status(KNOWN) == first
+    assert stub.requests[KNOWN] == 1
+    clock.advance(2)
+    client.get_status(KNOWN)
+    assert stub.requests[KNOWN] == 2
+    stats = client.stats()
+    assert (stats['hits'], stats['misses'], stats['upstream_calls']) == (1, 2, 2)
+
+
+def test_unknown_id_is_cached_for_negative_ttl(stub, clock):
+    client = make_client(stub, clock, cache_ttl=30, negative_ttl=5)
+    assert not client.get_status(UNKNOWN)['found']
+    clock.advance(4)
+    assert not client.get_status(UNKNOWN)['found']
+    assert stub.requests[UNKNOWN] == 1
+    assert client.stats()['negative_hits'] == 1
+    clock.advance(2)
+    client.get_status(UNKNOWN)
+    assert stub.requests[UNKNOWN] == 2
+
+
+def test_backend_errors_are_not_cached(stub, clock):
+    client = make_client(stub, clock, breaker_failures=100)
+    stub.error_rate = 1.0
+    assert client.get_status(KNOWN)['message'] == UNAVAILABLE_MESSAGE
+    stub.error_rate = 0.0
+    assert client.get_status(KNOWN)['found']
+    assert stub.requests[KNOWN] == 2
+
+
+def test_concurrent_lookups_share_one_upstream_call(stub, clock):
+    client = make_client(stub, clock)
+    stub.latency = 0.2
+    callers = 20
+    barrier = threading.Barrier(callers)
+
+    def lookup(_):
+        barrier.wait()
+        return client.get_status(KNOWN)
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(lookup, range(callers)))
+    assert all(result['found'] for result in results)
+    assert stub.requests[KNOWN] == 1
+    stats = client.stats()
+    assert stats['misses'] == 1 and stats['coalesced'] == callers - 1
+
+
+def test_async_concurrent_lookups_share_one_upstream_call(stub):
+    stub.latency = 0.2
+
+    async def run():
+        client = AsyncTrackingClient(stub.url)
+        try:
+            return await asyncio.gather(*(client.get_status(KNOWN) for _ in range(20))), \
+                client.stats()
+        finally:
+            await client.aclose()
+
+    results, stats = asyncio.run(run())
+    assert all(result['found'] for result in results)
+    assert stub.requests[KNOWN] == 1
+    assert stats['misses'] == 1 and stats['coalesced'] == 19
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_good_probe(stub, clock):
+    client = make_client(stub, clock, breaker_failures=3, breaker_reset=30)
+    stub.error_rate = 1.0
+    for _ in range(3):
+        client.get_status(KNOWN)
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.get_status(KNOWN)['message'] == UNAVAILABLE_MESSAGE
+    assert stub.requests[KNOWN] == 3
+    assert client.stats()['short_circuits'] == 1
+
+    # After the reset timeout a single probe goes through and closes it
+    stub.error_rate = 0.0
+    clock.advance(30)
+    assert client.get_status(KNOWN)['found']
+    assert stub.requests[KNOWN] == 4
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_breaker_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+    clock.advance(30)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(stub, clock):
+    client = make_client(stub, clock, breaker_failures=3, breaker_reset=30)
+    stub.error_rate = 1.0
+    for _ in range(3):
+        client.get_status(KNOWN)
+    clock.advance(30)
+    client.get_status(KNOWN)
+    assert stub.requests[KNOWN] == 4
+    assert client.breaker.state == CircuitBreaker.OPEN
+    # Open again for a full reset timeout
+    clock.advance(29)
+    client.get_status(KNOWN)
+    assert stub.requests[KNOWN] == 4
+
+
+def test_slow_lookup_times_out_per_request(stub, clock):
+    client = make_client(stub, clock, read_timeout=0.2, breaker_failures=100)
+    stub.latency = 1.0
+    started = time.perf_counter()
+    result = client.get_status(KNOWN)
+    assert result['message'] == UNAVAILABLE_MESSAGE
+    assert time.perf_counter() - started < 0.8
+
+    # The timeout bounds each lookup on its own, and nothing is cached
+    stub.latency = 0.0
+    started = time.perf_counter()
+    assert not client.get_status(UNKNOWN)['found']
+    assert time.perf_counter() - started < 0.5
+    assert client.get_status(KNOWN)['found']
+
+
+def test_async_slow_lookup_times_out(stub):
+    stub.latency = 1.0
+
+    async def run():
+        client = AsyncTrackingClient(stub.url, read_timeout=0.2)
+        try:
+            return await client.get_status(KNOWN)
+        finally:
+            await client.aclose()
+
+    started = time.perf_counter()
+    assert asyncio.run(run())['message'] == UNAVAILABLE_MESSAGE
+    assert time.perf_counter() - started < 0.8
+
+
+def test_cancelling_the_first_caller_does_not_fail_the_others(stub):
+    stub.latency = 0.3
+
+    async def run():
+        client = AsyncTrackingClient(stub.url)
+        try:
+            leader = asyncio.ensure_future(client.get_status(KNOWN))
+            await asyncio.sleep(0.05)
+            follower = asyncio.ensure_future(client.get_status(KNOWN))
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            result = await follower
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return result, client.stats()
+        finally:
+            await client.aclose()
+
+    result, stats = asyncio.run(run())
+    assert result['found']
+    assert stub.requests[KNOWN] == 1
+    assert stats['coalesced'] == 1
+
+
+def open_breaker(client, clock):
+    """Trip the breaker and wait out its reset timeout: the next lookup is the probe"""
+    for _ in range(client.breaker.failure_threshold):
+        client.breaker.record_failure()
+    assert client.breaker.state == CircuitBreaker.OPEN
+    clock.advance(client.breaker.reset_timeout)
+
+
+def test_probe_raising_an_unexpected_error_reopens_the_breaker(stub, clock, monkeypatch):
+    client = make_client(stub, clock, breaker_failures=3, breaker_reset=30)
+    open_breaker(client, clock)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('not an HTTP error')
+
+    monkeypatch.setattr(client.session, 'get', broken)
+    assert client.get_status(KNOWN)['message'] == UNAVAILABLE_MESSAGE
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.refresh(KNOWN)['message'] == UNAVAILABLE_MESSAGE
+
+    # The probe was released: after the next reset timeout a good one closes it
+    monkeypatch.undo()
+    clock.advance(30)
+    assert client.get_status(KNOWN)['found']
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_async_probe_raising_an_unexpected_error_reopens_the_breaker(stub, clock):
+    async def run():
+        client = AsyncTrackingClient(stub.url)
+        client.breaker = CircuitBreaker(3, 30, clock=clock)
+        try:
+            open_breaker(client, clock)
+            get = client.client.get
+
+            async def broken(*args, **kwargs):
+                raise RuntimeError('not an HTTP error')
+
+            client.client.get = broken
+            failed = await client.get_status(KNOWN)
+            state = client.breaker.state
+            client.client.get = get
+            clock.advance(30)
+            return failed, state, await client.get_status(KNOWN), client.breaker.state
+        finally:
+            await client.aclose()
+
+    failed, state, result, final = asyncio.run(run())
+    assert failed['message'] == UNAVAILABLE_MESSAGE
+    assert state == CircuitBreaker.OPEN
+    assert result['found'] and final == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_is_given_back(stub, clock):
+    stub.latency = 0.5
+
+    async def run():
+        client = AsyncTrackingClient(stub.url)
+        client.breaker = CircuitBreaker(3, 30, clock=clock)
+        try:
+            open_breaker(client, clock)
+            poll = asyncio.ensure_future(client.refresh(KNOWN))
+            await asyncio.sleep(0.1)
+            assert client.breaker.state == CircuitBreaker.HALF_OPEN
+            poll.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await poll
+            stub.latency = 0.0
+            return await client.get_status(KNOWN), client.breaker.state
+        finally:
+            await client.aclose()
+
+    result, state = asyncio.run(run())
+    assert result['found'] and state == CircuitBreaker.CLOSED
@@ -0,0 +1,369 @@
+"""
+Tracking lookups against the main CMS backend
+Pooled HTTP client with a TTL cache, single-flight request coalescing and a
+circuit breaker in front of CMS_API_URL/api/tracking/<id>
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND_MESSAGE = 'Package not found.'
+UNAVAILABLE_MESSAGE = 'Error connecting to tracking service.'
+
+
+class TTLCache:
+    """Size-bounded cache whose entries expire after a per-entry TTL"""
+
+    def __init__(self, max_size, clock=time.monotonic):
+        self.max_size = max_size
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (self._clock() + ttl, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single probe through (half-open); the
+    probe's outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self._clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Tracking circuit breaker opened")
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+    def release(self):
+        """Give back a probe that ended without an answer (e.g. cancelled);
+        the next call probes again"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class _Call:
+    """An upstream lookup that concurrent callers for the same ID wait on"""
+
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class BaseTrackingClient:
+    """Caching, statistics and circuit breaking shared by the tracking clients.
+
+    Results are cached per tracking ID (found packages for `cache_ttl`
+    seconds, unknown IDs for `negative_ttl` seconds), concurrent lookups of
+    the same ID share a single upstream request, and a circuit breaker fails
+    fast while the backend keeps erroring. Connection and transport errors are
+    never cached. `on_upstream(seconds, ok)`, if given, is called after every
+    request that reached the backend.
+    """
+
+    def __init__(self, base_url, connect_timeout=2.0, read_timeout=5.0,
+                 cache_ttl=30, negative_ttl=10, cache_size=10000, pool_size=20,
+                 breaker_failures=5, breaker_reset=30, on_upstream=None):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.pool_size = pool_size
+        self.cache = TTLCache(cache_size)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self.on_upstream = on_upstream
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ['hits', 'negative_hits', 'misses', 'coalesced', 'upstream_calls',
+             'upstream_errors', 'short_circuits'], 0)
+
+    def url_for(self, tracking_id):
+        return f"{self.base_url}/api/tracking/{tracking_id}"
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _cached(self, tracking_id):
+        result = self.cache.get(tracking_id)
+        if result is not None:
+            self._count('hits' if result['found'] else 'negative_hits')
+        return result
+
+    def _before_fetch(self):
+        """Return an error result if the breaker is open, else count the call"""
+        if not self.breaker.allow():
+            self._count('short_circuits')
+            return {'found': False, 'message': UNAVAILABLE_MESSAGE}
+        self._count('upstream_calls')
+        return None
+
+    def _observe(self, started, ok):
+        if self.on_upstream is not None:
+            self.on_upstream(time.perf_counter() - started, ok)
+
+    def _fetch_failed(self, tracking_id, error):
+        self.breaker.record_failure()
+        self._count('upstream_errors')
+        logger.error(f"Error fetching package status for {tracking_id}: {error}")
+        return {'found': False, 'message': UNAVAILABLE_MESSAGE}
+
+    def _unexpected_error(self, tracking_id, error):
+        """Result for a lookup that raised something other than a backend
+        error; counted as a failure so a half-open breaker's probe is not
+        left taken forever"""
+        self.breaker.record_failure()
+        self._count('upstream_errors')
+        logger.error(f"Unexpected error fetching package status for {tracking_id}: {error}")
+        return {'found': False, 'message': UNAVAILABLE_MESSAGE}
+
+    def _fetch_succeeded(self, tracking_id, data):
+        self.breaker.record_success()
+        return self.remember(tracking_id, parse_tracking_response(data))
+
+    def remember(self, tracking_id, result):
+        """Cache a lookup result under the positive or negative TTL"""
+        self.cache.set(tracking_id, result,
+                       self.cache_ttl if result['found'] else self.negative_ttl)
+        return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = round((lookups - stats['misses']) / lookups, 4) if lookups else 0.0
+        stats['cache_size'] = len(self.cache)
+        stats['circuit'] = self.breaker.state
+        return stats
+
+
+class TrackingClient(BaseTrackingClient):
+    """Blocking tracking client over a pooled keep-alive requests.Session"""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_status(self, tracking_id):
+        """Return {'found': True, status, location, eta} or {'found': False, message}"""
+        result = self._cached(tracking_id)
+        if result is not None:
+            return result
+
+        with self._lock:
+            call = self._inflight.get(tracking_id)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._inflight[tracking_id] = call
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            call.event.wait()
+            return call.result
+
+        try:
+            # The previous leader may have filled the cache since we checked
+            result = self.cache.get(tracking_id)
+            if result is None:
+                result = self._fetch(tracking_id)
+            call.result = result
+        except Exception as e:
+            call.result = self._unexpected_error(tracking_id, e)
+        finally:
+            with self._lock:
+                del self._inflight[tracking_id]
+            call.event.set()
+        return call.result
+
+    def refresh(self, tracking_id):
+        """Fetch `tracking_id` from the backend, bypassing (and updating) the cache"""
+        try:
+            return self._fetch(tracking_id)
+        except Exception as e:
+            return self._unexpected_error(tracking_id, e)
+
+    def _fetch(self, tracking_id):
+        rejected = self._before_fetch()
+        if rejected:
+            return rejected
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.url_for(tracking_id),
+                                        timeout=(self.connect_timeout, self.read_timeout))
+            # 404 carries the backend's "not found" body; other errors raise
+            if response.status_code != 404:
+                response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self._observe(started, False)
+            return self._fetch_failed(tracking_id, e)
+        self._observe(started, True)
+        return self._fetch_succeeded(tracking_id, data)
+
+
+class AsyncTrackingClient(BaseTrackingClient):
+    """Non-blocking tracking client over a pooled httpx.AsyncClient.
+
+    Used by the ASGI entry point; must be used from a single event loop.
+    """
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(base_url, **kwargs)
+        import httpx
+
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size,
+                                max_keepalive_connections=self.pool_size)
+        )
+
+    async def get_status(self, tracking_id):
+        """Return {'found': True, status, location, eta} or {'found': False, message}"""
+        result = self._cached(tracking_id)
+        if result is not None:
+            return result
+
+        task = self._inflight.get(tracking_id)
+        if task is not None:
+            self._count('coalesced')
+        else:
+            self._count('misses')
+            task = asyncio.ensure_future(self._lookup(tracking_id))
+            self._inflight[tracking_id] = task
+        # The lookup runs as a task of its own, so cancelling one caller
+        # (even the one that started it) leaves it running for the others
+        return await asyncio.shield(task)
+
+    async def _lookup(self, tracking_id):
+        """The upstream lookup shared by concurrent get_status calls"""
+        try:
+            return await self._fetch(tracking_id)
+        except Exception as e:
+            return self._unexpected_error(tracking_id, e)
+        finally:
+            del self._inflight[tracking_id]
+
+    async def refresh(self, tracking_id):
+        """Fetch `tracking_id` from the backend, bypassing (and updating) the cache"""
+        try:
+            return await self._fetch(tracking_id)
+        except Exception as e:
+            return self._unexpected_error(tracking_id, e)
+
+    async def _fetch(self, tracking_id):
+        rejected = self._before_fetch()
+        if rejected:
+            return rejected
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(self.url_for(tracking_id))
+            # 404 carries the backend's "not found" body; other errors raise
+            if response.status_code != 404:
+                response.raise_for_status()
+            data = response.json()
+        except (self._httpx.HTTPError, ValueError) as e:
+            self._observe(started, False)
+            return self._fetch_failed(tracking_id, e)
+        except asyncio.CancelledError:
+            # A subscription poller stopped mid-request; not a backend failure
+            self.breaker.release()
+            raise
+        self._observe(started, True)
+        return self._fetch_succeeded(tracking_id, data)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def parse_tracking_response(data):
+    """Convert a /api/tracking/<id> response body into a status result"""
+    if data.get('success') and data.get('data'):
+        package = data['data']
+        return {
+            'found': True,
+            'status': package['status'],
+            'location': package['currentLocation'],
+            'eta': package['expectedDeliveryDate']
+        }
+    return {'found': False, 'message': data.get('message', NOT_FOUND_MESSAGE)}
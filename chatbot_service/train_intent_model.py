@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Offline training for the linear intent classifier
+Trains on a labelled seed set (JSON lines of {"message", "intent"}) plus,
+optionally, the messages in the session event log. Logged messages carry the
+intent the rule engine gave them; those it recognised are added as weakly
+weighted examples, while its 'unknown' labels are left out because most of
+them are misses rather than off-topic messages.
+
+The accuracy reported is measured on a share of the seed set held out of a
+first fit; the saved model is then refitted on every example.
+
+Usage (from chatbot_service/):
+    python train_intent_model.py [--seed training/intent_seed.jsonl]
+                                 [--event-log ./data/chatbot_events.db]
+                                 [--output ./models/intent_model.npz]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import time
+
+import event_log as events
+from config import Config
+from intent_model import train
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def read_seed(path):
+    with open(path, encoding='utf-8') as f:
+        return [(record['message'], record['intent'])
+                for record in map(json.loads, f) if record.get('message')]
+
+
+def read_event_log(path, limit):
+    """(message, intent) for distinct logged messages the rules classified"""
+    examples = {}
+    for (_, kind, _, message, intent, _, _, _, _) in events.EventLog(path).replay():
+        if kind == events.MESSAGE and message and intent != 'unknown':
+            examples[message] = intent
+            if len(examples) >= limit:
+                break
+    return list(examples.items())
+
+
+def split(examples, holdout, rng):
+    """Stratified (train, test) split holding out `holdout` of each intent"""
+    by_intent = {}
+    for example in examples:
+        by_intent.setdefault(example[1], []).append(example)
+    train_set, test_set = [], []
+    for group in by_intent.values():
+        rng.shuffle(group)
+        cut = int(round(len(group) * holdout))
+        test_set.extend(group[:cut])
+        train_set.extend(group[cut:])
+    return train_set, test_set
+
+
+def accuracy(model, examples):
+    if not examples:
+        return float('nan')
+    predicted = model.classify_batch([message for message, _ in examples])
+    correct = sum(intent == expected for (intent, _), (_, expected) in zip(predicted, examples))
+    return correct / len(examples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', default=os.path.join('training', 'intent_seed.jsonl'))
+    parser.add_argument('--event-log', default=Config.EVENT_LOG_PATH,
+                        help='session event log to add weakly labelled messages from')
+    parser.add_argument('--log-weight', type=float, default=0.3,
+                        help='weight of an event log example relative to a seed example')
+    parser.add_argument('--log-limit', type=int, default=100000)
+    parser.add_argument('--output', default=Config.INTENT_MODEL_PATH)
+    parser.add_argument('--features', type=int, default=2 ** 18)
+    parser.add_argument('--epochs', type=int, default=300)
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help='share of the seed set held out to report accuracy')
+    parser.add_argument('--random-seed', type=int, default=13)
+    args = parser.parse_args()
+
+    seed = read_seed(args.seed)
+    logged = []
+    if args.event_log and os.path.exists(args.event_log):
+        logged = read_event_log(args.event_log, args.log_limit)
+    weak = [(message, intent, args.log_weight) for message, intent in logged]
+    logger.info(f"Training on {len(seed)} seed and {len(logged)} event log messages")
+
+    def fit(seed_examples):
+        return train([(message, intent, 1.0) for message, intent in seed_examples] + weak,
+                     args.features, args.epochs,
+                     min_confidence=Config.INTENT_MODEL_MIN_CONFIDENCE)
+
+    holdout_accuracy = None
+    if args.holdout > 0:
+        seed_train, seed_test = split(list(seed), args.holdout, random.Random(args.random_seed))
+        holdout_accuracy = accuracy(fit(seed_train), seed_test)
+        logger.info(f"Held-out accuracy on {len(seed_test)} seed messages: {holdout_accuracy:.3f}")
+
+    start = time.perf_counter()
+    model = fit(seed)
+    logger.info(f"Trained {len(model.classes)} intents in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    model.save(args.output, {
+        'trained_at': time.time(),
+        'seed_examples': len(seed),
+        'log_examples': len(logged),
+        'holdout_accuracy': holdout_accuracy
+    })
+    logger.info(f"Model written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()